@@ -0,0 +1,74 @@
+# -*- mode: python -*-
+"""Measure what breakpoints that don't stop cost a hot loop.
+
+A loop runs under the debugger with a breakpoint that never stops the program:
+on another function of the same file, on the loop's body with a condition
+that is never true, and with an ignore count that is never used up. pdb
+checks every line of the file against the breakpoints and recompiles the
+condition on every hit. PdbDetach looks lines up in its index of breakpoints
+by code object and compiles the condition once.
+
+Run from the repository root::
+
+    python benchmarks/bench_breakpoints.py [iterations]
+"""
+import bdb
+import io
+import os
+import pdb
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+from pdb_attach.detach import PdbDetach  # noqa: E402
+
+
+def hot_loop(n):
+    """Loop with a line to set breakpoints on."""
+    total = 0
+    for i in range(n):
+        total += i
+    return total
+
+
+def elsewhere():
+    """Do nothing, a function in the same file as the loop that is never called."""
+    return None
+
+
+BODY = hot_loop.__code__.co_firstlineno + 4
+
+CASES = [
+    ("other function", "break {}:{}".format(__file__, elsewhere.__code__.co_firstlineno + 2)),
+    ("condition", "break {}:{}, i < 0".format(__file__, BODY)),
+    ("ignore count", "break {}:{}\nignore 1 1000000000".format(__file__, BODY)),
+]
+
+
+def _time_loop(cls, command, iterations):
+    cmds = [command] if command is not None else []
+    debugger = cls(stdin=io.StringIO("\n".join(cmds + ["continue", ""])), stdout=io.StringIO())
+    debugger.set_trace()
+    start = time.perf_counter()
+    hot_loop(iterations)
+    elapsed = time.perf_counter() - start
+    sys.settrace(None)
+    # Breakpoints are shared by all debuggers, start the next one afresh.
+    bdb.Breakpoint.next = 1
+    bdb.Breakpoint.bplist = {}
+    bdb.Breakpoint.bpbynumber = [None]
+    return elapsed
+
+
+if __name__ == "__main__":
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    baseline = _time_loop(PdbDetach, None, iterations)
+    print("Extra time per iteration, in us")
+    print("{:<16} {:>10} {:>10}".format("breakpoint", "pdb", "PdbDetach"))
+    for name, command in CASES:
+        times = [
+            (_time_loop(cls, command, iterations) - baseline) * 1e6 / iterations
+            for cls in (pdb.Pdb, PdbDetach)
+        ]
+        print("{:<16} {:>10.2f} {:>10.2f}".format(name, *times))
@@ -0,0 +1,74 @@
+# -*- mode: python -*-
+"""Measure how fast large output reaches the client.
+
+A child process listens for the debugger and the client prints a string of
+each size, once with the output going over the socket and once through shared
+memory. The time includes building the string and its repr in the child, which
+is the same for both.
+
+Run from the repository root::
+
+    python benchmarks/bench_bulk_output.py
+"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, ROOT)
+
+from pdb_attach.client import PdbSignaler  # noqa: E402
+
+SIZES = [1 << 20, 16 << 20, 128 << 20]
+
+TARGET = """
+import sys, time
+import pdb_attach
+pdb_attach.listen(0, ready=sys.argv[1])
+running = True
+while running:
+    time.sleep(0.01)
+"""
+
+
+def run(size, shared_memory, repeat):
+    """Return the best time in ms to print a string of `size` bytes."""
+    directory = tempfile.mkdtemp()
+    ready = os.path.join(directory, "ready")
+    env = os.environ.copy()
+    env["PYTHONPATH"] = ROOT
+    target = subprocess.Popen([sys.executable, "-c", TARGET, ready], env=env)
+    try:
+        client = PdbSignaler(None, None)
+        client.connect(ready=ready)
+        client.recv()
+        if shared_memory:
+            client.share_memory()
+        times = []
+        for _ in range(repeat):
+            start = time.time()
+            output, _ = client.send_and_recv("p 'x' * {}".format(size))
+            times.append((time.time() - start) * 1000)
+            assert len(output) > size
+        client.send_and_recv("running = False")
+        client.send_and_recv("detach")
+        target.wait()
+    finally:
+        if target.poll() is None:
+            target.kill()
+        shutil.rmtree(directory)
+    return min(times)
+
+
+if __name__ == "__main__":
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print("{:>10} {:>14} {:>14}".format("size", "socket (ms)", "shm (ms)"))
+    for size in SIZES:
+        print(
+            "{:>10} {:>14.1f} {:>14.1f}".format(
+                "{} MiB".format(size >> 20), run(size, False, repeat), run(size, True, repeat)
+            )
+        )
@@ -0,0 +1,58 @@
+# -*- mode: python -*-
+"""Measure how long the client takes to start.
+
+Tools that fan out over many processes start the client once per process, so
+its startup time adds up. Each variant runs in a fresh interpreter and reports
+the wall time of the whole process and the number of modules it imported.
+`--help` is used so the client exits before connecting to anything.
+
+Run from the repository root::
+
+    python benchmarks/bench_client_startup.py
+"""
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+
+COUNT_MODULES = "import sys; {setup}; print(len(sys.modules))"
+
+VARIANTS = [
+    ("baseline (python -c pass)", ["-c", "pass"], "pass"),
+    (
+        "python -m pdb_attach --help",
+        ["-m", "pdb_attach", "--help"],
+        "import pdb_attach.__main__",
+    ),
+    (
+        "import graph with pdb (before)",
+        ["-c", "import pdb_attach.pdb_signal"],
+        "import pdb_attach.pdb_signal",
+    ),
+]
+
+
+def run(args, setup, repeat):
+    """Return the best wall time in ms of `args` and the modules `setup` loads."""
+    env = os.environ.copy()
+    env["PYTHONPATH"] = ROOT
+    times = []
+    with open(os.devnull, "w") as devnull:
+        for _ in range(repeat):
+            start = time.time()
+            subprocess.check_call([sys.executable] + args, env=env, stdout=devnull)
+            times.append((time.time() - start) * 1000)
+    out = subprocess.check_output(
+        [sys.executable, "-c", COUNT_MODULES.format(setup=setup)], env=env
+    )
+    return min(times), int(out)
+
+
+if __name__ == "__main__":
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    print("{:<30} {:>10} {:>8}".format("variant", "time (ms)", "modules"))
+    for name, args, setup in VARIANTS:
+        elapsed, modules = run(args, setup, repeat)
+        print("{:<30} {:>10.2f} {:>8}".format(name, elapsed, modules))
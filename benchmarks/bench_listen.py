@@ -0,0 +1,56 @@
+# -*- mode: python -*-
+"""Measure what calling listen() costs a process that never gets debugged.
+
+Compares the lazy `pdb_attach.listen` against building the debugger up front
+with `PdbSignal.listen`. Each variant runs in a fresh interpreter and reports
+the time spent importing and listening, and the peak RSS of the process.
+
+Run from the repository root::
+
+    python benchmarks/bench_listen.py
+"""
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+
+TEMPLATE = """
+import resource, time
+start = time.time()
+{setup}
+elapsed = time.time() - start
+print(elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+VARIANTS = [
+    ("baseline (no pdb_attach)", "pass"),
+    ("lazy pdb_attach.listen", "import pdb_attach; pdb_attach.listen(0)"),
+    (
+        "eager PdbSignal.listen",
+        "from pdb_attach.pdb_signal import PdbSignal; PdbSignal.listen(0)",
+    ),
+]
+
+
+def run(setup, repeat):
+    """Return the best time in ms and the median peak RSS in KiB of `setup`."""
+    env = os.environ.copy()
+    env["PYTHONPATH"] = ROOT
+    times, rss = [], []
+    for _ in range(repeat):
+        out = subprocess.check_output(
+            [sys.executable, "-c", TEMPLATE.format(setup=setup)], env=env
+        )
+        elapsed, maxrss = out.decode().split()
+        times.append(float(elapsed) * 1000)
+        rss.append(int(maxrss))
+    return min(times), sorted(rss)[len(rss) // 2]
+
+
+if __name__ == "__main__":
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    print("{:<28} {:>10} {:>12}".format("variant", "time (ms)", "max RSS (KiB)"))
+    for name, setup in VARIANTS:
+        elapsed, maxrss = run(setup, repeat)
+        print("{:<28} {:>10.2f} {:>12}".format(name, elapsed, maxrss))
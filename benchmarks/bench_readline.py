@@ -0,0 +1,65 @@
+# -*- mode: python -*-
+"""Measure how reading pasted input scales with its size.
+
+Two shapes of input are timed at growing sizes: many short lines sent in one
+frame, like a paste into `interact`, and one long line split over many small
+frames. Time per KiB should stay flat as the input grows.
+
+Run from the repository root::
+
+    python benchmarks/bench_readline.py
+"""
+import os
+import socket
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+from pdb_attach.pdb_socket import PdbIOWrapper  # noqa: E402
+
+
+def _time_reads(frames, reads):
+    sock1, sock2 = socket.socketpair()
+    reader, writer = PdbIOWrapper(sock1), PdbIOWrapper(sock2)
+
+    def send():
+        for frame in frames:
+            writer.write(frame)
+
+    sender = threading.Thread(target=send)
+    start = time.time()
+    sender.start()
+    for _ in range(reads):
+        reader.readline()
+    elapsed = time.time() - start
+    sender.join()
+    sock1.close()
+    sock2.close()
+    return elapsed
+
+
+def many_lines(size):
+    """Paste `size` bytes of short lines in a single frame."""
+    line = "x = 1" + os.linesep
+    count = size // len(line)
+    return _time_reads([line * count], count)
+
+
+def one_long_line(size):
+    """Send a single `size` byte line in 64 byte frames."""
+    frames = ["x" * 64] * (size // 64) + [os.linesep]
+    return _time_reads(frames, 1)
+
+
+if __name__ == "__main__":
+    print("{:<16} {:>10} {:>12} {:>12}".format("input", "size (KiB)", "time (ms)", "us per KiB"))
+    for name, func in [("many lines", many_lines), ("one long line", one_long_line)]:
+        for kib in (128, 512, 2048):
+            elapsed = func(kib * 1024)
+            print(
+                "{:<16} {:>10} {:>12.1f} {:>12.1f}".format(
+                    name, kib, elapsed * 1000, elapsed * 1e6 / kib
+                )
+            )
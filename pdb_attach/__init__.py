@@ -1,17 +1,18 @@
 # -*- mode: python -*-
 """pdb-attach is a python debugger that can attach to running processes."""
 import os
-import platform
-import warnings
+import sys
 
-from pdb_attach.pdb_signal import PdbSignal
+from pdb_attach.listener import PdbListener, notify_ready
 
 __all__ = ["listen", "unlisten"]
 
 with open(os.path.join(os.path.abspath(os.path.dirname(__file__)), "VERSION.txt")) as f:
     __version__ = f.read().strip()
 
-if platform.system() == "Windows":
+if sys.platform.startswith("win"):
+    import warnings
+
     warnings.warn(
         (
             "pdb-attach does not support Windows. listen() does nothing and the "
@@ -22,11 +23,110 @@ if platform.system() == "Windows":
     )
 
 
-def listen(port):
-    """Start listening on port."""
-    PdbSignal.listen(port)
+_listener = None
+
+
+def listen(
+    port,
+    idle_timeout=None,
+    signum=None,
+    backend="signal",
+    transcript=None,
+    ready=None,
+    postmortem=None,
+    command_timeout=None,
+):
+    """Start listening on port.
+
+    If `idle_timeout` is given, the debugger detaches after the client has been
+    idle for that many seconds.
+
+    If `transcript` is given, every frame of each session is appended to that
+    file. Replay it with `python -m pdb_attach.replay`.
+
+    With the default "signal" backend, the client sends the process a signal to
+    start the debugger, SIGUSR2 unless `signum` says otherwise. Only a signal
+    handler is installed here. The debugger is built, and the port bound, when a
+    client first connects. Children forked afterwards listen on ports of their
+    own, `port + n` for the n-th child and `port + n + 100 * m` for its m-th
+    child, see `pdb_attach.listener.child_port`.
+
+    The "thread" backend doesn't use signals, and `signum` must not be given. A
+    listener thread accepts clients and breaks into the thread that called
+    `listen`. Connect to it with `--signal 0`.
+
+    If `ready` is given, it is notified once a client can attach. It can be a
+    callable, called with the port, or a file descriptor or path that the pid
+    and port are written to, see `pdb_attach.listener.notify_ready`. Clients
+    wait for a path with `--ready`. With port 0 the signal backend binds the
+    port right away, so it can be reported.
+
+    If `command_timeout` is given, debugger commands running for longer than
+    that many seconds are cancelled. Clients cancel commands with Ctrl-C either
+    way.
+
+    If `postmortem` is given, a snapshot of the frames is saved in that
+    directory when the process dies of an unhandled exception. Browse it with
+    `pdb-attach --postmortem SNAPSHOT`, see `pdb_attach.postmortem`.
+    """
+    global _listener
+
+    if backend == "thread" and signum is not None:
+        raise ValueError("The thread backend doesn't use signals, don't give signum.")
+    if _listener is not None:
+        unlisten()
+    if backend == "signal":
+        listener = PdbListener.listen(
+            port,
+            idle_timeout=idle_timeout,
+            signum=signum,
+            transcript=transcript,
+            command_timeout=command_timeout,
+        )
+        _listener = (PdbListener, signum)
+        if listener is None:
+            # Windows, nothing is listening.
+            return
+        if port == 0 and ready is not None:
+            port = listener.debugger.bound_port
+    elif backend == "thread":
+        from pdb_attach.pdb_thread import PdbThread
+
+        PdbThread.listen(
+            port,
+            idle_timeout=idle_timeout,
+            transcript=transcript,
+            command_timeout=command_timeout,
+        )
+        _listener = (PdbThread, None)
+        port = PdbThread._listener.bound_port
+    else:
+        raise ValueError("Unknown backend {!r}.".format(backend))
+
+    if postmortem is not None:
+        from pdb_attach import postmortem as _postmortem
+
+        _postmortem.install(postmortem)
+
+    if ready is not None:
+        notify_ready(ready, port)
 
 
 def unlisten():
     """Stop listening."""
-    PdbSignal.unlisten()
+    global _listener
+
+    if _listener is None:
+        # Nothing to undo, but still warn on Windows.
+        PdbListener.unlisten()
+        return
+
+    if "pdb_attach.postmortem" in sys.modules:
+        sys.modules["pdb_attach.postmortem"].uninstall()
+
+    cls, signum = _listener
+    _listener = None
+    if signum is None:
+        cls.unlisten()
+    else:
+        cls.unlisten(signum)
@@ -1,4 +1,13 @@
-from typing import Union
+from typing import Any, Callable, Optional, Union
 
-def listen(port: Union[int, str]) -> None: ...
+def listen(
+    port: Union[int, str],
+    idle_timeout: Optional[float] = ...,
+    signum: Optional[int] = ...,
+    backend: str = ...,
+    transcript: Optional[str] = ...,
+    ready: Optional[Union[Callable[[int], Any], int, str]] = ...,
+    postmortem: Optional[str] = ...,
+    command_timeout: Optional[float] = ...,
+) -> None: ...
 def unlisten() -> None: ...
@@ -1,36 +1,253 @@
 # -*- mode: python -*-
 """Pdb-attach client that can be run as a module."""
 import argparse
+import sys
+import threading
 
-from pdb_attach.pdb_signal import PdbSignaler
+from pdb_attach.client import PdbSignaler, wait_ready
+
+try:
+    # The signal module wraps _signal with enums, which costs more to import than
+    # the rest of the client.
+    import _signal as signal
+except ImportError:
+    import signal  # type: ignore
+
+
+def _signal_number(value):
+    """Convert a signal name, like USR1 or SIGUSR1, or number to a number."""
+    if value.isdigit():
+        return int(value)
+    name = value.upper()
+    if not name.startswith("SIG"):
+        name = "SIG" + name
+    try:
+        return int(getattr(signal, name))
+    except AttributeError:
+        raise argparse.ArgumentTypeError("unknown signal {}".format(value))
+
+
+class _Watcher(threading.Thread):
+    """Print output the server sends while the user is typing, e.g. idle warnings."""
+
+    def __init__(self, client):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self._client = client
+        self._done = threading.Event()
+
+    def run(self):
+        """Poll the server until stopped or the connection closes."""
+        closed = False
+        while not self._done.is_set() and not closed:
+            lines, closed = self._client.poll(0.1)
+            if len(lines) > 0:
+                sys.stdout.write(lines)
+                sys.stdout.flush()
+
+    def stop(self):
+        """Stop polling and wait for the thread to finish."""
+        self._done.set()
+        self.join()
+
+
+def observe(client, ready=None):
+    """Print the output of an active session until it ends."""
+    if ready is not None:
+        client.server_pid, client.port = wait_ready(ready)
+    client.observe()
+    closed = False
+    while closed is False:
+        lines, closed = client.recv()
+        sys.stdout.write(lines)
+        sys.stdout.flush()
+
+
+def _read_source(path, lines):
+    """Return the local file at `path`, or the error to show if it can't be read.
+
+    `lines` is the output shown before the command was entered, its prompt is
+    shown again after the error.
+    """
+    try:
+        with open(path) as f:
+            return f.read(), None
+    except IOError as e:
+        return None, ("*** {}\n{}".format(e, lines.rpartition("\n")[2]), False)
+
+
+def run_script(client, path, lines):
+    """Upload the local file at `path` and run it in the current frame."""
+    source, error = _read_source(path, lines)
+    if error is not None:
+        return error
+    return client.run_script(path, source)
+
+
+def patch(client, target, path, lines):
+    """Upload the local file at `path` and patch `target` with its definition."""
+    source, error = _read_source(path, lines)
+    if error is not None:
+        return error
+    return client.patch(target, path, source)
+
+
+class _CancelOnInterrupt(object):
+    """Turn Ctrl-C into a request to cancel the command the server is running.
+
+    A second Ctrl-C interrupts the client as usual, in case the server can't
+    cancel the command.
+    """
+
+    def __init__(self, client):
+        self._client = client
+        self._previous = None
+
+    def __enter__(self):
+        self._previous = signal.signal(signal.SIGINT, self._cancel)
+        return self
+
+    def __exit__(self, *exc_info):
+        signal.signal(signal.SIGINT, self._previous)
+
+    def _cancel(self, signum, frame):
+        signal.signal(signal.SIGINT, self._previous)
+        if self._client.cancel():
+            sys.stderr.write("\nCancelling the command, press Ctrl-C again to quit.\n")
+            sys.stderr.flush()
 
-if "__main__" == __name__:
-    parser = argparse.ArgumentParser(description=__doc__)
-    parser.add_argument(
-        "pid", type=int, metavar="PID", help="The pid of the process to debug."
-    )
-    parser.add_argument(
-        "port",
-        type=int,
-        metavar="PORT",
-        help="The port to connect to the running process.",
-    )
-    args = parser.parse_args()
 
-    client = PdbSignaler(args.pid, args.port)
-    client.connect()
+def send(client, line, lines):
+    """Send a line the user entered, uploading the file for `runscript` and `patch`.
+
+    Ctrl-C while waiting for the output cancels the command.
+    """
+    cmd, _, path = line.strip().partition(" ")
+    args = path.split()
+    with _CancelOnInterrupt(client):
+        if cmd == "runscript" and path:
+            return run_script(client, path.strip(), lines)
+        if cmd == "patch" and len(args) == 2:
+            return patch(client, args[0], args[1], lines)
+        return client.send_and_recv(line)
+
+
+def drive(client, script=None, ready=None, shared_memory=False):
+    """Start a session and relay commands from stdin until it ends.
+
+    If `script` is given, that file is run before reading commands. If `ready`
+    is given, wait for the process to write that readiness file first. With
+    `shared_memory`, large output comes through memory shared with the process.
+    """
+    client.connect(ready=ready)
     lines, closed = client.recv()
+    if shared_memory and closed is False:
+        client.share_memory()
+    if script is not None and closed is False:
+        more, closed = run_script(client, script, lines)
+        lines += more
     while closed is False:
+        watcher = _Watcher(client)
+        watcher.start()
         try:
             try:
                 to_server = raw_input(lines)  # type: ignore
             except NameError:
                 # Ignore flake8 warning about input in Python 2.7 since we are checking for raw_input first.
                 to_server = input(lines)  # noqa:S322
+            watcher.stop()
 
-            lines, closed = client.send_and_recv(to_server)
+            lines, closed = send(client, to_server, lines)
         except EOFError:
+            watcher.stop()
             lines, closed = client.raise_eoferror()
 
+        # The connection dropped without the session ending, try to pick it
+        # back up where it was left.
+        while closed is True and client.resume(timeout=10):
+            more, closed = client.recv()
+            lines += more
+
     if len(lines) > 0:
         print(lines)
+
+
+def main(argv=None):
+    """Run the client with the command line arguments."""
+    parser = argparse.ArgumentParser(prog="pdb-attach", description=__doc__)
+    parser.add_argument(
+        "pid",
+        type=int,
+        nargs="?",
+        metavar="PID",
+        help="The pid of the process to debug. Optional with --ready.",
+    )
+    parser.add_argument(
+        "port",
+        type=int,
+        nargs="?",
+        metavar="PORT",
+        help="The port to connect to the running process. Optional with --ready.",
+    )
+    parser.add_argument(
+        "--signal",
+        type=_signal_number,
+        default=None,
+        metavar="SIGNAL",
+        help=(
+            "The signal the process listens for, by name or number. Defaults to "
+            "SIGUSR2. Use 0 for processes listening with the thread backend."
+        ),
+    )
+    parser.add_argument(
+        "--observe",
+        action="store_true",
+        help="Watch an active session read-only instead of starting one.",
+    )
+    parser.add_argument(
+        "--script",
+        metavar="FILE",
+        help=(
+            "Run FILE in the current frame once attached, before reading commands. "
+            "The file is sent in one message, so long scripts take one round trip."
+        ),
+    )
+    parser.add_argument(
+        "--ready",
+        metavar="FILE",
+        help=(
+            "Wait for the process to write FILE, passed as `ready` to listen(), "
+            "and attach to the pid and port in it."
+        ),
+    )
+    parser.add_argument(
+        "--shared-memory",
+        action="store_true",
+        help=(
+            "Receive large output, like heap summaries or big pp calls, through "
+            "shared memory instead of the socket. Needs the same host and user."
+        ),
+    )
+    parser.add_argument(
+        "--postmortem",
+        metavar="SNAPSHOT",
+        help="Browse a snapshot saved by a process that crashed, instead of attaching.",
+    )
+    args = parser.parse_args(argv)
+    if args.postmortem is not None:
+        from pdb_attach.postmortem import browse
+
+        browse(args.postmortem)
+        return
+    if args.ready is None and args.port is None:
+        parser.error("PID and PORT are required without --ready or --postmortem")
+
+    client = PdbSignaler(args.pid, args.port, args.signal)
+    if args.observe:
+        observe(client, args.ready)
+    else:
+        drive(client, args.script, args.ready, args.shared_memory)
+
+
+if "__main__" == __name__:
+    main()
@@ -0,0 +1,35 @@
+import threading
+from types import FrameType
+from typing import Any, List, Optional, Tuple
+
+from pdb_attach.client import PdbClient
+
+def _signal_number(value: str) -> int: ...
+
+class _Watcher(threading.Thread):
+    def __init__(self, client: PdbClient) -> None: ...
+    def run(self) -> None: ...
+    def stop(self) -> None: ...
+
+class _CancelOnInterrupt:
+    def __init__(self, client: PdbClient) -> None: ...
+    def __enter__(self) -> _CancelOnInterrupt: ...
+    def __exit__(self, *exc_info: Any) -> None: ...
+    def _cancel(self, signum: int, frame: Optional[FrameType]) -> None: ...
+
+def observe(client: PdbClient, ready: Optional[str] = ...) -> None: ...
+def _read_source(
+    path: str, lines: str
+) -> Tuple[Optional[str], Optional[Tuple[str, bool]]]: ...
+def run_script(client: PdbClient, path: str, lines: str) -> Tuple[str, bool]: ...
+def patch(
+    client: PdbClient, target: str, path: str, lines: str
+) -> Tuple[str, bool]: ...
+def send(client: PdbClient, line: str, lines: str) -> Tuple[str, bool]: ...
+def drive(
+    client: PdbClient,
+    script: Optional[str] = ...,
+    ready: Optional[str] = ...,
+    shared_memory: bool = ...,
+) -> None: ...
+def main(argv: Optional[List[str]] = ...) -> None: ...
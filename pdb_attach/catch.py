@@ -0,0 +1,298 @@
+# -*- mode: python -*-
+"""Catchpoints that stop the program when an exception is raised."""
+import pdb
+import sys
+import threading
+import traceback
+
+# Python 3.12 and later hook exception events without tracing.
+monitoring = getattr(sys, "monitoring", None)
+
+# sys.monitoring tool ids tried in order, the one reserved for debuggers first.
+_TOOL_IDS = (0, 3, 4)
+
+_lock = threading.Lock()
+_tool_id = None
+_armed = []
+_armed_types = ()
+
+
+def _in_debugger(frame):
+    """Return whether `frame` was called by the debugger, not the program."""
+    while frame is not None:
+        if frame.f_globals.get("__name__", "").startswith("pdb_attach."):
+            return True
+        frame = frame.f_back
+    return False
+
+
+def _on_raise(code, instruction_offset, exception):
+    """Count exceptions raised by the program against the armed catchpoints."""
+    if not isinstance(exception, _armed_types):
+        return
+    tb = exception.__traceback__
+    if tb is not None and tb.tb_next is not None:
+        # Propagating out of a frame below, counted when it was raised there.
+        return
+    frame = sys._getframe(1)
+    for catchpoint in list(_armed):
+        if isinstance(exception, catchpoint.exc_type):
+            catchpoint.hit(exception, frame)
+
+
+def _update_types():
+    global _armed_types
+    _armed_types = tuple(set(catchpoint.exc_type for catchpoint in _armed))
+
+
+def _arm(catchpoint):
+    """Start counting the exceptions `catchpoint` is for."""
+    global _tool_id
+
+    with _lock:
+        if _tool_id is None:
+            for tool_id in _TOOL_IDS:
+                try:
+                    monitoring.use_tool_id(tool_id, "pdb-attach")
+                except ValueError:
+                    continue
+                monitoring.register_callback(
+                    tool_id, monitoring.events.RAISE, _on_raise
+                )
+                monitoring.set_events(tool_id, monitoring.events.RAISE)
+                _tool_id = tool_id
+                break
+            else:
+                raise ValueError("all sys.monitoring tools are in use")
+        _armed.append(catchpoint)
+        _update_types()
+
+
+def _disarm(catchpoint):
+    """Stop counting for `catchpoint`, unhooking exceptions after the last one."""
+    global _tool_id
+
+    with _lock:
+        if catchpoint not in _armed:
+            return
+        _armed.remove(catchpoint)
+        _update_types()
+        if not _armed and _tool_id is not None:
+            monitoring.set_events(_tool_id, 0)
+            monitoring.register_callback(_tool_id, monitoring.events.RAISE, None)
+            monitoring.free_tool_id(_tool_id)
+            _tool_id = None
+
+
+def _parse_options(args):
+    """Return the `every` and `max` options of catch, or None if they're invalid."""
+    options = {"every": 1, "max": 1}
+    if len(args) % 2:
+        return None
+    for name, value in zip(args[::2], args[1::2]):
+        if name not in options or not value.isdigit():
+            return None
+        options[name] = int(value)
+    if len(set(args[::2])) != len(args) // 2 or options["every"] == 0:
+        return None
+    return options
+
+
+class Catchpoint(object):
+    """An exception type to stop on and how often to stop.
+
+    Parameters
+    ----------
+    number : int
+        Number the debugger refers to the catchpoint by.
+    expr : str
+        The expression the exception type was given as.
+    exc_type : type
+        Exceptions of this type, and its subclasses, are caught.
+    every : int
+        Stop at every `every`-th exception raised.
+    limit : int
+        Stop at most `limit` times, then stop counting. 0 only counts.
+    debugger : PdbCatch
+        Debugger to break into.
+    """
+
+    def __init__(self, number, expr, exc_type, every, limit, debugger):
+        self.number = number
+        self.expr = expr
+        self.exc_type = exc_type
+        self.every = every
+        self.limit = limit
+        self.count = 0
+        self.stops = 0
+        # (filename, lineno, function, thread) of the last exception raised.
+        self.last = None
+        self._debugger = debugger
+
+    @property
+    def done(self):
+        """Return whether the catchpoint stopped as many times as it may."""
+        return 0 < self.limit <= self.stops
+
+    def hit(self, exception, frame):
+        """Count an exception raised by the code running in `frame`."""
+        self.count += 1
+        self.last = (
+            frame.f_code.co_filename,
+            frame.f_lineno,
+            frame.f_code.co_name,
+            threading.current_thread().name,
+        )
+        if self.limit and self.count % self.every == 0:
+            self._debugger._catch_raised(self, exception, frame)
+
+    def remove(self):
+        """Stop counting, the exceptions are no longer caught."""
+        _disarm(self)
+
+
+class PdbCatch(pdb.Pdb):
+    """PdbCatch extends Pdb with catchpoints on raised exceptions.
+
+    Only exception events are hooked, through `sys.monitoring`, and nothing is
+    traced. Programs that raise exceptions as part of their normal control flow
+    keep running at close to full speed while a catchpoint is armed.
+    """
+
+    _catchpoints = None
+    _catch_number = 0
+    _catch_stopped = False
+
+    def interaction(self, *args, **kwargs):
+        """Remember that the debugger is stopped, other threads don't stop on catchpoints."""
+        self._catch_stopped = True
+        try:
+            return pdb.Pdb.interaction(self, *args, **kwargs)
+        finally:
+            self._catch_stopped = False
+
+    def do_catch(self, arg):
+        """Stop when an exception is raised, sampling which occurrences stop.
+
+        Usage: catch [exception [every N] [max M]]
+
+        Stop at every Nth exception of the given type, or a subclass, raised
+        anywhere in the program, at most M times. Both default to 1, and with
+        `max 0` exceptions are only counted. An exception is counted once
+        where it is raised, not again as it propagates. Once the catchpoint
+        stopped M times, exceptions are no longer hooked.
+
+        Without an argument, list the catchpoints and how many exceptions they
+        counted.
+        """
+        args = arg.split()
+        if not args:
+            self._list_catchpoints()
+            return
+        options = _parse_options(args[1:])
+        if options is None:
+            self.stdout.write("*** Usage: catch [exception [every N] [max M]]\n")
+            return
+        if monitoring is None:
+            self.stdout.write(
+                "*** Catchpoints need sys.monitoring, Python 3.12 or later.\n"
+            )
+            return
+        try:
+            exc_type = self._getval(args[0])
+        except Exception:
+            # _getval printed the error.
+            return
+        if not isinstance(exc_type, type) or not issubclass(exc_type, BaseException):
+            self.stdout.write("*** {} is not an exception class.\n".format(args[0]))
+            return
+
+        self._catch_number += 1
+        catchpoint = Catchpoint(
+            self._catch_number,
+            args[0],
+            exc_type,
+            options["every"],
+            options["max"],
+            self,
+        )
+        try:
+            _arm(catchpoint)
+        except ValueError as e:
+            self.stdout.write("*** Can't catch {}: {}\n".format(args[0], e))
+            return
+
+        if self._catchpoints is None:
+            self._catchpoints = {}
+        self._catchpoints[catchpoint.number] = catchpoint
+        self.stdout.write(
+            "Catchpoint {} on {}\n".format(catchpoint.number, catchpoint.expr)
+        )
+
+    def do_uncatch(self, arg):
+        """Remove catchpoints.
+
+        Usage: uncatch [number ...]
+
+        Without numbers, remove all catchpoints.
+        """
+        catchpoints = self._catchpoints or {}
+        numbers = arg.split() or [str(number) for number in sorted(catchpoints)]
+        for number in numbers:
+            catchpoint = (
+                catchpoints.pop(int(number), None) if number.isdigit() else None
+            )
+            if catchpoint is None:
+                self.stdout.write("*** No catchpoint {!r}.\n".format(number))
+                continue
+            catchpoint.remove()
+            self.stdout.write(
+                "Removed catchpoint {} on {}\n".format(
+                    catchpoint.number, catchpoint.expr
+                )
+            )
+
+    def _list_catchpoints(self):
+        catchpoints = self._catchpoints or {}
+        if not catchpoints:
+            self.stdout.write("No catchpoints.\n")
+        for number in sorted(catchpoints):
+            catchpoint = catchpoints[number]
+            self.stdout.write(
+                "{:<3} {} every {} max {}{}, {} raised, {} stops\n".format(
+                    number,
+                    catchpoint.expr,
+                    catchpoint.every,
+                    catchpoint.limit,
+                    " (done)" if catchpoint.done else "",
+                    catchpoint.count,
+                    catchpoint.stops,
+                )
+            )
+            if catchpoint.last is not None:
+                self.stdout.write(
+                    "    last at {}({}){}() in thread {}\n".format(*catchpoint.last)
+                )
+
+    def _can_break_on_catch(self):
+        """Return whether an exception may stop the program in the debugger."""
+        return True
+
+    def _catch_raised(self, catchpoint, exception, frame):
+        with _lock:
+            if catchpoint.done or self._catch_stopped or not self._can_break_on_catch():
+                return
+            if _in_debugger(frame):
+                # Stopping the debugger's own threads would hang it.
+                return
+            self._catch_stopped = True
+            catchpoint.stops += 1
+        if catchpoint.done:
+            _disarm(catchpoint)
+        self.stdout.write(
+            "Catchpoint {}: {}".format(
+                catchpoint.number,
+                traceback.format_exception_only(type(exception), exception)[-1],
+            )
+        )
+        pdb.Pdb.set_trace(self, frame)
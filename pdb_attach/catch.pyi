@@ -0,0 +1,56 @@
+import pdb
+import threading
+from types import CodeType, FrameType, ModuleType
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+monitoring: Optional[ModuleType]
+_TOOL_IDS: Tuple[int, ...]
+_lock: threading.Lock
+_tool_id: Optional[int]
+_armed: List[Catchpoint]
+_armed_types: Tuple[Type[BaseException], ...]
+
+def _in_debugger(frame: Optional[FrameType]) -> bool: ...
+def _on_raise(
+    code: CodeType, instruction_offset: int, exception: BaseException
+) -> None: ...
+def _update_types() -> None: ...
+def _parse_options(args: List[str]) -> Optional[Dict[str, int]]: ...
+def _arm(catchpoint: Catchpoint) -> None: ...
+def _disarm(catchpoint: Catchpoint) -> None: ...
+
+class Catchpoint:
+    number: int = ...
+    expr: str = ...
+    exc_type: Type[BaseException] = ...
+    every: int = ...
+    limit: int = ...
+    count: int = ...
+    stops: int = ...
+    last: Optional[Tuple[str, int, str, str]] = ...
+    def __init__(
+        self,
+        number: int,
+        expr: str,
+        exc_type: Type[BaseException],
+        every: int,
+        limit: int,
+        debugger: PdbCatch,
+    ) -> None: ...
+    @property
+    def done(self) -> bool: ...
+    def hit(self, exception: BaseException, frame: FrameType) -> None: ...
+    def remove(self) -> None: ...
+
+class PdbCatch(pdb.Pdb):
+    _catchpoints: Optional[Dict[int, Catchpoint]] = ...
+    _catch_number: int = ...
+    _catch_stopped: bool = ...
+    def interaction(self, *args: Any, **kwargs: Any) -> None: ...
+    def do_catch(self, arg: str) -> None: ...
+    def do_uncatch(self, arg: str) -> None: ...
+    def _list_catchpoints(self) -> None: ...
+    def _can_break_on_catch(self) -> bool: ...
+    def _catch_raised(
+        self, catchpoint: Catchpoint, exception: BaseException, frame: FrameType
+    ) -> None: ...
@@ -0,0 +1,340 @@
+# -*- mode: python -*-
+"""Client for the debugger.
+
+The client is started many times by tools that fan out over processes, so this
+module only imports what talking to the debugger needs and never imports `pdb`.
+"""
+import errno
+import os
+import socket
+import time
+
+try:
+    # The signal module wraps _signal with enums, which costs more to import than
+    # everything else here.
+    import _signal as signal
+except ImportError:
+    import signal  # type: ignore
+
+from pdb_attach.transport import PdbIOWrapper, SocketError
+
+
+def wait_ready(path, timeout=5.0):
+    """Wait for a process to report it is ready through the file at `path`.
+
+    The file is written by `pdb_attach.listen` when given `ready=path`.
+
+    Parameters
+    ----------
+    path
+        Path of the readiness file.
+    timeout
+        Seconds to wait for the file to appear.
+
+    Returns
+    -------
+    (int, int) : The pid and port of the process.
+
+    Raises
+    ------
+    IOError
+        If the file doesn't appear in time.
+    """
+    deadline = time.time() + timeout
+    while True:
+        try:
+            with open(path) as f:
+                pid, port = f.read().split()
+            return int(pid), int(port)
+        except (IOError, ValueError):
+            if time.time() >= deadline:
+                raise IOError(errno.ETIMEDOUT, "Timed out waiting for {}".format(path))
+            time.sleep(0.01)
+
+
+class PdbClient(object):
+    """Front end that communicates with the PDB server.
+
+    Parameters
+    ----------
+    port
+        Port of the running process to connect to.
+
+    Attributes
+    ----------
+    port
+        Port of the running process to connect to.
+    """
+
+    def __init__(self, port):
+        self.port = port
+
+        # Client connection.
+        self._client = None
+        self._client_io = None
+
+    def connect(self, timeout=0.0):
+        """Connect to the PDB server.
+
+        Parameters
+        ----------
+        timeout
+            Seconds to keep retrying while the server is not listening yet.
+        """
+        deadline = time.time() + timeout
+        while True:
+            try:
+                self._client = socket.create_connection(("localhost", self.port))
+            except SocketError as e:
+                if e.errno != errno.ECONNREFUSED or time.time() >= deadline:
+                    raise
+                time.sleep(0.01)
+            else:
+                break
+        self._client_io = PdbIOWrapper(self._client)
+
+    def observe(self):
+        """Join the active session on the PDB server as a read-only observer.
+
+        The observer receives a copy of everything the debugger outputs and what
+        the controlling client sends, but cannot send commands itself.
+        """
+        # Call the base connect explicitly so subclasses don't signal the server.
+        PdbClient.connect(self)
+        self._client_io.request_observe()
+
+    def resume(self, timeout=30.0):
+        """Reconnect to the session after the connection was lost.
+
+        Output the server sent while the client was gone is replayed, and can be
+        read with `recv`.
+
+        Parameters
+        ----------
+        timeout
+            Seconds to keep trying to reach the server.
+
+        Returns
+        -------
+        bool : True if the session was resumed.
+        """
+        if self._client_io.session_token is None or self._client_io.session_ended:
+            return False
+
+        deadline = time.time() + timeout
+        while True:
+            try:
+                sock = socket.create_connection(("localhost", self.port), timeout)
+            except SocketError:
+                if time.time() >= deadline:
+                    return False
+                time.sleep(0.5)
+            else:
+                return self._client_io.resume(sock, timeout)
+
+    def cancel(self, timeout=1.0):
+        """Ask the server to cancel the command it is running.
+
+        The request goes over a new connection, so it can be sent while waiting
+        for the command's output. The output, including the cancellation, is
+        read with `recv` as usual.
+
+        Parameters
+        ----------
+        timeout
+            Seconds to wait for the server to accept the connection.
+
+        Returns
+        -------
+        bool : True if the request was sent.
+        """
+        token = self._client_io.session_token
+        if token is None:
+            return False
+        try:
+            sock = socket.create_connection(("localhost", self.port), timeout)
+        except SocketError:
+            return False
+        cancel_io = PdbIOWrapper(sock)
+        try:
+            return cancel_io.request_cancel(token)
+        finally:
+            cancel_io.close()
+
+    def share_memory(self, capacity=1 << 22):
+        """Receive large output through memory shared with the server.
+
+        Only works when the client and the server run on the same host as the
+        same user, otherwise output keeps coming over the socket.
+
+        Parameters
+        ----------
+        capacity
+            Size in bytes of the ring buffer the output goes through.
+
+        Returns
+        -------
+        bool : True if the offer was sent.
+        """
+        return self._client_io.request_shared_memory(capacity)
+
+    def poll(self, timeout=0):
+        """Read output the server sent unprompted, such as idle warnings.
+
+        Parameters
+        ----------
+        timeout
+            Seconds to wait for output.
+
+        Returns
+        -------
+        (str, bool) : A tuple containing the str output from the connection and
+            a bool indicating if the connection is closed.
+        """
+        return self._client_io.poll(timeout)
+
+    def raise_eoferror(self):
+        """Send `EOFError` to server and return output from server.
+
+        Returns
+        -------
+        (str, bool) : A tuple containing the str output from the connection and
+            a bool indicating if the connection is closed.
+        """
+        success = self._client_io.raise_eoferror()
+        if not success:
+            return "", True
+        return self.recv()
+
+    def send_cmd(self, cmd):
+        """Send command to the PDB server.
+
+        This would be the typical inputs to pdb.
+
+        Parameters
+        ----------
+        cmd
+            The command to send to the PDB server.
+        """
+        if not cmd.endswith(os.linesep):
+            cmd += os.linesep
+
+        self._client_io.write(cmd)
+
+    send = send_cmd
+
+    def recv(self):
+        """Receive output from the PDB server.
+
+        Returns
+        -------
+        (str, bool) : A tuple containing the str output from the connection and
+            a bool indicating if the connection is closed.
+        """
+        return self._client_io.read_prompt()
+
+    def run_script(self, name, source):
+        """Run a script in the current frame of the PDB server.
+
+        The script and the command running it are sent together, so the script
+        runs with a single round trip however long it is.
+
+        Parameters
+        ----------
+        name
+            Name the script is run under, shown in tracebacks.
+        source
+            Source code of the script.
+
+        Returns
+        -------
+        (str, bool) : A tuple containing the str output from the connection and
+            a bool indicating if the connection is closed.
+        """
+        self._client_io.upload_script(name, source)
+        return self.send_and_recv("runscript {}".format(name))
+
+    def patch(self, target, name, source):
+        """Replace the code of a function in the PDB server's process.
+
+        Parameters
+        ----------
+        target
+            Dotted path of the function, e.g. `package.module.Class.method`.
+        name
+            Name of the file the new definition comes from, shown in tracebacks.
+        source
+            Source code defining the function.
+
+        Returns
+        -------
+        (str, bool) : A tuple containing the str output from the connection and
+            a bool indicating if the connection is closed.
+        """
+        self._client_io.upload_script(name, source)
+        return self.send_and_recv("patch {} {}".format(target, name))
+
+    def send_and_recv(self, cmd):
+        """Send command to the PDB server and receive the output.
+
+        Parameters
+        ----------
+        cmd
+            The command to send to the PDB server.
+
+        Returns
+        -------
+        str
+            Output from the PDB server.
+        bool
+            True if the connection has been closed.
+        """
+        self.send_cmd(cmd)
+        return self.recv()
+
+
+class PdbSignaler(PdbClient):
+    """PdbSignaler sends a signal to the process running the debugger.
+
+    Parameters
+    ----------
+    pid
+        PID of the running process to connect to. May be `None` if `connect`
+        is given a readiness file.
+    port
+        Port of the running process to connect to. May be `None` if `connect`
+        is given a readiness file.
+    signum
+        Signal the process listens for, SIGUSR2 by default. Signal 0 checks the
+        process exists without signalling it, for processes using the thread
+        backend.
+
+    Attributes
+    ----------
+    server_pid
+        PID of the running process to connect to.
+    signum
+        Signal sent to the running process.
+    """
+
+    def __init__(self, pid, port, signum=None):
+        self.server_pid = pid
+        self.signum = signal.SIGUSR2 if signum is None else signum
+
+        PdbClient.__init__(self, port)
+
+    def connect(self, timeout=5.0, ready=None):
+        """Send a signal before connecting.
+
+        The server may only start listening once it receives the signal, so
+        connecting is retried for up to `timeout` seconds.
+
+        If `ready` is the path of a readiness file, wait for the process to
+        write it first, and take the pid and port from it. The wait counts
+        towards `timeout`.
+        """
+        deadline = time.time() + timeout
+        if ready is not None:
+            self.server_pid, self.port = wait_ready(ready, timeout)
+        os.kill(self.server_pid, self.signum)
+        PdbClient.connect(self, max(deadline - time.time(), 0))
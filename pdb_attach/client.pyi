@@ -0,0 +1,32 @@
+from pdb_attach.transport import PdbIOWrapper
+from typing import Callable, Optional, Tuple, Union
+
+def wait_ready(path: str, timeout: float = ...) -> Tuple[int, int]: ...
+
+class PdbClient:
+    port: Union[int, str] = ...
+    def __init__(self, port: Union[int, str]) -> None: ...
+    def connect(self, timeout: float = ...) -> None: ...
+    def observe(self) -> None: ...
+    def resume(self, timeout: float = ...) -> bool: ...
+    def cancel(self, timeout: float = ...) -> bool: ...
+    def share_memory(self, capacity: int = ...) -> bool: ...
+    def poll(self, timeout: float = ...) -> Tuple[str, bool]: ...
+    def raise_eoferror(self) -> Tuple[str, bool]: ...
+    def send_cmd(self, cmd: str) -> None: ...
+    send: Callable[[str], None] = ...
+    def recv(self) -> Tuple[str, bool]: ...
+    def run_script(self, name: str, source: str) -> Tuple[str, bool]: ...
+    def patch(self, target: str, name: str, source: str) -> Tuple[str, bool]: ...
+    def send_and_recv(self, cmd: str) -> Tuple[str, bool]: ...
+
+class PdbSignaler(PdbClient):
+    server_pid: Optional[int] = ...
+    signum: int = ...
+    def __init__(
+        self,
+        pid: Optional[int],
+        port: Optional[Union[int, str]],
+        signum: Optional[int] = ...,
+    ) -> None: ...
+    def connect(self, timeout: float = ..., ready: Optional[str] = ...) -> None: ...
@@ -1,13 +1,27 @@
 # -*- mode: python -*-
 """Detachable debugger."""
+import bdb
+import dis
 import logging
 import pdb
+import weakref
 
 
 class PdbDetach(pdb.Pdb):
-    """PdbDetach extends Pdb to allow for detaching the debugger."""
+    """PdbDetach extends Pdb to allow for detaching the debugger.
+
+    Breakpoints are also cheaper than in bdb. They are indexed by code object,
+    so frames and lines without breakpoints are rejected with a lookup, and
+    conditions are compiled once instead of on every hit.
+    """
 
     def __init__(self, *args, **kwargs):
+        # id(code) -> (weak reference to code, canonical filename, lines with
+        # breakpoints). Code objects hash their contents, ids are cheaper. The
+        # entry is dropped when the code is freed, before its id is reused.
+        self._break_index = {}
+        # Condition -> code object.
+        self._conditions = {}
         pdb.Pdb.__init__(self, *args, **kwargs)
         self._precmd_handlers = []
 
@@ -17,6 +31,126 @@ class PdbDetach(pdb.Pdb):
         self.set_continue()
         return True
 
+    def _code_breaks(self, code):
+        """Return a reference to `code`, its filename and the lines breakpoints are set on.
+
+        The first line of the code is included when it has a breakpoint, it
+        stands for breakpoints set on the function.
+        """
+        key = id(code)
+        try:
+            return self._break_index[key]
+        except KeyError:
+            pass
+        filename = self.canonic(code.co_filename)
+        breaks = set(self.breaks.get(filename, ()))
+        lines = frozenset()
+        if breaks:
+            lines = frozenset(
+                line for _, line in dis.findlinestarts(code) if line in breaks
+            )
+            if code.co_firstlineno in breaks:
+                lines |= {code.co_firstlineno}
+        index = self._break_index
+
+        def forget(ref):
+            if index.get(key, (None,))[0] is ref:
+                del index[key]
+
+        entry = index[key] = weakref.ref(code, forget), filename, lines
+        return entry
+
+    def break_anywhere(self, frame):
+        """Return True if there is any breakpoint in the frame's code."""
+        return bool(self._code_breaks(frame.f_code)[2])
+
+    def break_here(self, frame):
+        """Return True if there is an effective breakpoint for this line.
+
+        Check for line or function breakpoint and if in effect.
+        Delete temporary breakpoints if effective() says to.
+        """
+        _, filename, lines = self._code_breaks(frame.f_code)
+        lineno = frame.f_lineno
+        if lineno not in lines:
+            # Maybe the line is in a function with a breakpoint set by name.
+            lineno = frame.f_code.co_firstlineno
+            if lineno not in lines:
+                return False
+
+        # flag says ok to delete temp. bp
+        bp, flag = self._effective(filename, lineno, frame)
+        if bp:
+            self.currentbp = bp.number
+            if flag and bp.temporary:
+                self.do_clear(str(bp.number))
+            return True
+        return False
+
+    def _effective(self, filename, lineno, frame):
+        """Return the breakpoint to act upon and whether it may be deleted.
+
+        The same as `bdb.effective`, with conditions compiled only once.
+        """
+        for bp in bdb.Breakpoint.bplist[filename, lineno]:
+            if not bp.enabled or not bdb.checkfuncname(bp, frame):
+                continue
+            # Count every hit when bp is enabled
+            bp.hits += 1
+            if bp.cond:
+                # Ignore count applies only to those bpt hits where the
+                # condition evaluates to true.
+                try:
+                    if not eval(
+                        self._compile_condition(bp.cond),
+                        frame.f_globals,
+                        frame.f_locals,
+                    ):
+                        continue
+                except Exception:
+                    # Stop on conditions that fail regardless of ignore count,
+                    # and don't delete temporary breakpoints.
+                    return bp, False
+            if bp.ignore > 0:
+                bp.ignore -= 1
+                continue
+            return bp, True
+        return None, None
+
+    def _compile_condition(self, cond):
+        try:
+            return self._conditions[cond]
+        except KeyError:
+            code = self._conditions[cond] = compile(
+                cond, "<breakpoint condition>", "eval"
+            )
+            return code
+
+    def set_break(self, filename, lineno, *args, **kwargs):
+        """Set a breakpoint, see `bdb.Bdb.set_break`."""
+        self._break_index.clear()
+        return pdb.Pdb.set_break(self, filename, lineno, *args, **kwargs)
+
+    def clear_break(self, filename, lineno):
+        """Delete breakpoints on a line, see `bdb.Bdb.clear_break`."""
+        self._break_index.clear()
+        return pdb.Pdb.clear_break(self, filename, lineno)
+
+    def clear_bpbynumber(self, arg):
+        """Delete a breakpoint by number, see `bdb.Bdb.clear_bpbynumber`."""
+        self._break_index.clear()
+        return pdb.Pdb.clear_bpbynumber(self, arg)
+
+    def clear_all_file_breaks(self, filename):
+        """Delete the breakpoints in a file, see `bdb.Bdb.clear_all_file_breaks`."""
+        self._break_index.clear()
+        return pdb.Pdb.clear_all_file_breaks(self, filename)
+
+    def clear_all_breaks(self):
+        """Delete all breakpoints, see `bdb.Bdb.clear_all_breaks`."""
+        self._break_index.clear()
+        return pdb.Pdb.clear_all_breaks(self)
+
     def precmd(self, line):
         """Execute precmd handlers before Cmd interprets the command.
 
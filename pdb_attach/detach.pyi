@@ -1,10 +1,33 @@
+import bdb
 import pdb
-from typing import Any, Callable, List
+import weakref
+from types import CodeType, FrameType
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple
 
 class PdbDetach(pdb.Pdb):
     _precmd_handlers: List[Callable[[str], str]] = ...
+    _break_index: Dict[
+        int, Tuple[weakref.ReferenceType[CodeType], str, FrozenSet[int]]
+    ] = ...
+    _conditions: Dict[str, CodeType] = ...
     def __init__(self, *args: Any, **kwargs: Any) -> None: ...
     def do_detach(self, arg: str) -> bool: ...
+    def _code_breaks(
+        self, code: CodeType
+    ) -> Tuple[weakref.ReferenceType[CodeType], str, FrozenSet[int]]: ...
+    def break_anywhere(self, frame: FrameType) -> bool: ...
+    def break_here(self, frame: FrameType) -> bool: ...
+    def _effective(
+        self, filename: str, lineno: int, frame: FrameType
+    ) -> Tuple[Optional[bdb.Breakpoint], Optional[bool]]: ...
+    def _compile_condition(self, cond: str) -> CodeType: ...
+    def set_break(
+        self, filename: str, lineno: int, *args: Any, **kwargs: Any
+    ) -> Optional[str]: ...
+    def clear_break(self, filename: str, lineno: int) -> Optional[str]: ...
+    def clear_bpbynumber(self, arg: Any) -> Optional[str]: ...
+    def clear_all_file_breaks(self, filename: str) -> Optional[str]: ...
+    def clear_all_breaks(self) -> Optional[str]: ...
     def precmd(self, line: str) -> str: ...
     def attach_precmd_handler(self, handler: Callable[[str], str]) -> None: ...
 
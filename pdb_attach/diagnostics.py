@@ -0,0 +1,195 @@
+# -*- mode: python -*-
+"""Memory diagnostics commands for the debugger."""
+import gc
+import pdb
+import sys
+import time
+
+try:
+    import tracemalloc
+except ImportError:
+    # Python 2 doesn't have tracemalloc.
+    tracemalloc = None
+
+
+def _format_size(size):
+    """Return `size` in bytes as a human readable string."""
+    if abs(size) < 1024:
+        return "{} B".format(size)
+    for unit in ("KiB", "MiB", "GiB"):
+        size /= 1024.0
+        if abs(size) < 1024 or unit == "GiB":
+            return "{:.1f} {}".format(size, unit)
+
+
+def _type_name(cls):
+    return "{}.{}".format(cls.__module__, getattr(cls, "__qualname__", cls.__name__))
+
+
+def _generations():
+    """Yield the objects tracked by the garbage collector, a generation at a time.
+
+    Each item is a description of the generation, for progress reports, and a
+    list of its objects. The oldest generation is listed first. Python before
+    3.8 can only list all objects at once.
+    """
+    try:
+        gc.get_objects(0)
+    except TypeError:
+        yield "", gc.get_objects()
+        return
+    for generation in reversed(range(len(gc.get_count()))):
+        yield " in generation {}".format(generation), gc.get_objects(generation)
+
+
+class PdbDiagnostics(pdb.Pdb):
+    """PdbDiagnostics extends Pdb with commands for finding memory leaks.
+
+    Results are written as they are produced, so a remote client sees progress
+    on long scans.
+    """
+
+    # Number of objects sized between progress reports by the heap command.
+    heap_chunk_size = 100000
+
+    # Number of rows shown when the command isn't given a limit.
+    diagnostics_limit = 20
+
+    _tracemalloc_snapshot = None
+
+    def _parse_limit(self, arg):
+        arg = arg.strip()
+        if not arg:
+            return self.diagnostics_limit
+        try:
+            return int(arg)
+        except ValueError:
+            self.stdout.write("*** Expected a number, got {!r}.\n".format(arg))
+            return None
+
+    def do_heap(self, arg):
+        """Summarize the objects tracked by the garbage collector by type.
+
+        Usage: heap [limit]
+
+        Types are listed largest total size first. Sizes are shallow, as
+        returned by sys.getsizeof.
+
+        Generations are listed one at a time, so listing the oldest one, which
+        holds most objects, still pauses the program for as long as that takes.
+        Other threads get to run between chunks of objects. Automatic
+        collections are held off during the scan, so no object moves between
+        generations and is counted twice or missed.
+        """
+        limit = self._parse_limit(arg)
+        if limit is None:
+            return
+
+        counts = {}
+        sizes = {}
+        unsized = 0
+        enabled = gc.isenabled()
+        gc.disable()
+        try:
+            for generation, objects in _generations():
+                unsized += self._size_objects(generation, objects, counts, sizes)
+                # Drop each generation before listing the next one, and don't
+                # keep every object alive while the user looks at the results.
+                del objects
+        finally:
+            if enabled:
+                gc.enable()
+
+        self.stdout.write("{:>10}  {:>10}  {}\n".format("count", "size", "type"))
+        largest = sorted(counts, key=lambda cls: sizes.get(cls, 0), reverse=True)
+        for cls in largest[:limit]:
+            self.stdout.write(
+                "{:>10}  {:>10}  {}\n".format(
+                    counts[cls], _format_size(sizes.get(cls, 0)), _type_name(cls)
+                )
+            )
+        self.stdout.write(
+            "{} objects, {} in total.\n".format(
+                sum(counts.values()), _format_size(sum(sizes.values()))
+            )
+        )
+        if unsized:
+            self.stdout.write("{} objects couldn't be sized.\n".format(unsized))
+
+    def _size_objects(self, generation, objects, counts, sizes):
+        """Count and size `objects` by type, in chunks, and return how many couldn't be sized."""
+        unsized = 0
+        total = len(objects)
+        for start in range(0, total, self.heap_chunk_size):
+            for obj in objects[start : start + self.heap_chunk_size]:
+                cls = type(obj)
+                counts[cls] = counts.get(cls, 0) + 1
+                try:
+                    sizes[cls] = sizes.get(cls, 0) + sys.getsizeof(obj)
+                except Exception:
+                    # E.g. a broken __sizeof__, the object is still counted.
+                    unsized += 1
+            done = min(start + self.heap_chunk_size, total)
+            if done < total:
+                self.stdout.write(
+                    "Scanned {} of {} objects{}...\n".format(done, total, generation)
+                )
+                # Let the program's other threads run.
+                time.sleep(0)
+        return unsized
+
+    def do_tracemalloc(self, arg):
+        """Trace memory allocations.
+
+        Usage: tracemalloc start [frames] | snapshot [limit] | diff [limit] | stop
+
+        start: Start tracing, storing up to `frames` frames per allocation.
+        snapshot: Remember the current allocations and show the top sites.
+        diff: Show the sites that grew the most since the last snapshot.
+        stop: Stop tracing and forget the snapshot.
+        """
+        if tracemalloc is None:
+            self.stdout.write("*** tracemalloc is not available.\n")
+            return
+
+        cmd, _, arg = arg.strip().partition(" ")
+        if cmd == "start":
+            frames = self._parse_limit(arg or "1")
+            if frames is not None:
+                tracemalloc.start(frames)
+                self.stdout.write("Tracing allocations.\n")
+        elif cmd == "stop":
+            tracemalloc.stop()
+            self._tracemalloc_snapshot = None
+            self.stdout.write("Stopped tracing allocations.\n")
+        elif cmd in ("snapshot", "diff"):
+            self._tracemalloc_report(cmd, arg)
+        else:
+            self.stdout.write("*** Unknown tracemalloc command {!r}.\n".format(cmd))
+
+    def _tracemalloc_report(self, cmd, arg):
+        limit = self._parse_limit(arg)
+        if limit is None:
+            return
+        if not tracemalloc.is_tracing():
+            self.stdout.write("*** Not tracing, run 'tracemalloc start' first.\n")
+            return
+        if cmd == "diff" and self._tracemalloc_snapshot is None:
+            self.stdout.write("*** No snapshot, run 'tracemalloc snapshot' first.\n")
+            return
+
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            (tracemalloc.Filter(False, tracemalloc.__file__),)
+        )
+        if cmd == "snapshot":
+            self._tracemalloc_snapshot = snapshot
+            stats = snapshot.statistics("lineno")
+        else:
+            stats = snapshot.compare_to(self._tracemalloc_snapshot, "lineno")
+
+        for stat in stats[:limit]:
+            self.stdout.write("{}\n".format(stat))
+        size, peak = tracemalloc.get_traced_memory()
+        self.stdout.write(
+            "{} traced, {} at peak.\n".format(_format_size(size), _format_size(peak))
+        )
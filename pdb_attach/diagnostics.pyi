@@ -0,0 +1,23 @@
+import pdb
+import tracemalloc
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+def _format_size(size: float) -> str: ...
+def _type_name(cls: type) -> str: ...
+def _generations() -> Iterator[Tuple[str, List[Any]]]: ...
+
+class PdbDiagnostics(pdb.Pdb):
+    heap_chunk_size: int = ...
+    diagnostics_limit: int = ...
+    _tracemalloc_snapshot: Optional[tracemalloc.Snapshot] = ...
+    def _parse_limit(self, arg: str) -> Optional[int]: ...
+    def do_heap(self, arg: str) -> None: ...
+    def _size_objects(
+        self,
+        generation: str,
+        objects: List[Any],
+        counts: Dict[type, int],
+        sizes: Dict[type, int],
+    ) -> int: ...
+    def do_tracemalloc(self, arg: str) -> None: ...
+    def _tracemalloc_report(self, cmd: str, arg: str) -> None: ...
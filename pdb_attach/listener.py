@@ -0,0 +1,239 @@
+# -*- mode: python -*-
+"""Lightweight signal handler that builds the debugger on the first signal.
+
+This module must stay cheap to import. It is imported by every process that
+calls `pdb_attach.listen`, so anything heavy, like `pdb` or `socket`, is only
+imported once a client actually asks for the debugger.
+"""
+import os
+import sys
+
+try:
+    # The signal module wraps _signal with enums, which costs more to import than
+    # everything else here.
+    import _signal as signal
+except ImportError:
+    import signal  # type: ignore
+
+
+def _warn_windows(func):
+    import warnings
+
+    warnings.warn(
+        "{} was called on a Windows platform, so it does nothing.".format(
+            func.__name__
+        ),
+        UserWarning,
+        stacklevel=2,
+    )
+
+
+# Handler classes and signals to re-arm in forked children.
+_fork_watched = set()
+_fork_hooks_registered = False
+
+
+# Children a process can fork before their ports run into those of its
+# grandchildren, see `child_port`.
+CHILDREN_PER_PROCESS = 100
+
+
+def _watch_forks(cls, signum):
+    """Re-arm handlers of type `cls` for `signum` in forked children.
+
+    Handlers must have a `children` count, a `stride` and a `rearm` method
+    taking the signal number and the child's index.
+    """
+    global _fork_hooks_registered
+
+    _fork_watched.add((cls, signum))
+    # os.register_at_fork was added in Python 3.7.
+    if not _fork_hooks_registered and hasattr(os, "register_at_fork"):
+        os.register_at_fork(
+            after_in_parent=_after_fork_in_parent, after_in_child=_after_fork_in_child
+        )
+        _fork_hooks_registered = True
+
+
+def _fork_handlers():
+    for cls, signum in list(_fork_watched):
+        handler = signal.getsignal(signum)
+        if isinstance(handler, cls):
+            yield signum, handler
+
+
+def _after_fork_in_parent():
+    for _, handler in _fork_handlers():
+        handler.children += 1
+
+
+def _after_fork_in_child():
+    for signum, handler in list(_fork_handlers()):
+        # The parent counts the child after the fork, so the count is one behind.
+        handler.rearm(signum, handler.children + 1)
+
+
+def child_port(port, index, stride=1):
+    """Return the port of the `index`-th child forked by a process on `port`.
+
+    The process `listen` was called in numbers its children by 1, its children
+    number theirs by `CHILDREN_PER_PROCESS`, their children by its square, and
+    so on. Each digit of the port's offset, in that base, is the index of a
+    fork on the way from the first process, so no two processes of the tree
+    share a port while none forks `CHILDREN_PER_PROCESS` children or more.
+
+    Ephemeral ports, given as 0, stay ephemeral.
+    """
+    return port + index * stride if port else port
+
+
+def notify_ready(ready, port):
+    """Tell whoever is waiting that the debugger listens on `port`.
+
+    Parameters
+    ----------
+    ready
+        A callable, called with the port. Or a file descriptor or a path, that
+        "<pid> <port>" and a newline are written to. File descriptors are closed
+        afterwards, so a reader sees EOF. Paths are replaced in one step, so a
+        reader never sees a partial file.
+    port
+        Port the debugger listens on.
+    """
+    if callable(ready):
+        ready(port)
+        return
+
+    data = "{} {}\n".format(os.getpid(), port).encode("ascii")
+    if isinstance(ready, int):
+        try:
+            os.write(ready, data)
+        finally:
+            os.close(ready)
+        return
+
+    tmp = "{}.{}.tmp".format(ready, os.getpid())
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.rename(tmp, ready)
+
+
+class PdbListener(object):
+    """PdbListener records the debugger configuration until a signal arrives.
+
+    On the first signal the debugger is built, which imports `pdb` and binds the
+    socket, and the signal is passed on to it. Later signals go straight to the
+    debugger.
+
+    Parameters
+    ----------
+    old_handler
+        Signal handler to restore when the listener is removed.
+    port
+        Port the debugger listens on.
+
+    Other arguments are passed on to `PdbSignal` when it's built.
+
+    `listen` and `unlisten` take an optional `signum` keyword to use a signal
+    other than SIGUSR2.
+
+    Children forked after `listen` get a listener of their own. The n-th child
+    listens on `port + n`, and the parent's socket is closed in the child. A
+    child's own children are numbered in hundreds, see `child_port`.
+
+    Attributes
+    ----------
+    port
+        Port the debugger listens on.
+    children
+        Number of children forked since the listener was set up.
+    stride
+        Port step between the children this process forks.
+    """
+
+    stride = 1
+
+    def __init__(self, old_handler, port, *args, **kwargs):
+        self._old_handler = old_handler
+        self.port = port
+        self.children = 0
+        self._args = args
+        self._kwargs = kwargs
+        self._debugger = None
+
+    @property
+    def debugger(self):
+        """Return the debugger, building it if needed."""
+        if self._debugger is None:
+            from pdb_attach.pdb_signal import PdbSignal
+
+            self._debugger = PdbSignal(
+                self._old_handler, self.port, *self._args, **self._kwargs
+            )
+        return self._debugger
+
+    def __call__(self, signum, frame):
+        """Start tracing the program.
+
+        If the debugger can't be built, e.g. because its port is taken, a
+        warning is issued instead of raising in the program. The next signal
+        tries again.
+        """
+        try:
+            debugger = self.debugger
+        except Exception as e:
+            import warnings
+
+            warnings.warn(
+                "Can't start the debugger on port {}: {}".format(self.port, e),
+                RuntimeWarning,
+                stacklevel=2,
+            )
+            return
+        debugger(signum, frame)
+
+    @classmethod
+    def listen(cls, port, *args, **kwargs):
+        """Set up the signal handler and return it."""
+        if sys.platform.startswith("win"):
+            _warn_windows(cls.listen)
+            return None
+        signum = kwargs.pop("signum", None) or signal.SIGUSR2
+        old_handler = signal.getsignal(signum)
+        listener = cls(old_handler, port, *args, **kwargs)
+        signal.signal(signum, listener)
+        _watch_forks(cls, signum)
+        return listener
+
+    @classmethod
+    def unlisten(cls, signum=None):
+        """Stop listening and replace the old handler."""
+        if sys.platform.startswith("win"):
+            _warn_windows(cls.unlisten)
+            return
+        signum = signum or signal.SIGUSR2
+        cur_handler = signal.getsignal(signum)
+        if isinstance(cur_handler, cls):
+            cur_handler.close()
+            signal.signal(signum, cur_handler._old_handler)
+
+    def rearm(self, signum, index):
+        """Replace the listener inherited by the `index`-th forked child."""
+        if self._debugger is not None:
+            # The session, if any, belongs to the parent. Only drop the copy of
+            # its socket.
+            self._debugger.close_listener()
+        listener = type(self)(
+            self._old_handler,
+            child_port(self.port, index, self.stride),
+            *self._args,
+            **self._kwargs
+        )
+        listener.stride = self.stride * CHILDREN_PER_PROCESS
+        signal.signal(signum, listener)
+
+    def close(self):
+        """Close the debugger if it was built."""
+        if self._debugger is not None:
+            self._debugger.close()
+            self._debugger.close_listener()
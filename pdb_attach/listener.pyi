@@ -0,0 +1,33 @@
+from pdb_attach.pdb_signal import PdbSignal
+from types import FrameType
+from typing import Any, Callable, Optional, Union
+
+CHILDREN_PER_PROCESS: int
+
+def _watch_forks(cls: type, signum: int) -> None: ...
+def child_port(port: int, index: int, stride: int = ...) -> int: ...
+def notify_ready(ready: Union[Callable[[int], Any], int, str], port: int) -> None: ...
+
+class PdbListener:
+    port: Union[int, str] = ...
+    children: int = ...
+    stride: int = ...
+    _debugger: Optional[PdbSignal] = ...
+    def __init__(
+        self,
+        old_handler: Callable[[int, FrameType], None],
+        port: Union[int, str],
+        *args: Any,
+        **kwargs: Any
+    ) -> None: ...
+    @property
+    def debugger(self) -> PdbSignal: ...
+    def __call__(self, signum: int, frame: FrameType) -> None: ...
+    @classmethod
+    def listen(
+        cls, port: Union[int, str], *args: Any, **kwargs: Any
+    ) -> Optional[PdbListener]: ...
+    @classmethod
+    def unlisten(cls, signum: Optional[int] = ...) -> None: ...
+    def rearm(self, signum: int, index: int) -> None: ...
+    def close(self) -> None: ...
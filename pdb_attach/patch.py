@@ -0,0 +1,309 @@
+# -*- mode: python -*-
+"""Hot-patching functions of the running program from the debugger."""
+import ast
+import collections
+import inspect
+import pdb
+import sys
+import traceback
+import types
+
+# A patched function and the code it had before it was first patched.
+Patch = collections.namedtuple("Patch", ["function", "original", "path"])
+
+# Code flags that change how a function is called or what calling it returns.
+_KINDS = [
+    ("generator", getattr(inspect, "CO_GENERATOR", 0)),
+    ("coroutine", getattr(inspect, "CO_COROUTINE", 0)),
+    ("coroutine", getattr(inspect, "CO_ITERABLE_COROUTINE", 0)),
+    ("async generator", getattr(inspect, "CO_ASYNC_GENERATOR", 0)),
+]
+
+_FUNCTION_DEFS = tuple(
+    getattr(ast, name)
+    for name in ("FunctionDef", "AsyncFunctionDef")
+    if hasattr(ast, name)
+)
+
+# Name of the function the new definition is compiled in to recreate the
+# running function's closure.
+_ENCLOSING = "__pdb_attach_patch__"
+
+
+def find_function(target):
+    """Return the function named by `target`, a dotted path in an imported module.
+
+    Methods are looked up on their class, and decorators that set
+    `__wrapped__`, like `functools.wraps`, are looked through.
+
+    Raises
+    ------
+    LookupError
+        If no module of the path is imported or an attribute is missing.
+    TypeError
+        If the path doesn't lead to a Python function.
+    """
+    parts = target.split(".")
+    for i in range(len(parts) - 1, 0, -1):
+        obj = sys.modules.get(".".join(parts[:i]))
+        if obj is not None:
+            break
+    else:
+        raise LookupError("no module of {} is imported".format(target))
+
+    for j in range(i, len(parts)):
+        name = parts[j]
+        if isinstance(obj, type) and name in obj.__dict__:
+            # Without binding, to get at static and class methods.
+            obj = obj.__dict__[name]
+        elif hasattr(obj, name):
+            obj = getattr(obj, name)
+        else:
+            raise LookupError(
+                "{} has no attribute {!r}".format(".".join(parts[:j]), name)
+            )
+    obj = getattr(obj, "__func__", obj)
+    while hasattr(obj, "__wrapped__"):
+        obj = obj.__wrapped__
+    if not isinstance(obj, types.FunctionType):
+        raise TypeError("{} is not a Python function".format(target))
+    return obj
+
+
+def _find_def(tree, name, class_name):
+    """Return the definition of `name` in `tree`, in class `class_name` first."""
+    scopes = []
+    if class_name is not None:
+        scopes += [
+            node.body
+            for node in ast.walk(tree)
+            if isinstance(node, ast.ClassDef) and node.name == class_name
+        ]
+    scopes.append(tree.body)
+    for body in scopes:
+        for node in body:
+            if isinstance(node, _FUNCTION_DEFS) and node.name == name:
+                return node
+    return None
+
+
+def _find_code(code, name):
+    """Return the code object of function `name` compiled in `code`."""
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            # Class bodies aren't optimized, a method can share its class' name.
+            if const.co_name == name and const.co_flags & inspect.CO_OPTIMIZED:
+                return const
+            found = _find_code(const, name)
+            if found is not None:
+                return found
+    return None
+
+
+def compile_function(func, source, filename):
+    """Compile the definition of `func` in `source` to replace its code with.
+
+    The definition is compiled in the same class, for `super()`, and with the
+    same free variables as `func`, so a fixed closure can be patched too.
+
+    Returns
+    -------
+    (types.CodeType, ast.FunctionDef) : The new code and its definition.
+
+    Raises
+    ------
+    SyntaxError
+        If `source` doesn't compile.
+    LookupError
+        If `source` doesn't define the function.
+    """
+    name = func.__name__
+    path = getattr(func, "__qualname__", name).split(".")
+    class_name = path[-2] if len(path) > 1 and path[-2] != "<locals>" else None
+
+    tree = ast.parse(source, filename)
+    node = _find_def(tree, name, class_name)
+    if node is None:
+        raise LookupError("{} has no definition of {}".format(filename, name))
+
+    # Wrap the definition in an enclosing function and class like the running
+    # one's. The wrappers are parsed, the definition keeps its line numbers.
+    lines = []
+    indent = ""
+    freevars = [var for var in func.__code__.co_freevars if var != "__class__"]
+    if freevars:
+        lines += [
+            "def {}():".format(_ENCLOSING),
+            "    {} = None".format(" = ".join(freevars)),
+        ]
+        indent = "    "
+    if class_name is not None:
+        lines.append("{}class {}:".format(indent, class_name))
+        indent += "    "
+    lines.append(indent + "pass")
+    module = ast.parse("\n".join(lines))
+    scope = module
+    while isinstance(scope.body[-1], (ast.FunctionDef, ast.ClassDef)):
+        scope = scope.body[-1]
+    scope.body[-1] = node
+    return _find_code(compile(module, filename, "exec"), name), node
+
+
+def _format_args(code):
+    """Return the arguments of `code` like a def would list them."""
+    names = list(code.co_varnames)
+    count = code.co_argcount
+    posonly = getattr(code, "co_posonlyargcount", 0)
+    kwonly = getattr(code, "co_kwonlyargcount", 0)
+    args = names[:count]
+    if posonly:
+        args.insert(posonly, "/")
+    varargs = count + kwonly
+    if code.co_flags & inspect.CO_VARARGS:
+        args.append("*" + names[varargs])
+        varargs += 1
+    elif kwonly:
+        args.append("*")
+    args += names[count : count + kwonly]
+    if code.co_flags & inspect.CO_VARKEYWORDS:
+        args.append("**" + names[varargs])
+    return "({})".format(", ".join(args))
+
+
+def _kind(code):
+    for kind, flag in _KINDS:
+        if code.co_flags & flag:
+            return kind
+    return "plain"
+
+
+def check_compatible(func, code, node):
+    """Return why `code` can't replace the code of `func`, or None if it can.
+
+    `node` is the definition `code` was compiled from. Its default values are
+    not used, the running function keeps its own, so only their number has
+    to match.
+    """
+    old = func.__code__
+    if _format_args(old) != _format_args(code):
+        return "the arguments changed from {} to {}".format(
+            _format_args(old), _format_args(code)
+        )
+    if _kind(old) != _kind(code):
+        return "it is a {} function, not a {} one".format(_kind(old), _kind(code))
+    if old.co_freevars != code.co_freevars:
+        return "the closure changed from ({}) to ({})".format(
+            ", ".join(old.co_freevars), ", ".join(code.co_freevars)
+        )
+    defaults = len(node.args.defaults) + sum(
+        1 for value in getattr(node.args, "kw_defaults", []) if value is not None
+    )
+    if defaults != len(func.__defaults__ or ()) + len(
+        getattr(func, "__kwdefaults__", None) or {}
+    ):
+        return "the arguments with default values changed"
+    return None
+
+
+class PdbPatch(pdb.Pdb):
+    """PdbPatch extends Pdb with replacing the code of running functions.
+
+    Only the function's code object is swapped, so every reference to the
+    function, bound methods and callbacks included, runs the new code from its
+    next call on. Calls already running finish with the old code.
+    """
+
+    _patches = None
+
+    def do_patch(self, arg):
+        """Replace the code of a function with its definition in a file.
+
+        Usage: patch [module.function file]
+
+        The function is a dotted path in an imported module, e.g.
+        `app.views.Cart.total` for a method. Only the function's code is
+        replaced, its default values and decorators are kept. The arguments,
+        the kind of function (generator, coroutine) and the variables it uses
+        from enclosing functions must stay the same.
+
+        Without an argument, list the patched functions.
+        """
+        args = arg.split()
+        if not args:
+            self._list_patches()
+            return
+        if len(args) != 2:
+            self.stdout.write("*** Usage: patch [module.function file]\n")
+            return
+        target, path = args
+        source = self._patch_source(path)
+        if source is None:
+            return
+        func, code = self._compile_patch(target, source, path)
+        if code is None:
+            return
+
+        if self._patches is None:
+            self._patches = {}
+        original = func.__code__
+        for patch in self._patches.values():
+            if patch.function is func:
+                original = patch.original
+        self._patches[target] = Patch(func, original, path)
+        func.__code__ = code
+        self.stdout.write("Patched {} with {}\n".format(target, path))
+
+    def _compile_patch(self, target, source, path):
+        """Return the function `target` and the code to patch it with.
+
+        The code is None if the function can't be patched, and why was printed.
+        """
+        try:
+            func = find_function(target)
+            code, node = compile_function(func, source, path)
+        except SyntaxError:
+            exc_type, exc_value = sys.exc_info()[:2]
+            self.stdout.write(
+                "".join(traceback.format_exception_only(exc_type, exc_value))
+            )
+            return None, None
+        except (LookupError, TypeError) as e:
+            self.stdout.write("*** Can't patch {}: {}.\n".format(target, e))
+            return None, None
+        reason = check_compatible(func, code, node)
+        if reason is not None:
+            self.stdout.write("*** Can't patch {}: {}.\n".format(target, reason))
+            return func, None
+        return func, code
+
+    def do_unpatch(self, arg):
+        """Restore the code of patched functions.
+
+        Usage: unpatch [module.function ...]
+
+        Without arguments, restore all patched functions.
+        """
+        patches = self._patches or {}
+        for target in arg.split() or sorted(patches):
+            patch = patches.pop(target, None)
+            if patch is None:
+                self.stdout.write("*** {} is not patched.\n".format(target))
+                continue
+            patch.function.__code__ = patch.original
+            self.stdout.write("Restored {}\n".format(target))
+
+    def _list_patches(self):
+        patches = self._patches or {}
+        if not patches:
+            self.stdout.write("No patched functions.\n")
+        for target in sorted(patches):
+            self.stdout.write("{} with {}\n".format(target, patches[target].path))
+
+    def _patch_source(self, path):
+        """Return the source of the file at `path`, or None if it can't be read."""
+        try:
+            with open(path) as f:
+                return f.read()
+        except IOError as e:
+            self.stdout.write("*** {}\n".format(e))
+            return None
@@ -0,0 +1,39 @@
+import ast
+import pdb
+from types import CodeType, FunctionType
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+
+class Patch(NamedTuple):
+    function: FunctionType
+    original: CodeType
+    path: str
+
+_KINDS: List[Tuple[str, int]]
+_FUNCTION_DEFS: Tuple[type, ...]
+_ENCLOSING: str
+
+_FunctionDef = Union[ast.FunctionDef, ast.AsyncFunctionDef]
+
+def find_function(target: str) -> FunctionType: ...
+def _find_def(
+    tree: ast.Module, name: str, class_name: Optional[str]
+) -> Optional[_FunctionDef]: ...
+def _find_code(code: CodeType, name: str) -> Optional[CodeType]: ...
+def compile_function(
+    func: FunctionType, source: str, filename: str
+) -> Tuple[CodeType, _FunctionDef]: ...
+def _format_args(code: CodeType) -> str: ...
+def _kind(code: CodeType) -> str: ...
+def check_compatible(
+    func: FunctionType, code: CodeType, node: _FunctionDef
+) -> Optional[str]: ...
+
+class PdbPatch(pdb.Pdb):
+    _patches: Optional[Dict[str, Patch]] = ...
+    def do_patch(self, arg: str) -> None: ...
+    def do_unpatch(self, arg: str) -> None: ...
+    def _compile_patch(
+        self, target: str, source: str, path: str
+    ) -> Tuple[Optional[FunctionType], Optional[CodeType]]: ...
+    def _list_patches(self) -> None: ...
+    def _patch_source(self, path: str) -> Optional[str]: ...
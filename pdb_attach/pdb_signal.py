@@ -1,20 +1,37 @@
 # -*- mode: python -*-
 """Signal handler for starting the debugger."""
-import os
 import platform
 import signal
 import warnings
 
+# PdbSignaler used to live here, keep importing it from here working.
+from pdb_attach.client import PdbSignaler  # noqa: F401
 from pdb_attach.detach import PdbDetach
-from pdb_attach.pdb_socket import PdbClient, PdbServer
+from pdb_attach.listener import CHILDREN_PER_PROCESS, _watch_forks, child_port
+from pdb_attach.pdb_socket import PdbServer
 
 
 class PdbSignal(PdbServer, PdbDetach):
-    """PdbSignal is a backend that uses signal handlers to start the server."""
+    """PdbSignal is a backend that uses signal handlers to start the server.
+
+    `listen` and `unlisten` take an optional `signum` keyword to use a signal
+    other than SIGUSR2.
+
+    Children forked after `listen` get a debugger of their own. The n-th child
+    listens on `port + n`, and the parent's socket is closed in the child. A
+    child's own children are numbered in hundreds, see `child_port`.
+    """
+
+    # Port step between the children this process forks.
+    stride = 1
 
     def __init__(self, old_handler, port, *args, **kwargs):
         self._old_handler = old_handler
-        PdbDetach.__init__(self, *args, **kwargs)
+        self.port = port
+        self.children = 0
+        self._args = args
+        self._kwargs = dict(kwargs)
+        # PdbServer initializes PdbDetach too.
         PdbServer.__init__(self, port, *args, **kwargs)
 
     def __call__(self, signum, frame):
@@ -33,12 +50,14 @@ class PdbSignal(PdbServer, PdbDetach):
                 stacklevel=1,
             )
             return
-        old_handler = signal.getsignal(signal.SIGUSR2)
+        signum = kwargs.pop("signum", None) or signal.SIGUSR2
+        old_handler = signal.getsignal(signum)
         debugger = cls(old_handler, port, *args, **kwargs)
-        signal.signal(signal.SIGUSR2, debugger)
+        signal.signal(signum, debugger)
+        _watch_forks(cls, signum)
 
     @classmethod
-    def unlisten(cls):
+    def unlisten(cls, signum=None):
         """Stop listening and replace the old handler."""
         if platform.system() == "Windows":
             warnings.warn(
@@ -49,40 +68,29 @@ class PdbSignal(PdbServer, PdbDetach):
                 stacklevel=1,
             )
             return
-        cur_handler = signal.getsignal(signal.SIGUSR2)
+        signum = signum or signal.SIGUSR2
+        cur_handler = signal.getsignal(signum)
         if isinstance(cur_handler, cls):
             cur_handler.close()
-            signal.signal(signal.SIGUSR2, cur_handler._old_handler)
+            cur_handler.close_listener()
+            signal.signal(signum, cur_handler._old_handler)
+
+    def rearm(self, signum, index):
+        """Replace the debugger inherited by the `index`-th forked child."""
+        # The session, if any, belongs to the parent. Only drop the copy of its
+        # socket.
+        self.close_listener()
+        debugger = type(self)(
+            self._old_handler,
+            child_port(self.port, index, self.stride),
+            *self._args,
+            **self._kwargs
+        )
+        debugger.stride = self.stride * CHILDREN_PER_PROCESS
+        signal.signal(signum, debugger)
 
     def do_detach(self, arg):
         """Detach and disconnect socket."""
         rv = PdbDetach.do_detach(self, arg)
         PdbServer.close(self)
         return rv
-
-
-class PdbSignaler(PdbClient):
-    """PdbSignaler sends a signal to the process running the debugger.
-
-    Parameters
-    ----------
-    pid
-        PID of the running process to connect to.
-    port
-        Port of the running process to connect to.
-
-    Attributes
-    ----------
-    server_pid
-        PID of the running process to connect to.
-    """
-
-    def __init__(self, pid, port):
-        self.server_pid = pid
-
-        PdbClient.__init__(self, port)
-
-    def connect(self):
-        """Send a signal before connecting."""
-        os.kill(self.server_pid, signal.SIGUSR2)
-        PdbClient.connect(self)
@@ -1,9 +1,13 @@
 from pdb_attach.detach import PdbDetach
-from pdb_attach.pdb_socket import PdbClient, PdbServer
+from pdb_attach.client import PdbSignaler as PdbSignaler
+from pdb_attach.pdb_socket import PdbServer
 from types import FrameType
-from typing import Any, Callable, Union
+from typing import Any, Callable, Optional, Union
 
 class PdbSignal(PdbServer, PdbDetach):
+    port: Union[int, str] = ...
+    children: int = ...
+    stride: int = ...
     def __init__(
         self,
         old_handler: Callable[[int, FrameType], None],
@@ -15,8 +19,6 @@ class PdbSignal(PdbServer, PdbDetach):
     @classmethod
     def listen(cls, port: Union[int, str], *args: Any, **kwargs: Any) -> None: ...
     @classmethod
-    def unlisten(cls) -> None: ...
-
-class PdbSignaler(PdbClient):
-    def __init__(self, pid: int, port: Union[int, str]) -> None: ...
-    def connect(self) -> None: ...
+    def unlisten(cls, signum: Optional[int] = ...) -> None: ...
+    def rearm(self, signum: int, index: int) -> None: ...
+    def do_detach(self, arg: str) -> bool: ...
@@ -1,224 +1,80 @@
 # -*- mode: python -*-
 """Debugger that uses sockets for I/O."""
+import binascii
 import code
 import contextlib
-import io
+import hmac
 import os
 import pdb
 import socket
 import sys
+import threading
+import traceback
+
+# The client and framing used to live here, keep importing them from here working.
+from pdb_attach.catch import PdbCatch
+from pdb_attach.client import PdbClient  # noqa: F401
+from pdb_attach.detach import PdbDetach
+from pdb_attach.diagnostics import PdbDiagnostics
+from pdb_attach.patch import PdbPatch
+from pdb_attach.stack import PdbStack
+from pdb_attach.tasks import PdbTasks
+from pdb_attach.transcript import TranscriptWriter
+from pdb_attach.transport import (  # noqa: F401
+    PdbIOWrapper,
+    SessionTimeout,
+    SocketError,
+    _PdbBuffer,
+    _PdbObserver,
+    _PdbStr,
+    _wait_readable,
+)
+from pdb_attach.watch import PdbWatch
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue  # type: ignore
+
+
+class CommandCancelled(KeyboardInterrupt):
+    """Raised in the debugged thread to cancel the command it is running.
+
+    It derives from `KeyboardInterrupt` so `except Exception` in the code being
+    evaluated doesn't swallow it.
+    """
+
+
+def _raise_in_thread(ident, exc):
+    """Raise `exc` asynchronously in thread `ident`, or clear it if `exc` is None.
 
+    Returns
+    -------
+    bool : True if the exception could be set.
+    """
+    try:
+        import ctypes
 
-if sys.version_info[0] >= 3 and sys.version_info[1] >= 3:
-    SocketError = OSError
-else:
-    SocketError = socket.error
+        set_async_exc = ctypes.pythonapi.PyThreadState_SetAsyncExc
+    except (ImportError, AttributeError):
+        # Not CPython.
+        return False
+    return (
+        set_async_exc(
+            ctypes.c_ulong(ident), None if exc is None else ctypes.py_object(exc)
+        )
+        == 1
+    )
 
 
 @contextlib.contextmanager
 def _replace_stdout(stdout):
     old_stdout = sys.stdout
     sys.stdout = stdout
-    yield sys.stdout
-    sys.stdout = old_stdout
-
-
-class _PdbStr(str):
-    """Special string that indicates if it is a prompt."""
-
-    def __new__(cls, value, prompt=False):
-        self = str.__new__(cls, value)
-        self._is_prompt = prompt
-        return self
-
-    @property
-    def is_prompt(self):
-        return self._is_prompt
-
-
-class PdbIOWrapper(io.TextIOBase):
-    """Wrapper for socket IO.
-
-    Allows for smoother IPC. Data sent over socket is formatted `<msg_size>|<code>|<msg_text>`.
-    """
-
-    def __init__(self, sock):
-        self._buffer = self._new_buffer()
-        self._sock = sock
-
-    _CLOSED = -1
-    _TEXT = 0
-    _PROMPT = 1
-    _EOFERROR = 2
-
-    @property
-    def encoding(self):
-        """Return the name of the stream encoding."""
-        return sys.getdefaultencoding()
-
-    @property
-    def errors(self):
-        """Return the error setting."""
-        return "strict"
-
-    def _format_msg(self, msg, code):
-        return "{}|{}|{}".format(len(msg), code, msg).encode(self.encoding, self.errors)
-
-    def _new_buffer(self):
-        return ""
-
-    def _read(self):
-        """Read from the socket.
-
-        Returns
-        -------
-        (_PdbStr, code)
-        """
-        msg_data = ""
-        while msg_data.count("|") < 2:
-            c = self._sock.recv(1)
-            if len(c) == 0:
-                return _PdbStr(""), self._CLOSED
-
-            msg_data += c.decode(self.encoding, self.errors)
-
-        msg_data_items = msg_data.split("|")
-        msg_size = int(msg_data_items[0])
-        code = int(msg_data_items[1])
-        if code == self._EOFERROR:
-            raise EOFError
-
-        msg = self._sock.recv(msg_size).decode(self.encoding, self.errors)
-        return_code = code if len(msg) == msg_size else self._CLOSED
-        return (_PdbStr(msg, prompt=(code == self._PROMPT)), return_code)
-
-    def _read_eof(self):
-        while True:
-            msg, code = self._read()
-            self._buffer += msg
-            if code == self._CLOSED:
-                break
-
-    def read(self, size=-1):
-        """Read `size` characters or until EOF is reached.
-
-        Parameters
-        ----------
-        size : int
-            The number of characters to return. If negative, reads until EOF.
-
-        Returns
-        -------
-        str
-        """
-        if size is None or size < 0:
-            self._read_eof()
-            rv, self._buffer = self._buffer, self._new_buffer()
-            return rv
-
-        while len(self._buffer) < size:
-            msg, code = self._read()
-            self._buffer += msg
-            if code == self._CLOSED:
-                size = min(len(self._buffer), size)
-
-        rv, self._buffer = self._buffer[:size], self._buffer[size:]
-        return rv
-
-    def readline(self, size=-1):
-        """Read a string until a newline or EOF is reached.
-
-        Parameters
-        ----------
-        size : int
-            The number of characters to read. If `size` characters are read before
-            a newline is seen, then `size` characters are returned.
-
-        Returns
-        -------
-        str
-        """
-        while os.linesep not in self._buffer:
-            if size >= 0 and len(self._buffer) >= size:
-                break
-
-            msg, code = self._read()
-            self._buffer += msg
-
-            if code == self._CLOSED:
-                break
-
-        if size >= 0 and os.linesep in self._buffer:
-            idx = min(size, self._buffer.index(os.linesep) + len(os.linesep))
-        elif size >= 0:
-            idx = size
-        elif os.linesep in self._buffer:
-            idx = self._buffer.index(os.linesep) + len(os.linesep)
-        else:
-            idx = len(self._buffer)
-
-        rv, self._buffer = self._buffer[:idx], self._buffer[idx:]
-        return rv
-
-    def read_prompt(self):
-        """Read everything until a prompt is received and return it.
-
-        Returns
-        -------
-        (str, bool) : A tuple containing the str output from the connection and
-            a bool indicating if the connection is closed.
-        """
-        while True:
-            msg, code = self._read()
-            self._buffer += msg
-            if code == self._CLOSED or msg.is_prompt:
-                break
-
-        rv, self._buffer = self._buffer, self._new_buffer()
-        return rv, code == self._CLOSED
-
-    def raise_eoferror(self):
-        """Send `EOFError` code through socket.
-
-        Returns
-        -------
-        bool : True if send was successful.
-        """
-        try:
-            self._sock.sendall(self._format_msg("", self._EOFERROR))
-        except SocketError:
-            return False
-        else:
-            return True
-
-    def write(self, msg):
-        """Write `msg` to the socket and return the number of bytes sent.
-
-        Parameters
-        ----------
-        msg : str
-            A string to send through the socket.
-
-        Returns
-        -------
-        int : The number of bytes written to the socket.
-        """
-        if not isinstance(msg, _PdbStr):
-            msg = _PdbStr(msg)
-        code = self._PROMPT if msg.is_prompt else self._TEXT
-        data = self._format_msg(msg, code=code)
-        try:
-            self._sock.sendall(data)
-        except SocketError:
-            return 0
-
-        # Offset num bytes written by the additional characters in the formatted
-        # message.
-        return len(msg)
-
-    def close(self):
-        """Close connection to client."""
-        self._sock.close()
+    try:
+        yield sys.stdout
+    finally:
+        sys.stdout = old_stdout
 
 
 class PdbInteractiveConsole(code.InteractiveConsole):
@@ -252,129 +108,439 @@ class PdbInteractiveConsole(code.InteractiveConsole):
         self._io.write(data)
 
 
-class PdbServer(pdb.Pdb):
-    """PdbServer extends Pdb for communication via sockets."""
+class PdbServer(PdbCatch, PdbDiagnostics, PdbPatch, PdbStack, PdbTasks, PdbWatch):
+    """PdbServer extends Pdb for communication via sockets.
+
+    The memory diagnostics commands from `PdbDiagnostics`, the asyncio commands
+    from `PdbTasks`, the watchpoints from `PdbWatch` and the catchpoints from
+    `PdbCatch` are available too. `where` collapses deep stacks, see `PdbStack`,
+    and `patch` replaces the code of functions with files uploaded by the
+    client, see `PdbPatch`.
+
+    Parameters
+    ----------
+    port
+        Port to listen on.
+    idle_timeout
+        Keyword only. Seconds without input from the client before the debugger
+        detaches. `None`, the default, waits forever.
+    transcript
+        Keyword only. Path of a file to append a transcript of each session to,
+        see `pdb_attach.transcript`. `None`, the default, doesn't record.
+    command_timeout
+        Keyword only. Seconds a command may run before it is cancelled. `None`,
+        the default, lets commands run until the client cancels them.
+
+    Other arguments are passed on to the next debugger class.
+    """
 
     # Set use_rawinput to False to defer io to file object arguments passed to
     # stdin and stdout.
     use_rawinput = False
 
+    # Pending connections, enough for a driver and a few observers joining at once.
+    backlog = 8
+
+    # Number of unsent bytes an observer may lag behind before it is dropped.
+    observer_buffer_size = 1 << 20
+
+    # Seconds a peer has to identify itself after connecting.
+    observer_timeout = 1.0
+
+    # Seconds to wait for the first frame of a client connecting between
+    # sessions. The driver waits for the prompt, peers identify themselves.
+    identify_timeout = 0.05
+
+    # Seconds the session is kept alive for the client to resume after the
+    # connection is lost. Resumption is disabled if this is not positive.
+    resume_grace = 30.0
+
+    # Number of output frames kept for replay to a resuming client.
+    replay_frames = 1000
+
+    # Seconds between heartbeats sent to the client while waiting for input.
+    heartbeat_interval = 15.0
+
+    # Seconds before the idle timeout expires to warn the client.
+    idle_warning = 60.0
+
+    # Commands that wait for input from the client and can't be cancelled.
+    uncancellable_commands = ("interact", "commands", "debug")
+
     def __init__(self, port, *args, **kwargs):
+        self.idle_timeout = kwargs.pop("idle_timeout", None)
+        self.transcript = kwargs.pop("transcript", None)
+        self.command_timeout = kwargs.pop("command_timeout", None)
+        self._cancel_lock = threading.Lock()
+        self._command_thread = None
+        self._cancel_reason = None
+        # Whether the command thread is sending a frame, and whether a
+        # cancellation waits for it to finish.
+        self._sending = False
+        self._cancel_held = False
+        self._transcript_writer = None
         self._sock = socket.socket()
         self._sock.bind(("localhost", port))
-        self._sock.listen(0)
+        self._sock.listen(self.backlog)
+        self._peer_thread = None
+        self._session_done = threading.Event()
+        self._resumed = queue.Queue()
 
         if "stdin" in kwargs:
             del kwargs["stdin"]
         if "stdout" in kwargs:
             del kwargs["stdout"]
 
-        pdb.Pdb.__init__(self, *args, **kwargs)
+        # pdb.Pdb is an old-style class on Python 2, so the bases are called
+        # explicitly rather than through super().
+        if isinstance(self, PdbDetach):
+            PdbDetach.__init__(self, *args, **kwargs)
+        else:
+            pdb.Pdb.__init__(self, *args, **kwargs)
         self.prompt = _PdbStr(self.prompt, prompt=True)
 
+    @property
+    def bound_port(self):
+        """Return the port the debugger listens on."""
+        return self._sock.getsockname()[1]
+
     def set_trace(self, frame=None):
         """Accept the connection to the client and start tracing the program."""
-        serv, _ = self._sock.accept()
-        sock_io = PdbIOWrapper(serv)
-        self.stdin = self.stdout = sock_io
+        self._start_session(self._accept_driver())
         pdb.Pdb.set_trace(self, frame)
 
-    def do_interact(self, arg):
-        """Start an interactive interpreter."""
-        # Mostly copied from the pdb source code.
-        ns = self.curframe.f_globals.copy()
-        ns.update(self.curframe_locals)
-        console = PdbInteractiveConsole(self.stdin, ns)
-        # The interactive interpreter uses `exec` under the hood. `exec` outputs to
-        # sys.stdout so sys.stdout needs to be replaced with the IO object pdb is using.
-        with _replace_stdout(self.stdout) as _:
-            console.interact("*interactive*")
-
-    def close(self):
-        """Close the connection to the client."""
-        self.stdin.close()
+    def _accept_driver(self):
+        """Accept connections until one comes from a client driving a session."""
+        while True:
+            conn, _ = self._sock.accept()
+            if self._is_driver(conn):
+                return conn
 
+    def _stop_in(self, frame):
+        """Start tracing and stop at the next line run in `frame`.
 
-class PdbClient(object):
-    """Front end that communicates with the PDB server.
+        Unlike `set_trace`, the debugger doesn't stop in whatever `frame` calls
+        next, which may be a callback run by the garbage collector.
+        """
+        pdb.Pdb.set_trace(self, frame)
+        # Tracing is off meanwhile, or the debugger would step into set_next.
+        sys.settrace(None)
+        self.set_next(frame)
+        sys.settrace(self.trace_dispatch)
 
-    Parameters
-    ----------
-    port
-        Port of the running process to connect to.
+    def _is_driver(self, conn):
+        """Check the client connecting between sessions is there to drive one.
 
-    Attributes
-    ----------
-    port
-        Port of the running process to connect to.
-    """
+        Observers, resuming and cancelling clients have no session to join, so
+        they are turned away.
 
-    def __init__(self, port):
-        self.port = port
+        Returns
+        -------
+        bool : True if `conn` is the driver, otherwise it was closed.
+        """
+        try:
+            if not _wait_readable(conn, self.identify_timeout):
+                return True
+            header = conn.recv(32, socket.MSG_PEEK)
+        except (SocketError, ValueError):
+            header = b""
+        if not header:
+            conn.close()
+            return False
 
-        # Client connection.
-        self._client = None
-        self._client_io = None
+        fields = header.split(b"|")
+        peer_codes = (PdbIOWrapper._OBSERVE, PdbIOWrapper._RESUME, PdbIOWrapper._CANCEL)
+        if (
+            len(fields) < 3
+            or not fields[1].isdigit()
+            or int(fields[1]) not in peer_codes
+        ):
+            # Input typed ahead of the prompt, leave it for the session.
+            return True
+        conn.close()
+        return False
 
-    def connect(self):
-        """Connect to the PDB server."""
-        self._client = socket.create_connection(("localhost", self.port))
-        self._client_io = PdbIOWrapper(self._client)
+    def _start_session(self, sock):
+        sock_io = PdbIOWrapper(sock)
+        sock_io.guard_writes(self._hold_cancel)
+        self.stdin = self.stdout = sock_io
+        if self.transcript is not None:
+            self._transcript_writer = TranscriptWriter(open(self.transcript, "ab"))
+            sock_io.record(self._transcript_writer)
+        self._session_done.clear()
+        self._resumed = queue.Queue()
+        token = binascii.hexlify(os.urandom(16)).decode("ascii")
+        sock_io.enable_resume(token, self.replay_frames, self._wait_for_resume)
+        if self.heartbeat_interval > 0:
+            sock_io.enable_heartbeat(
+                self.heartbeat_interval, self.idle_timeout, self.idle_warning
+            )
+
+        self._peer_thread = threading.Thread(target=self._accept_peers)
+        self._peer_thread.daemon = True
+        self._peer_thread.start()
+
+    def _wait_for_resume(self):
+        try:
+            return self._resumed.get(timeout=max(self.resume_grace, 0))
+        except queue.Empty:
+            return None
+
+    def _accept_peers(self):
+        """Accept observers and resuming clients while the session is active."""
+        while not self._session_done.is_set():
+            try:
+                if not _wait_readable(self._sock, 0.1) or self._session_done.is_set():
+                    continue
+                conn, _ = self._sock.accept()
+            except (SocketError, ValueError):
+                # Out of file descriptors or the socket closed, try again while
+                # the session lasts rather than losing observers for good.
+                self._session_done.wait(0.1)
+                continue
+            self._accept_peer(conn)
+
+    def _accept_peer(self, conn):
+        sock_io = self.stdout
+        conn.settimeout(self.observer_timeout)
+        conn_io = PdbIOWrapper(conn)
+        try:
+            msg, code = conn_io._read_frame()
+        except (EOFError, SocketError, ValueError):
+            msg, code = "", PdbIOWrapper._CLOSED
+
+        if code == PdbIOWrapper._OBSERVE:
+            sock_io.add_observer(conn_io.detach(), self.observer_buffer_size)
+        elif code == PdbIOWrapper._CANCEL and self._valid_token(msg):
+            conn_io.close()
+            self._cancel_command("by the client")
+        elif code == PdbIOWrapper._RESUME and self._can_resume(msg):
+            # Confirm right away, missed output is replayed once the
+            # debugger gets around to reading from the client again.
+            conn_io._send_code(PdbIOWrapper._SESSION, sock_io.session_token)
+            conn = conn_io.detach()
+            conn.settimeout(None)
+            self._resumed.put((conn, int(msg.rpartition(":")[2])))
+        else:
+            conn_io.close()
 
-    def raise_eoferror(self):
-        """Send `EOFError` to server and return output from server.
+    def _valid_token(self, token):
+        session_token = self.stdout.session_token
+        if session_token is None:
+            return False
+        return hmac.compare_digest(
+            token.encode("ascii", "replace"), session_token.encode("ascii")
+        )
 
-        Returns
-        -------
-        (str, bool) : A tuple containing the str output from the connection and
-            a bool indicating if the connection is closed.
-        """
-        success = self._client_io.raise_eoferror()
-        if not success:
-            return "", True
-        return self.recv()
+    def _can_resume(self, msg):
+        token, _, frames_seen = msg.rpartition(":")
+        if self.resume_grace <= 0 or not frames_seen.isdigit():
+            return False
+        return self._valid_token(token)
 
-    def send_cmd(self, cmd):
-        """Send command to the PDB server.
+    def onecmd(self, line):
+        """Run a command, which the client or the time budget may cancel.
 
-        This would be the typical inputs to pdb.
+        Cancelling raises `CommandCancelled` in the thread running the command,
+        so code stuck in a long call into C only stops once the call returns.
+        """
+        if self.parseline(line)[0] in self.uncancellable_commands:
+            return pdb.Pdb.onecmd(self, line)
+
+        with self._cancel_lock:
+            self._command_thread = threading.current_thread().ident
+            self._cancel_reason = None
+        timer = None
+        if self.command_timeout is not None:
+            timer = threading.Timer(
+                self.command_timeout,
+                self._cancel_command,
+                ("after {} seconds".format(self.command_timeout),),
+            )
+            timer.daemon = True
+            timer.start()
 
-        Parameters
-        ----------
-        cmd
-            The command to send to the PDB server.
+        try:
+            try:
+                return pdb.Pdb.onecmd(self, line)
+            finally:
+                if timer is not None:
+                    timer.cancel()
+                self._end_command()
+        except CommandCancelled:
+            # Cancelled outside of the code pdb evaluates, which reports it.
+            pass
+        finally:
+            if self._cancel_reason is not None:
+                self.stdout.write(
+                    "*** Command cancelled {}.\n".format(self._cancel_reason)
+                )
+
+    def _end_command(self):
+        with self._cancel_lock:
+            if self._cancel_reason is not None:
+                # Don't let a cancellation that wasn't raised yet escape the command.
+                _raise_in_thread(self._command_thread, None)
+            self._command_thread = None
+            self._cancel_held = False
+
+    def _cancel_command(self, reason):
+        """Cancel the running command, if any, from another thread."""
+        with self._cancel_lock:
+            if self._command_thread is None or self._cancel_reason is not None:
+                return
+            if self._sending:
+                # Raised by _hold_cancel once the frame is sent.
+                self._cancel_held = True
+                self._cancel_reason = reason
+            elif _raise_in_thread(self._command_thread, CommandCancelled):
+                self._cancel_reason = reason
+
+    @contextlib.contextmanager
+    def _hold_cancel(self):
+        """Hold back cancelling the running command while it sends a frame.
+
+        The exception would otherwise cut the frame short, e.g. between its
+        header and payload, and the client couldn't read anything after it.
         """
-        if not cmd.endswith(os.linesep):
-            cmd += os.linesep
+        with self._cancel_lock:
+            hold = (
+                not self._sending
+                and threading.current_thread().ident == self._command_thread
+            )
+            if hold:
+                self._sending = True
+                # A cancellation being handled, e.g. printed, was raised already.
+                handling = isinstance(sys.exc_info()[1], CommandCancelled)
+                if (
+                    self._cancel_reason is not None
+                    and not self._cancel_held
+                    and not handling
+                ):
+                    # It may not have been raised yet, raise it again after the frame.
+                    _raise_in_thread(self._command_thread, None)
+                    self._cancel_held = True
+        try:
+            yield
+        finally:
+            if hold:
+                with self._cancel_lock:
+                    self._sending = False
+                    if self._cancel_held:
+                        self._cancel_held = False
+                        _raise_in_thread(self._command_thread, CommandCancelled)
+
+    def interaction(self, *args, **kwargs):
+        """Stop, holding off catchpoints and watchpoints until the prompt is left.
+
+        `PdbCatch` and `PdbWatch` each wrap pdb's `interaction`. Without super()
+        they can't be chained, so both are done here.
+        """
+        self._catch_stopped = self._watch_stopped = True
+        try:
+            return pdb.Pdb.interaction(self, *args, **kwargs)
+        finally:
+            self._catch_stopped = self._watch_stopped = False
 
-        self._client_io.write(cmd)
+    def cmdloop(self, intro=None):
+        """Run the command loop, detaching if the session times out."""
+        try:
+            pdb.Pdb.cmdloop(self, intro)
+        except SessionTimeout as e:
+            self.stdout.write("*** Detaching, {}{}".format(e, os.linesep))
+            self.detach_session()
 
-    send = send_cmd
+    def _can_break_on_watch(self):
+        """Only stop on watchpoints and catchpoints while a client is attached."""
+        return isinstance(self.stdin, PdbIOWrapper) and not self._session_done.is_set()
 
-    def recv(self):
-        """Receive output from the PDB server.
+    _can_break_on_catch = _can_break_on_watch
 
-        Returns
-        -------
-        (str, bool) : A tuple containing the str output from the connection and
-            a bool indicating if the connection is closed.
+    def detach_session(self):
+        """Continue running the program and end the session.
+
+        Subclasses with a `detach` command run it instead, so timed out sessions
+        are torn down the same way as a detach by the user.
         """
-        return self._client_io.read_prompt()
+        do_detach = getattr(self, "do_detach", None)
+        if do_detach is not None:
+            do_detach("")
+        else:
+            self.set_continue()
+            self.close()
 
-    def send_and_recv(self, cmd):
-        """Send command to the PDB server and receive the output.
+    def do_interact(self, arg):
+        """Start an interactive interpreter."""
+        # Mostly copied from the pdb source code.
+        ns = self.curframe.f_globals.copy()
+        ns.update(self.curframe_locals)
+        console = PdbInteractiveConsole(self.stdin, ns)
+        # The interactive interpreter uses `exec` under the hood. `exec` outputs to
+        # sys.stdout so sys.stdout needs to be replaced with the IO object pdb is using.
+        with _replace_stdout(self.stdout) as _:
+            console.interact("*interactive*")
 
-        Parameters
-        ----------
-        cmd
-            The command to send to the PDB server.
+    def do_runscript(self, arg):
+        """Run a script uploaded by the client in the current frame.
 
-        Returns
-        -------
-        str
-            Output from the PDB server.
-        bool
-            True if the connection has been closed.
+        Usage: runscript <file>
+
+        The client reads <file> and sends it along with the command. The script
+        can read and change the current frame's globals and locals, and what it
+        prints is sent to the client as it runs.
         """
-        self.send_cmd(cmd)
-        return self.recv()
+        name = arg.strip()
+        source = self._uploaded_script(name)
+        if source is None:
+            return
+
+        try:
+            code = compile(source, name, "exec")
+        except SyntaxError:
+            exc_type, exc_value = sys.exc_info()[:2]
+            self.stdout.write(
+                "".join(traceback.format_exception_only(exc_type, exc_value))
+            )
+            return
+
+        with _replace_stdout(self.stdout):
+            try:
+                exec(code, self.curframe.f_globals, self.curframe_locals)
+            except (Exception, SystemExit):
+                exc_type, exc_value, tb = sys.exc_info()
+                # Skip this frame, the traceback starts in the script.
+                self.stdout.write(
+                    "".join(traceback.format_exception(exc_type, exc_value, tb.tb_next))
+                )
+
+    def _uploaded_script(self, name):
+        """Return the script `name` uploaded by the client, or None if there is none."""
+        source = getattr(self.stdin, "scripts", {}).pop(name, None)
+        if source is None:
+            self.stdout.write(
+                "*** No script {!r} was uploaded by the client.\n".format(name)
+            )
+        return source
+
+    def _patch_source(self, path):
+        """Return the file the client uploaded with `patch`."""
+        return self._uploaded_script(path)
+
+    def close(self):
+        """End the session and close the connection to the client and any observers."""
+        self._session_done.set()
+        if isinstance(self.stdin, PdbIOWrapper):
+            # Let the client go before waiting for the peer thread to notice.
+            self.stdin.end_session()
+        if self._peer_thread is not None:
+            self._peer_thread.join()
+            self._peer_thread = None
+        if isinstance(self.stdin, PdbIOWrapper):
+            self.stdin.close()
+        if self._transcript_writer is not None:
+            self._transcript_writer.close()
+            self._transcript_writer = None
+
+    def close_listener(self):
+        """Stop accepting connections and free the port."""
+        self._sock.close()
@@ -5,22 +5,34 @@ import os
 import pdb
 import socket
 import sys
+from pdb_attach.catch import PdbCatch
+from pdb_attach.client import PdbClient as PdbClient
+from pdb_attach.diagnostics import PdbDiagnostics
+from pdb_attach.patch import PdbPatch
+from pdb_attach.stack import PdbStack
+from pdb_attach.tasks import PdbTasks
+from pdb_attach.transport import (
+    PdbIOWrapper as PdbIOWrapper,
+    SessionTimeout as SessionTimeout,
+    SocketError as SocketError,
+)
+from pdb_attach.watch import PdbWatch
 from types import FrameType
-from typing import Any, AnyStr, BinaryIO, Callable, Dict, Optional, Tuple, Union
+from typing import (
+    Any,
+    AnyStr,
+    BinaryIO,
+    Callable,
+    ContextManager,
+    Dict,
+    Optional,
+    Tuple,
+    Union,
+)
 
-class PdbStr(str):
-    def __new__(cls, value: str, prompt: bool = False) -> PdbStr: ...
-    is_prompt: bool = ...
+class CommandCancelled(KeyboardInterrupt): ...
 
-class PdbIOWrapper(io.TextIOBase):
-    def __init__(self, sock: socket.socket) -> None: ...
-    def detach(self) -> BinaryIO: ...
-    def read(self, size: Optional[int] = -1) -> AnyStr: ...
-    def readline(self, size: Optional[int] = -1) -> AnyStr: ...
-    def read_prompt(self) -> Tuple[AnyStr, bool]: ...
-    def raise_eoferror(self) -> bool: ...
-    def write(self, msg: str) -> int: ...
-    def flush(self) -> None: ...
+def _raise_in_thread(ident: int, exc: Optional[type]) -> bool: ...
 
 class PdbInteractiveConsole(code.InteractiveConsole):
     def __init__(
@@ -32,20 +44,39 @@ class PdbInteractiveConsole(code.InteractiveConsole):
     def raw_input(self, prompt: str = "") -> str: ...
     def write(self, data: str) -> None: ...
 
-class PdbServer(pdb.Pdb):
+class PdbServer(PdbCatch, PdbDiagnostics, PdbPatch, PdbStack, PdbTasks, PdbWatch):
+    backlog: int = ...
+    observer_buffer_size: int = ...
+    observer_timeout: float = ...
+    identify_timeout: float = ...
+    resume_grace: float = ...
+    replay_frames: int = ...
+    heartbeat_interval: float = ...
+    idle_warning: float = ...
+    uncancellable_commands: Tuple[str, ...] = ...
+    idle_timeout: Optional[float] = ...
+    transcript: Optional[str] = ...
+    command_timeout: Optional[float] = ...
     def __init__(self, port: Union[int, str], *args: Any, **kwargs: Any) -> None: ...
+    @property
+    def bound_port(self) -> int: ...
     def set_trace(self, frame: Optional[FrameType] = ...) -> None: ...
+    def _is_driver(self, conn: socket.socket) -> bool: ...
+    def _accept_driver(self) -> socket.socket: ...
+    def _stop_in(self, frame: FrameType) -> None: ...
+    def _valid_token(self, token: str) -> bool: ...
+    def onecmd(self, line: str) -> bool: ...
+    def _end_command(self) -> None: ...
+    def _cancel_command(self, reason: str) -> None: ...
+    def _hold_cancel(self) -> ContextManager[None]: ...
+    def interaction(self, *args: Any, **kwargs: Any) -> None: ...
+    def cmdloop(self, intro: Optional[str] = ...) -> None: ...
+    def _can_break_on_watch(self) -> bool: ...
+    def _can_break_on_catch(self) -> bool: ...
+    def detach_session(self) -> None: ...
     def do_interact(self, arg: Any) -> None: ...
+    def do_runscript(self, arg: str) -> None: ...
+    def _uploaded_script(self, name: str) -> Optional[str]: ...
+    def _patch_source(self, path: str) -> Optional[str]: ...
     def close(self) -> None: ...
-
-class PdbClient:
-    server_pid: int = ...
-    port: Union[int, str] = ...
-    def __init__(self, pid: int, port: Union[int, str]) -> None: ...
-    def connect(self) -> None: ...
-    def raise_eoferror(self) -> Tuple[str, bool]: ...
-    def send_cmd(self, cmd: str) -> None: ...
-    send: Callable[[str], None] = ...
-    def recv(self) -> Tuple[str, bool]: ...
-    def send_and_recv(self, cmd: str) -> Tuple[str, bool]: ...
-    def interactive_loop(self) -> None: ...
+    def close_listener(self) -> None: ...
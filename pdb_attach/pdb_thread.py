@@ -0,0 +1,278 @@
+# -*- mode: python -*-
+"""Listener thread for starting the debugger without signals."""
+import sys
+import threading
+import time
+import traceback
+
+from pdb_attach.detach import PdbDetach
+from pdb_attach.pdb_socket import PdbIOWrapper, PdbServer
+from pdb_attach.transport import SocketError, _wait_readable
+
+try:
+    import ctypes
+
+    _PendingCall = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_void_p)
+except (ImportError, AttributeError):
+    ctypes = None
+
+
+class PdbThread(PdbServer, PdbDetach):
+    """PdbThread is a backend that accepts clients on a listener thread.
+
+    No signal is involved. When a client connects, the listener thread breaks
+    into the target thread by setting a trace hook on it. If the target thread
+    doesn't reach Python code quickly, for example because it's blocked in a C
+    call, the client is shown the thread's stack while it waits.
+
+    Breaking into threads other than the main thread needs
+    `threading.settrace_all_threads`, which was added in Python 3.12. Older
+    versions break into the main thread with a pending call.
+
+    Parameters
+    ----------
+    port
+        Port to listen on.
+    thread_id
+        Keyword only. Identifier of the thread to break into. Defaults to the
+        thread creating the debugger.
+
+    Other arguments are passed on to `PdbServer`.
+    """
+
+    # Seconds to wait for the target thread to break in before showing the
+    # client where the thread is.
+    break_in_notice = 1.0
+
+    # Seconds to wait for the target thread to break in before giving up on
+    # the client and accepting the next one.
+    break_in_timeout = 60.0
+
+    _listener = None
+
+    def __init__(self, port, *args, **kwargs):
+        self.thread_id = kwargs.pop("thread_id", None)
+        if self.thread_id is None:
+            self.thread_id = threading.current_thread().ident
+        if not hasattr(threading, "settrace_all_threads"):
+            if ctypes is None:
+                raise RuntimeError("PdbThread needs ctypes before Python 3.12.")
+            if self.thread_id != _main_thread_id():
+                raise ValueError(
+                    "Breaking into threads other than the main thread needs Python 3.12."
+                )
+
+        PdbServer.__init__(self, port, *args, **kwargs)
+        self._conn = None
+        # Frames of the target thread when the client connected, and the trace
+        # hook of the threads before it was replaced to break in.
+        self._target_frames = []
+        self._previous_trace = None
+        self._stop = threading.Event()
+        self._broke_in = threading.Event()
+        self._break_lock = threading.Lock()
+        self._pending_call = None
+        self._thread = threading.Thread(target=self._listen)
+        self._thread.daemon = True
+
+    @classmethod
+    def listen(cls, port, *args, **kwargs):
+        """Start the listener thread."""
+        cls.unlisten()
+        cls._listener = cls(port, *args, **kwargs)
+        cls._listener._thread.start()
+
+    @classmethod
+    def unlisten(cls):
+        """Stop the listener thread and free the port."""
+        listener, cls._listener = cls._listener, None
+        if listener is not None:
+            listener._stop.set()
+            listener._thread.join()
+            listener.close_listener()
+
+    def _listen(self):
+        while not self._stop.is_set():
+            try:
+                if not _wait_readable(self._sock, 0.1) or self._stop.is_set():
+                    continue
+                conn, _ = self._sock.accept()
+            except (SocketError, ValueError):
+                # Out of file descriptors or the socket closed, try again.
+                self._stop.wait(0.1)
+                continue
+            if not self._is_driver(conn):
+                continue
+            self._session_done.clear()
+            if not self._break_in(conn):
+                continue
+
+            # Observers and resuming clients are accepted by the session, wait
+            # for it to end before accepting the next client.
+            while not self._stop.is_set() and not self._session_done.wait(0.1):
+                pass
+
+    def _break_in(self, conn):
+        """Arrange for the target thread to start debugging over `conn`."""
+        frame = sys._current_frames().get(self.thread_id)
+        if frame is None:
+            self._notify(conn, "*** Thread {} is not running.\n".format(self.thread_id))
+            conn.close()
+            return False
+
+        self._conn = conn
+        self._broke_in.clear()
+        while frame is not None:
+            self._target_frames.append(frame)
+            frame = frame.f_back
+        if hasattr(threading, "settrace_all_threads"):
+            self._previous_trace = threading.gettrace()
+            threading.settrace_all_threads(self._trace_break_in)
+            for frame in self._target_frames:
+                frame.f_trace = self._trace_break_in
+        else:
+            # Keep a reference, the callback must outlive the pending call.
+            self._pending_call = _PendingCall(self._pending_break_in)
+            ctypes.pythonapi.Py_AddPendingCall(self._pending_call, None)
+
+        if not self._broke_in.wait(self.break_in_notice):
+            with self._break_lock:
+                if not self._broke_in.is_set():
+                    self._notify_waiting(conn)
+        return self._wait_for_break_in(conn)
+
+    def _wait_for_break_in(self, conn):
+        """Wait for the target thread to break in, giving up after `break_in_timeout`.
+
+        Returns
+        -------
+        bool : True if the thread broke in and the session started.
+        """
+        deadline = time.time() + self.break_in_timeout
+        while not self._broke_in.wait(0.1):
+            if time.time() < deadline and not self._stop.is_set():
+                continue
+            # Claim the break-in, so the hook does nothing if it runs late.
+            if not self._claim_break_in():
+                break
+            self._untrace()
+            self._conn = None
+            self._notify(
+                conn,
+                "*** Gave up waiting for thread {} to run Python code.\n".format(
+                    self.thread_id
+                ),
+            )
+            conn.close()
+            return False
+        return True
+
+    def _notify(self, conn, msg):
+        conn_io = PdbIOWrapper(conn)
+        conn_io._send_code(PdbIOWrapper._WARNING, msg)
+        conn_io.detach()
+
+    def _notify_waiting(self, conn):
+        """Tell the client where the target thread is while it waits for it."""
+        frame = sys._current_frames().get(self.thread_id)
+        stack = "".join(traceback.format_stack(frame)) if frame is not None else ""
+        self._notify(
+            conn,
+            "*** Waiting for thread {} to run Python code, it is at:\n{}".format(
+                self.thread_id, stack
+            ),
+        )
+
+    def _claim_break_in(self):
+        with self._break_lock:
+            if self._broke_in.is_set():
+                return False
+            self._broke_in.set()
+            return True
+
+    def _trace_break_in(self, frame, event, arg):
+        """Trace hook set on all threads, only acts on the target thread.
+
+        The thread stops at the next line it runs in one of the frames it was
+        running when the client connected. Frames it calls into, such as
+        weakref callbacks run by the garbage collector, are passed over.
+        """
+        if threading.current_thread().ident != self.thread_id:
+            return None
+        if event != "line" or not any(
+            frame is target for target in self._target_frames
+        ):
+            return None
+        if not self._claim_break_in():
+            return None
+
+        self._untrace()
+        self._start_debugging(frame)
+        return self.trace_dispatch(frame, event, arg)
+
+    def _untrace(self):
+        """Give the threads back the trace hook they had before breaking in.
+
+        Only the hook set with `threading.settrace` or `settrace_all_threads`
+        can be restored, a hook a thread set for itself is lost.
+        """
+        if hasattr(threading, "settrace_all_threads"):
+            threading.settrace_all_threads(self._previous_trace)
+        for frame in self._target_frames:
+            if frame.f_trace == self._trace_break_in:
+                frame.f_trace = None
+        self._target_frames = []
+        self._previous_trace = None
+
+    def _pending_break_in(self, _):
+        """Pending call run by the main thread between bytecodes."""
+        try:
+            if self._claim_break_in():
+                # Skip this callback's frame, and any callback the interrupted
+                # thread was running, for the frame it was in when the client
+                # connected.
+                frame = interrupted = sys._getframe(1)
+                while frame is not None and not any(
+                    frame is target for target in self._target_frames
+                ):
+                    frame = frame.f_back
+                self._untrace()
+                self._start_debugging(frame or interrupted)
+        except Exception:
+            traceback.print_exc()
+        return 0
+
+    def _start_debugging(self, frame):
+        conn, self._conn = self._conn, None
+        self._start_session(conn)
+        self._stop_in(frame)
+
+    def set_continue(self):
+        """Continue running the program, ending the session without breakpoints."""
+        PdbServer.set_continue(self)
+        if not self.breaks:
+            self._end_session()
+
+    def set_quit(self):
+        """Quit the program being debugged and end the session."""
+        PdbServer.set_quit(self)
+        self._end_session()
+
+    def _end_session(self):
+        """Close the session, so the listener thread accepts the next client."""
+        if not self._session_done.is_set():
+            PdbServer.close(self)
+
+    def do_detach(self, arg):
+        """Detach and disconnect socket."""
+        rv = PdbDetach.do_detach(self, arg)
+        self._end_session()
+        return rv
+
+
+def _main_thread_id():
+    main_thread = getattr(threading, "main_thread", None)
+    if main_thread is not None:
+        return main_thread().ident
+    # Python 2 doesn't have main_thread.
+    return threading._shutdown.__self__.ident  # type: ignore
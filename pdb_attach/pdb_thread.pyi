@@ -0,0 +1,19 @@
+import threading
+from pdb_attach.detach import PdbDetach
+from pdb_attach.pdb_socket import PdbServer
+from typing import Any, ClassVar, Optional, Union
+
+class PdbThread(PdbServer, PdbDetach):
+    break_in_notice: float = ...
+    break_in_timeout: float = ...
+    thread_id: int = ...
+    _listener: ClassVar[Optional[PdbThread]] = ...
+    _thread: threading.Thread = ...
+    def __init__(self, port: Union[int, str], *args: Any, **kwargs: Any) -> None: ...
+    @classmethod
+    def listen(cls, port: Union[int, str], *args: Any, **kwargs: Any) -> None: ...
+    @classmethod
+    def unlisten(cls) -> None: ...
+    def set_continue(self) -> None: ...
+    def set_quit(self) -> None: ...
+    def do_detach(self, arg: str) -> bool: ...
@@ -0,0 +1,336 @@
+# -*- mode: python -*-
+"""Post-mortem snapshots of crashed programs, browsed offline.
+
+`install` sets an excepthook that saves the frames of an unhandled exception to
+a file: where each frame was, the source around it and the repr of its locals.
+The program exits as usual, and the snapshot is browsed later with::
+
+    python -m pdb_attach --postmortem SNAPSHOT
+
+Only reprs are saved, so the browser can show variables but not evaluate
+expressions. It doesn't import `pdb`.
+
+This module is imported by every process that installs the hook, so anything
+heavy is only imported when a snapshot is taken or browsed.
+"""
+import cmd
+import os
+import sys
+import threading
+
+from pdb_attach.reprs import safe_repr
+
+# Version of the snapshot format.
+SNAPSHOT_VERSION = 1
+
+_previous_hook = None
+
+
+def _capture_frame(frame, lineno, context, max_locals, max_repr):
+    import inspect
+    import linecache
+
+    code = frame.f_code
+    start = max(lineno - context, 1)
+    source = []
+    for line in range(start, lineno + context + 1):
+        text = linecache.getline(code.co_filename, line, frame.f_globals)
+        if not text:
+            break
+        source.append([line, text.rstrip("\n")])
+
+    nargs = code.co_argcount + getattr(code, "co_kwonlyargcount", 0)
+    nargs += bool(code.co_flags & inspect.CO_VARARGS) + bool(
+        code.co_flags & inspect.CO_VARKEYWORDS
+    )
+    local_vars = sorted(frame.f_locals.items())[:max_locals]
+    return {
+        "filename": code.co_filename,
+        "lineno": lineno,
+        "name": code.co_name,
+        "args": list(code.co_varnames[:nargs]),
+        "source": source,
+        "locals": dict(
+            (name, safe_repr(value, max_repr)) for name, value in local_vars
+        ),
+    }
+
+
+def capture(
+    exc_type, exc_value, tb, context=10, max_frames=100, max_locals=100, max_repr=1000
+):
+    """Return a snapshot of the frames of an exception's traceback.
+
+    Parameters
+    ----------
+    exc_type, exc_value, tb
+        The exception, as returned by `sys.exc_info`.
+    context
+        Source lines kept before and after each frame's current line.
+    max_frames
+        Frames kept, the innermost ones are kept if there are more.
+    max_locals
+        Locals kept per frame.
+    max_repr
+        Characters kept of each local's repr.
+
+    Returns
+    -------
+    dict : The snapshot, ready to be serialized as JSON.
+    """
+    import time
+    import traceback
+
+    frames = []
+    while tb is not None:
+        frames.append((tb.tb_frame, tb.tb_lineno))
+        tb = tb.tb_next
+    return {
+        "version": SNAPSHOT_VERSION,
+        "pid": os.getpid(),
+        "time": time.time(),
+        "argv": list(sys.argv),
+        "exception": "".join(traceback.format_exception_only(exc_type, exc_value)),
+        "frames": [
+            _capture_frame(frame, lineno, context, max_locals, max_repr)
+            for frame, lineno in frames[-max_frames:]
+        ],
+    }
+
+
+def write(path, snapshot):
+    """Write `snapshot` to `path` as gzipped JSON."""
+    import gzip
+    import json
+
+    tmp = "{}.tmp".format(path)
+    with gzip.open(tmp, "wb") as f:
+        f.write(json.dumps(snapshot, separators=(",", ":")).encode("utf-8"))
+    os.rename(tmp, path)
+
+
+def read(path):
+    """Read the snapshot written to `path`."""
+    import gzip
+    import json
+
+    with gzip.open(path, "rb") as f:
+        snapshot = json.loads(f.read().decode("utf-8"))
+    if snapshot.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(
+            "Unsupported snapshot version {!r}.".format(snapshot.get("version"))
+        )
+    return snapshot
+
+
+def install(directory, **kwargs):
+    """Save a snapshot to `directory` when the program dies of an exception.
+
+    The snapshot is captured in the excepthook, since the frames are gone once
+    it returns, and written by a separate thread while the previous hook reports
+    the exception. The interpreter waits for the write before exiting.
+
+    Keyword arguments are passed on to `capture`.
+    """
+    global _previous_hook
+
+    uninstall()
+    _previous_hook = sys.excepthook
+
+    def excepthook(exc_type, exc_value, tb):
+        try:
+            snapshot = capture(exc_type, exc_value, tb, **kwargs)
+            path = os.path.join(
+                directory,
+                "pdb-attach-{}-{}.snapshot.gz".format(
+                    snapshot["pid"], int(snapshot["time"])
+                ),
+            )
+            writer = threading.Thread(target=write, args=(path, snapshot))
+            writer.start()
+            sys.stderr.write(
+                "pdb-attach: saving a post-mortem snapshot to {}\n".format(path)
+            )
+        except Exception as e:
+            sys.stderr.write(
+                "pdb-attach: failed to save a post-mortem snapshot: {!r}\n".format(e)
+            )
+        _previous_hook(exc_type, exc_value, tb)
+
+    excepthook.pdb_attach_postmortem = True
+    sys.excepthook = excepthook
+
+
+def uninstall():
+    """Restore the excepthook that was replaced by `install`."""
+    global _previous_hook
+
+    if getattr(sys.excepthook, "pdb_attach_postmortem", False):
+        sys.excepthook = _previous_hook
+    _previous_hook = None
+
+
+class SnapshotBrowser(cmd.Cmd):
+    """Navigate the frames of a snapshot like pdb navigates a stack.
+
+    Parameters
+    ----------
+    snapshot : dict
+        The snapshot, as returned by `read`.
+    stdin, stdout
+        Files to read commands from and write output to.
+    """
+
+    prompt = "(Pdb) "
+
+    def __init__(self, snapshot, stdin=None, stdout=None):
+        cmd.Cmd.__init__(self, stdin=stdin, stdout=stdout)
+        if stdin is not None:
+            self.use_rawinput = False
+        self.snapshot = snapshot
+        self.frames = snapshot["frames"]
+        self.curindex = len(self.frames) - 1
+
+    def preloop(self):
+        """Show the exception and the frame it was raised in."""
+        self.stdout.write(self.snapshot["exception"])
+        if self.frames:
+            self._print_entry(self.curindex)
+
+    def emptyline(self):
+        """Do nothing, there is no last command worth repeating offline."""
+
+    def default(self, line):
+        """Explain that only the saved reprs are available."""
+        self.stdout.write(
+            "*** Unknown command {!r}, this is a snapshot, see `help`.\n".format(line)
+        )
+
+    def _line(self, frame, lineno):
+        for line, text in frame["source"]:
+            if line == lineno:
+                return text
+        return None
+
+    def _print_entry(self, index, prefix="> "):
+        frame = self.frames[index]
+        self.stdout.write(
+            "{}{}({}){}()\n".format(
+                prefix, frame["filename"], frame["lineno"], frame["name"]
+            )
+        )
+        text = self._line(frame, frame["lineno"])
+        if text is not None:
+            self.stdout.write("-> {}\n".format(text.strip()))
+
+    def do_where(self, arg):
+        """Print the saved stack, most recent frame last.
+
+        Usage: w(here)
+        """
+        for index in range(len(self.frames)):
+            self._print_entry(index, "> " if index == self.curindex else "  ")
+
+    do_w = do_where
+    do_bt = do_where
+
+    def _move(self, arg, direction):
+        try:
+            count = int(arg) if arg.strip() else 1
+        except ValueError:
+            self.stdout.write("*** Expected a number, got {!r}.\n".format(arg))
+            return
+        index = self.curindex + direction * count
+        if not 0 <= index < len(self.frames):
+            self.stdout.write(
+                "*** {}\n".format("Oldest frame" if direction < 0 else "Newest frame")
+            )
+            return
+        self.curindex = index
+        self._print_entry(index)
+
+    def do_up(self, arg):
+        """Move to an older frame.
+
+        Usage: u(p) [count]
+        """
+        self._move(arg, -1)
+
+    do_u = do_up
+
+    def do_down(self, arg):
+        """Move to a newer frame.
+
+        Usage: d(own) [count]
+        """
+        self._move(arg, 1)
+
+    do_d = do_down
+
+    def do_list(self, arg):
+        """List the saved source around the current line of the frame.
+
+        Usage: l(ist)
+        """
+        frame = self.frames[self.curindex]
+        for line, text in frame["source"]:
+            marker = "->" if line == frame["lineno"] else "  "
+            self.stdout.write("{:>4} {} {}\n".format(line, marker, text))
+        if not frame["source"]:
+            self.stdout.write("*** No source was saved for this frame.\n")
+
+    do_l = do_list
+
+    def do_args(self, arg):
+        """Print the arguments of the current frame.
+
+        Usage: a(rgs)
+        """
+        frame = self.frames[self.curindex]
+        for name in frame["args"]:
+            self.stdout.write(
+                "{} = {}\n".format(name, frame["locals"].get(name, "<not saved>"))
+            )
+
+    do_a = do_args
+
+    def do_p(self, arg):
+        """Print the saved repr of a local variable of the current frame.
+
+        Usage: p name
+
+        Without a name, all the saved locals are printed. Expressions can't be
+        evaluated, the objects are gone.
+        """
+        local_vars = self.frames[self.curindex]["locals"]
+        name = arg.strip()
+        if not name:
+            for name in sorted(local_vars):
+                self.stdout.write("{} = {}\n".format(name, local_vars[name]))
+        elif name in local_vars:
+            self.stdout.write("{}\n".format(local_vars[name]))
+        else:
+            self.stdout.write(
+                "*** No local {!r} was saved in this frame.\n".format(name)
+            )
+
+    do_pp = do_p
+
+    def do_quit(self, arg):
+        """Stop browsing the snapshot.
+
+        Usage: q(uit)
+        """
+        return True
+
+    do_q = do_quit
+    do_EOF = do_quit
+
+
+def browse(path, stdin=None, stdout=None):
+    """Browse the snapshot at `path` with pdb-style commands."""
+    browser = SnapshotBrowser(read(path), stdin=stdin, stdout=stdout)
+    if not browser.frames:
+        browser.stdout.write(browser.snapshot["exception"])
+        return
+    browser.cmdloop()
@@ -0,0 +1,41 @@
+import cmd
+from types import TracebackType
+from typing import Any, Dict, IO, Optional, Type
+
+SNAPSHOT_VERSION: int
+
+def capture(
+    exc_type: Type[BaseException],
+    exc_value: BaseException,
+    tb: Optional[TracebackType],
+    context: int = ...,
+    max_frames: int = ...,
+    max_locals: int = ...,
+    max_repr: int = ...,
+) -> Dict[str, Any]: ...
+def write(path: str, snapshot: Dict[str, Any]) -> None: ...
+def read(path: str) -> Dict[str, Any]: ...
+def install(directory: str, **kwargs: Any) -> None: ...
+def uninstall() -> None: ...
+
+class SnapshotBrowser(cmd.Cmd):
+    snapshot: Dict[str, Any] = ...
+    frames: Any = ...
+    curindex: int = ...
+    def __init__(
+        self,
+        snapshot: Dict[str, Any],
+        stdin: Optional[IO[str]] = ...,
+        stdout: Optional[IO[str]] = ...,
+    ) -> None: ...
+    def do_where(self, arg: str) -> None: ...
+    def do_up(self, arg: str) -> None: ...
+    def do_down(self, arg: str) -> None: ...
+    def do_list(self, arg: str) -> None: ...
+    def do_args(self, arg: str) -> None: ...
+    def do_p(self, arg: str) -> None: ...
+    def do_quit(self, arg: str) -> bool: ...
+
+def browse(
+    path: str, stdin: Optional[IO[str]] = ..., stdout: Optional[IO[str]] = ...
+) -> None: ...
@@ -0,0 +1,205 @@
+# -*- mode: python -*-
+"""Replay the client side of a recorded session against the debugger.
+
+Sessions are recorded by passing `transcript` to `pdb_attach.listen`. Replaying
+one sends the debugger the same commands, as fast as possible or at the
+recorded pace, and reports how long the debugger took to answer each of them.
+That makes a transcript a load generator for benchmarking the debugger, and
+with `--check` a regression test that the debugger still answers the same way.
+
+Without `--pid`, the session is replayed against a debugger started in this
+process. Run from the command line::
+
+    python -m pdb_attach.replay TRANSCRIPT [--pid PID --port PORT] [--speed N]
+"""
+import argparse
+import collections
+import sys
+import threading
+import time
+
+from pdb_attach.client import PdbClient, PdbSignaler
+from pdb_attach.transcript import RECEIVED, SENT, read_sessions
+from pdb_attach.transport import PdbIOWrapper
+
+# Frames the client sends that make up a command.
+_INPUT_CODES = (PdbIOWrapper._TEXT, PdbIOWrapper._SCRIPT, PdbIOWrapper._EOFERROR)
+
+# Frames the server sends that the client shows.
+_OUTPUT_CODES = (PdbIOWrapper._TEXT, PdbIOWrapper._PROMPT, PdbIOWrapper._WARNING)
+
+Step = collections.namedtuple("Step", ["offset", "frames", "output"])
+
+Result = collections.namedtuple("Result", ["step", "output", "latency"])
+
+
+def steps(session):
+    """Split a session recorded by the server into commands and their output.
+
+    Returns
+    -------
+    [Step] : The frames the client sent for each command, when it sent them,
+        and the output the server answered with. The first step has no frames,
+        its output is what the server sent when the session started.
+    """
+    result = [Step(0.0, [], [])]
+    for record in session:
+        if record.direction == RECEIVED and record.code in _INPUT_CODES:
+            if result[-1].output:
+                result.append(Step(record.offset, [], []))
+            result[-1].frames.append((record.code, record.payload))
+        elif record.direction == SENT and record.code in _OUTPUT_CODES:
+            result[-1].output.append(record.payload)
+    return [step._replace(output="".join(step.output)) for step in result]
+
+
+def replay(session_steps, client_io, speed=0):
+    """Send the commands of `session_steps` through `client_io`.
+
+    Parameters
+    ----------
+    session_steps : [Step]
+        Commands to send, as returned by `steps`.
+    client_io : PdbIOWrapper
+        Connection to the debugger.
+    speed : float
+        Multiple of the recorded pace to send commands at. Commands are sent as
+        soon as the previous one was answered if this is not positive.
+
+    Returns
+    -------
+    [Result] : The output and latency of each command sent before the session
+        ended.
+    """
+    start = time.time()
+    results = []
+    for step in session_steps:
+        if speed > 0:
+            delay = start + step.offset / speed - time.time()
+            if delay > 0:
+                time.sleep(delay)
+
+        sent_at = time.time()
+        for code, payload in step.frames:
+            client_io._send_code(code, payload)
+        output, closed = client_io.read_prompt()
+        results.append(Result(step, output, time.time() - sent_at))
+        if closed:
+            break
+    return results
+
+
+def serve_in_thread(**kwargs):
+    """Start a debugger waiting for a client in a thread of this process.
+
+    Keyword arguments are passed on to the debugger.
+
+    Returns
+    -------
+    int : The port the debugger listens on.
+    """
+    # Imported here so the module can be imported without pdb.
+    from pdb_attach.pdb_signal import PdbSignal
+
+    debugger = PdbSignal(None, 0, **kwargs)
+    # Nobody comes back to a replayed session.
+    debugger.resume_grace = 0
+
+    def target():
+        # Always stop on the next line, the same in the recording and replay.
+        debugger._start_session(debugger._accept_driver())
+        debugger._stop_in(sys._getframe())
+        debugger.close_listener()
+
+    thread = threading.Thread(target=target)
+    thread.daemon = True
+    thread.start()
+    return debugger._sock.getsockname()[1]
+
+
+def _percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def _report(run, results):
+    latencies = [result.latency * 1000 for result in results]
+    print(
+        "run {}: {} commands in {:.1f} ms, latency median {:.2f} ms, "
+        "p90 {:.2f} ms, max {:.2f} ms".format(
+            run,
+            len(results),
+            sum(latencies),
+            _percentile(latencies, 0.5),
+            _percentile(latencies, 0.9),
+            max(latencies),
+        )
+    )
+
+
+def _check(results):
+    """Print the first command whose output changed and return False if any did."""
+    for i, result in enumerate(results):
+        if result.output != result.step.output:
+            print("command {} {!r} answered differently.".format(i, result.step.frames))
+            print(
+                "recorded:\n{}\nreplayed:\n{}".format(result.step.output, result.output)
+            )
+            return False
+    return True
+
+
+def main(argv=None):
+    """Replay a transcript with the command line arguments."""
+    parser = argparse.ArgumentParser(
+        prog="python -m pdb_attach.replay", description=__doc__
+    )
+    parser.add_argument("transcript", metavar="TRANSCRIPT", help="The transcript file.")
+    parser.add_argument(
+        "--session",
+        type=int,
+        default=0,
+        help="Which session of the transcript to replay.",
+    )
+    parser.add_argument(
+        "--pid", type=int, help="The pid of a process to replay against."
+    )
+    parser.add_argument("--port", type=int, help="The port the process listens on.")
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=0,
+        help="Multiple of the recorded pace, 1 replays in real time. Defaults to as fast as possible.",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=1, help="Replay the session this many times."
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Fail if the output differs from the recording.",
+    )
+    args = parser.parse_args(argv)
+    if args.pid is not None and args.port is None:
+        parser.error("--pid needs --port")
+
+    with open(args.transcript, "rb") as f:
+        session_steps = steps(read_sessions(f)[args.session])
+
+    ok = True
+    for run in range(args.repeat):
+        if args.pid is None:
+            client = PdbClient(serve_in_thread())
+        else:
+            client = PdbSignaler(args.pid, args.port)
+        client.connect()
+        results = replay(session_steps, client._client_io, args.speed)
+        client._client_io.close()
+        _report(run, results)
+        if args.check:
+            ok = _check(results) and ok
+    return 0 if ok else 1
+
+
+if "__main__" == __name__:
+    sys.exit(main())
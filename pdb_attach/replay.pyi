@@ -0,0 +1,20 @@
+from pdb_attach.transcript import Record
+from pdb_attach.transport import PdbIOWrapper
+from typing import Any, List, NamedTuple, Optional, Tuple
+
+class Step(NamedTuple):
+    offset: float
+    frames: List[Tuple[int, str]]
+    output: str
+
+class Result(NamedTuple):
+    step: Step
+    output: str
+    latency: float
+
+def steps(session: List[Record]) -> List[Step]: ...
+def replay(
+    session_steps: List[Step], client_io: PdbIOWrapper, speed: float = ...
+) -> List[Result]: ...
+def serve_in_thread(**kwargs: Any) -> int: ...
+def main(argv: Optional[List[str]] = ...) -> int: ...
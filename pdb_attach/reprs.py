@@ -0,0 +1,110 @@
+# -*- mode: python -*-
+"""Bounded reprs of values from the program being debugged.
+
+The values may be large, so containers, strings and bytes are only repr'd as far
+as the repr can show. This module is imported by every process that installs
+the post-mortem hook, so `reprlib` is only imported once a repr is made.
+"""
+import functools
+import itertools
+
+# max_repr -> reprlib.Repr with limits to match.
+_reprs = {}
+
+
+# Strings are cut at the end, like the repr as a whole.
+def _repr_str(limits, value, level):
+    return repr(value[: limits.maxother])
+
+
+# Unlike reprlib, only look at the first items of a dict instead of sorting all
+# of its keys.
+def _repr_mapping(limits, value, level):
+    if not value:
+        return "{}"
+    if level <= 0:
+        return "{...}"
+    items = getattr(value, "iteritems", value.items)()
+    pieces = [
+        "{}: {}".format(limits.repr1(key, level - 1), limits.repr1(item, level - 1))
+        for key, item in itertools.islice(items, limits.maxdict)
+    ]
+    if len(value) > limits.maxdict:
+        pieces.append("...")
+    return "{" + ", ".join(pieces) + "}"
+
+
+def _repr_subclass(limits, value, level):
+    return "{}({})".format(type(value).__name__, _repr_mapping(limits, value, level))
+
+
+def _repr_defaultdict(limits, value, level):
+    factory = limits.repr1(value.default_factory, level - 1)
+    return "defaultdict({}, {})".format(factory, _repr_mapping(limits, value, level))
+
+
+# Other objects are cut at the end too, and a failing repr isn't replaced by a
+# made-up one.
+def _repr_instance(limits, value, level):
+    if isinstance(value, dict) and type(value).__repr__ is dict.__repr__:
+        return _repr_subclass(limits, value, level)
+    text = repr(value)
+    if len(text) > limits.maxother:
+        text = text[: limits.maxother - 3] + "..."
+    return text
+
+
+def limited_repr(max_repr):
+    """Return a `reprlib.Repr` that makes reprs of about `max_repr` characters."""
+    try:
+        return _reprs[max_repr]
+    except KeyError:
+        pass
+    try:
+        import reprlib
+    except ImportError:
+        import repr as reprlib  # type: ignore
+
+    limits = reprlib.Repr()
+    limits.maxlevel = 3
+    # At most this many items of each container, about as many as fit.
+    items = max(max_repr // 10, 4)
+    for name in (
+        "maxtuple",
+        "maxlist",
+        "maxarray",
+        "maxdict",
+        "maxset",
+        "maxfrozenset",
+        "maxdeque",
+    ):
+        setattr(limits, name, items)
+    limits.maxlong = limits.maxother = max_repr
+
+    handlers = {
+        _repr_str: ("repr_str", "repr_unicode", "repr_bytes", "repr_bytearray"),
+        _repr_mapping: ("repr_dict",),
+        _repr_subclass: ("repr_OrderedDict", "repr_Counter"),
+        _repr_defaultdict: ("repr_defaultdict",),
+        _repr_instance: ("repr_instance",),
+    }
+    for handler, names in handlers.items():
+        for name in names:
+            setattr(limits, name, functools.partial(handler, limits))
+    _reprs[max_repr] = limits
+    return limits
+
+
+def safe_repr(value, max_repr):
+    """Return a repr of `value` no longer than `max_repr` that never raises.
+
+    Containers are only walked as deep and as far as the repr can show, so a
+    large value isn't repr'd in full to be cut short.
+    """
+    try:
+        text = limited_repr(max_repr).repr(value)
+    except Exception as e:
+        return "<repr failed: {}>".format(type(e).__name__)
+    if len(text) > max_repr:
+        text = text[: max_repr - 3] + "..."
+    return text
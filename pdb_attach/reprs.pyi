@@ -0,0 +1,5 @@
+import reprlib
+from typing import Any
+
+def limited_repr(max_repr: int) -> reprlib.Repr: ...
+def safe_repr(value: Any, max_repr: int) -> str: ...
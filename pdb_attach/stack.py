@@ -0,0 +1,139 @@
+# -*- mode: python -*-
+"""Compact stack traces for the debugger."""
+import pdb
+
+
+def collapse(keys, start, end, max_period, min_repeats):
+    """Group the frames between `start` and `end` into runs of repeated frames.
+
+    Parameters
+    ----------
+    keys : list
+        A key per frame, frames with equal keys are the same call site.
+    start, end : int
+        Range of frames to group.
+    max_period : int
+        Longest cycle of frames detected, e.g. 2 for mutual recursion.
+    min_repeats : int
+        Times a cycle must repeat to be collapsed.
+
+    Returns
+    -------
+    [(int, int, int)] : The first frame, period and repeats of each run. Frames
+        that don't repeat are runs of period and repeats 1.
+    """
+    runs = []
+    i = start
+    while i < end:
+        best = (1, 1, 1)
+        for period in range(1, max_period + 1):
+            cycle = keys[i : i + period]
+            repeats = 1
+            while i + (repeats + 1) * period <= end:
+                if keys[i + repeats * period : i + (repeats + 1) * period] != cycle:
+                    break
+                repeats += 1
+            if repeats >= min_repeats and period * repeats > best[0]:
+                best = (period * repeats, period, repeats)
+        runs.append((i, best[1], best[2]))
+        i += best[0]
+    return runs
+
+
+class PdbStack(pdb.Pdb):
+    """PdbStack extends Pdb with a `where` that stays short on deep stacks.
+
+    Only the frames that are shown are formatted, so the cost of `where` and
+    the output sent to the client depend on the limits below, not on how deep
+    the stack is.
+    """
+
+    # Number of lines of runs shown by where, the rest are hidden.
+    where_limit = 100
+
+    # Number of the outermost runs kept when frames are hidden.
+    where_head = 10
+
+    # Longest cycle of repeated frames collapsed by where.
+    where_max_period = 4
+
+    # Times a cycle must repeat to be collapsed.
+    where_min_repeats = 3
+
+    def do_where(self, arg):
+        """Print a stack trace, with the most recent frame at the bottom.
+
+        Usage: w(here) [first[-last]]
+
+        An arrow indicates the current frame. Repeated frames, as in
+        recursion, are collapsed and the middle of very deep stacks is hidden.
+        Frames are numbered from 0, the outermost one, and the collapsed or
+        hidden ones are shown in full with `where first-last`. 'bt' is an alias
+        for this command.
+        """
+        arg = arg.strip()
+        if not arg:
+            self._print_compact_stack()
+            return
+
+        first, _, last = arg.partition("-")
+        try:
+            first = int(first)
+            last = int(last) if last else first
+        except ValueError:
+            self.stdout.write(
+                "*** Expected a frame number or range, got {!r}.\n".format(arg)
+            )
+            return
+        if not 0 <= first <= last < len(self.stack):
+            self.stdout.write(
+                "*** Frames are numbered from 0 to {}.\n".format(len(self.stack) - 1)
+            )
+            return
+        for frame_lineno in self.stack[first : last + 1]:
+            self.print_stack_entry(frame_lineno)
+
+    do_w = do_where
+    do_bt = do_where
+
+    def _print_compact_stack(self):
+        keys = [(frame.f_code, lineno) for frame, lineno in self.stack]
+        # The current frame is never collapsed or hidden.
+        current = self.curindex
+        runs = collapse(keys, 0, current, self.where_max_period, self.where_min_repeats)
+        current_run = len(runs)
+        runs.append((current, 1, 1))
+        runs += collapse(
+            keys, current + 1, len(keys), self.where_max_period, self.where_min_repeats
+        )
+
+        shown = set(range(self.where_head))
+        shown.update(
+            range(len(runs) - max(self.where_limit - self.where_head, 0), len(runs))
+        )
+        shown.add(current_run)
+
+        hidden_from = None
+        for i, (start, period, repeats) in enumerate(runs):
+            if i not in shown:
+                if hidden_from is None:
+                    hidden_from = start
+                continue
+            if hidden_from is not None:
+                self.stdout.write(
+                    "  [frames {}-{} hidden, show them with `where {}-{}`]\n".format(
+                        hidden_from, start - 1, hidden_from, start - 1
+                    )
+                )
+                hidden_from = None
+            for frame_lineno in self.stack[start : start + period]:
+                self.print_stack_entry(frame_lineno)
+            if repeats > 1:
+                self.stdout.write(
+                    "  [previous {} repeated {} more times, frames {}-{}]\n".format(
+                        "frame" if period == 1 else "{} frames".format(period),
+                        repeats - 1,
+                        start + period,
+                        start + period * repeats - 1,
+                    )
+                )
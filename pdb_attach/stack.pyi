@@ -0,0 +1,16 @@
+import pdb
+from typing import Hashable, List, Tuple
+
+def collapse(
+    keys: List[Hashable], start: int, end: int, max_period: int, min_repeats: int
+) -> List[Tuple[int, int, int]]: ...
+
+class PdbStack(pdb.Pdb):
+    where_limit: int = ...
+    where_head: int = ...
+    where_max_period: int = ...
+    where_min_repeats: int = ...
+    def do_where(self, arg: str) -> None: ...
+    def do_w(self, arg: str) -> None: ...
+    def do_bt(self, arg: str) -> None: ...
+    def _print_compact_stack(self) -> None: ...
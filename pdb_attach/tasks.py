@@ -0,0 +1,271 @@
+# -*- mode: python -*-
+"""asyncio inspection commands for the debugger."""
+import pdb
+import time
+
+try:
+    import asyncio
+except ImportError:
+    # Python 2 doesn't have asyncio.
+    asyncio = None
+
+
+def _running_loop():
+    if asyncio is None:
+        return None
+    return asyncio._get_running_loop()
+
+
+def _all_tasks(loop):
+    all_tasks = getattr(asyncio, "all_tasks", None)
+    if all_tasks is None:
+        # Python 3.6, where finished tasks are included.
+        return set(task for task in asyncio.Task.all_tasks(loop) if not task.done())
+    return all_tasks(loop)
+
+
+def _current_task(loop):
+    current_task = getattr(asyncio, "current_task", None)
+    if current_task is None:
+        # Python 3.6.
+        return asyncio.Task.current_task(loop)
+    return current_task(loop)
+
+
+def _task_name(task):
+    get_name = getattr(task, "get_name", None)
+    return get_name() if get_name is not None else "Task-{:x}".format(id(task))
+
+
+def _task_state(task, loop):
+    if task.done():
+        return "cancelled" if task.cancelled() else "done"
+    if task is _current_task(loop):
+        return "running"
+    if getattr(task, "cancelling", lambda: 0)():
+        return "cancelling"
+    return "pending"
+
+
+def _format_frame(frame):
+    code = frame.f_code
+    return "{}() at {}:{}".format(code.co_name, code.co_filename, frame.f_lineno)
+
+
+def _format_callback(handle):
+    callback = handle._callback
+    owner = getattr(callback, "__self__", None)
+    if asyncio is not None and isinstance(owner, asyncio.Task):
+        return "step of {}".format(_task_name(owner))
+    return getattr(callback, "__qualname__", None) or repr(callback)
+
+
+class _SlowCallbacks(object):
+    """Time the callbacks run by a loop and collect the slow ones.
+
+    `asyncio.Handle._run`, which runs every callback of loops derived from
+    BaseEventLoop, is wrapped while recording. This costs two clock reads per
+    callback, unlike the loop's debug mode, which also checks every call made
+    from a callback and reports through the logging module. Callbacks of other
+    loops, e.g. uvloop's, are not seen.
+    """
+
+    def __init__(self, loop, duration):
+        self.loop = loop
+        self.duration = duration
+        # Callback description -> [count, total seconds, max seconds].
+        self.stats = {}
+        self._run = None
+
+    def start(self):
+        """Start timing callbacks."""
+        run = self._run = asyncio.Handle._run
+
+        def _run(handle):
+            start = time.perf_counter()
+            try:
+                return run(handle)
+            finally:
+                duration = time.perf_counter() - start
+                if duration >= self.duration and handle._loop is self.loop:
+                    self.record(_format_callback(handle), duration)
+
+        asyncio.Handle._run = _run
+
+    def stop(self):
+        """Stop timing callbacks."""
+        asyncio.Handle._run = self._run
+
+    def record(self, callback, duration):
+        """Record a callback that ran for `duration` seconds."""
+        stats = self.stats.setdefault(callback, [0, 0.0, 0.0])
+        stats[0] += 1
+        stats[1] += duration
+        stats[2] = max(stats[2], duration)
+
+
+class PdbTasks(pdb.Pdb):
+    """PdbTasks extends Pdb with commands for inspecting asyncio programs.
+
+    The commands inspect the event loop running in the debugged thread. They
+    only read the tasks' state, so they are safe to use without stepping.
+    """
+
+    # Number of slow callbacks shown by the loop command.
+    slow_callbacks_limit = 10
+
+    _task_list = None
+    _thread_stack = None
+    _slow_callbacks = None
+
+    def _loop_or_error(self):
+        loop = _running_loop()
+        if loop is None:
+            self.stdout.write("*** No event loop is running in this thread.\n")
+        return loop
+
+    def do_tasks(self, arg):
+        """List the tasks of the running event loop.
+
+        Usage: tasks
+
+        Each task is shown with its number, name, state and where its coroutine
+        is suspended. Select a task with `task`.
+        """
+        loop = self._loop_or_error()
+        if loop is None:
+            return
+
+        self._task_list = sorted(_all_tasks(loop), key=_task_name)
+        for i, task in enumerate(self._task_list):
+            stack = task.get_stack()
+            where = _format_frame(stack[-1]) if stack else "no frames"
+            self.stdout.write(
+                "{:>3}  {}  {}  {}\n".format(
+                    i, _task_name(task), _task_state(task, loop), where
+                )
+            )
+        if not self._task_list:
+            self.stdout.write("No tasks.\n")
+
+    def do_task(self, arg):
+        """Select the suspended frame of a task listed by `tasks`.
+
+        Usage: task [number]
+
+        The task's coroutine stack replaces the stack of the debugged thread, so
+        `where`, `up`, `down` and `p` work on the task. Without a number, the
+        stack of the debugged thread is restored.
+        """
+        arg = arg.strip()
+        if not arg:
+            if self._thread_stack is not None:
+                self._set_stack(*self._thread_stack)
+                self._thread_stack = None
+            return
+
+        try:
+            task = (self._task_list or [])[int(arg)]
+        except (ValueError, IndexError):
+            self.stdout.write(
+                "*** No task {!r}, list the tasks with `tasks`.\n".format(arg)
+            )
+            return
+
+        stack = [(frame, frame.f_lineno) for frame in task.get_stack()]
+        if not stack:
+            self.stdout.write("*** Task {} has no frames.\n".format(_task_name(task)))
+            return
+        if self._thread_stack is None:
+            self._thread_stack = (self.stack, self.curindex)
+        self._set_stack(stack, len(stack) - 1)
+
+    def forget(self):
+        """Forget the listed tasks and the selected task at every new stop."""
+        self._task_list = None
+        self._thread_stack = None
+        pdb.Pdb.forget(self)
+
+    def _set_stack(self, stack, index):
+        self.stack = stack
+        self.curindex = index
+        self.curframe = stack[index][0]
+        self.curframe_locals = self.curframe.f_locals
+        self.lineno = None
+        self.print_stack_entry(stack[index])
+
+    def do_loop(self, arg):
+        """Show the state of the running event loop.
+
+        Usage: loop [slow seconds | slow off]
+
+        `loop slow` times the callbacks the loop runs and records those that
+        run for longer than `seconds`, which are then shown by `loop`. `loop
+        slow off` stops recording. Timing adds well under a microsecond to
+        each callback, the loop's debug mode is left alone.
+        """
+        loop = self._loop_or_error()
+        if loop is None:
+            return
+
+        cmd, _, arg = arg.strip().partition(" ")
+        if cmd == "slow":
+            self._record_slow_callbacks(loop, arg.strip())
+        elif cmd:
+            self.stdout.write("*** Unknown loop command {!r}.\n".format(cmd))
+        else:
+            self._show_loop(loop)
+
+    def _record_slow_callbacks(self, loop, arg):
+        if arg == "off":
+            if self._slow_callbacks is not None:
+                self._slow_callbacks.stop()
+                self._slow_callbacks = None
+            self.stdout.write("Stopped recording slow callbacks.\n")
+            return
+
+        try:
+            duration = float(arg) if arg else loop.slow_callback_duration
+        except ValueError:
+            self.stdout.write(
+                "*** Expected a number of seconds, got {!r}.\n".format(arg)
+            )
+            return
+        if self._slow_callbacks is None or self._slow_callbacks.loop is not loop:
+            if self._slow_callbacks is not None:
+                self._slow_callbacks.stop()
+            self._slow_callbacks = _SlowCallbacks(loop, duration)
+            self._slow_callbacks.start()
+        self._slow_callbacks.duration = duration
+        self.stdout.write("Recording callbacks slower than {}s.\n".format(duration))
+
+    def _show_loop(self, loop):
+        # _ready and _scheduled are only on loops derived from BaseEventLoop.
+        ready = getattr(loop, "_ready", ())
+        scheduled = getattr(loop, "_scheduled", ())
+        self.stdout.write(
+            "{}: {} tasks, {} ready callbacks, {} timers, debug {}.\n".format(
+                type(loop).__name__,
+                len(_all_tasks(loop)),
+                len(ready),
+                len(scheduled),
+                "on" if loop.get_debug() else "off",
+            )
+        )
+        if self._slow_callbacks is None:
+            return
+
+        stats = self._slow_callbacks.stats
+        self.stdout.write(
+            "Callbacks slower than {}s:\n".format(self._slow_callbacks.duration)
+        )
+        slowest = sorted(stats, key=lambda callback: stats[callback][2], reverse=True)
+        for callback in slowest[: self.slow_callbacks_limit]:
+            count, total, longest = stats[callback]
+            self.stdout.write(
+                "{:>6}x  max {:.3f}s  total {:.3f}s  {}\n".format(
+                    count, longest, total, callback
+                )
+            )
+        if not stats:
+            self.stdout.write("None yet.\n")
@@ -0,0 +1,37 @@
+import asyncio
+import pdb
+from types import FrameType
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]: ...
+def _all_tasks(loop: asyncio.AbstractEventLoop) -> Set[asyncio.Task[Any]]: ...
+def _current_task(loop: asyncio.AbstractEventLoop) -> Optional[asyncio.Task[Any]]: ...
+def _task_name(task: asyncio.Task[Any]) -> str: ...
+def _task_state(task: asyncio.Task[Any], loop: asyncio.AbstractEventLoop) -> str: ...
+def _format_frame(frame: FrameType) -> str: ...
+def _format_callback(handle: asyncio.Handle) -> str: ...
+
+class _SlowCallbacks:
+    loop: asyncio.AbstractEventLoop = ...
+    duration: float = ...
+    stats: Dict[str, List[Any]] = ...
+    def __init__(self, loop: asyncio.AbstractEventLoop, duration: float) -> None: ...
+    def start(self) -> None: ...
+    def stop(self) -> None: ...
+    def record(self, callback: str, duration: float) -> None: ...
+
+class PdbTasks(pdb.Pdb):
+    slow_callbacks_limit: int = ...
+    _task_list: Optional[List[asyncio.Task[Any]]] = ...
+    _thread_stack: Optional[Tuple[List[Tuple[FrameType, int]], int]] = ...
+    _slow_callbacks: Optional[_SlowCallbacks] = ...
+    def _loop_or_error(self) -> Optional[asyncio.AbstractEventLoop]: ...
+    def do_tasks(self, arg: str) -> None: ...
+    def do_task(self, arg: str) -> None: ...
+    def forget(self) -> None: ...
+    def _set_stack(self, stack: List[Tuple[FrameType, int]], index: int) -> None: ...
+    def do_loop(self, arg: str) -> None: ...
+    def _record_slow_callbacks(
+        self, loop: asyncio.AbstractEventLoop, arg: str
+    ) -> None: ...
+    def _show_loop(self, loop: asyncio.AbstractEventLoop) -> None: ...
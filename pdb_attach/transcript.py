@@ -0,0 +1,100 @@
+# -*- mode: python -*-
+"""Recording of the frames exchanged by the debugger and the client.
+
+A transcript is a sequence of records, each made of a header and the frame as
+it was sent over the socket::
+
+    <microseconds since the session started>|<direction>|<size>|<code>|<payload>
+
+The direction is "<" for frames the recording side received, ">" for frames it
+sent, and "=" for the record starting a session. Frames keep their own length
+prefix, so payloads can contain anything.
+
+The client imports the transport, which imports this module, so it must not
+import `pdb`.
+"""
+import collections
+import threading
+import time
+
+RECEIVED = "<"
+SENT = ">"
+SESSION = "="
+
+Record = collections.namedtuple("Record", ["offset", "direction", "code", "payload"])
+
+
+class TranscriptWriter(object):
+    """Append the frames of one session to a transcript file.
+
+    Parameters
+    ----------
+    f
+        File opened in binary mode to append records to.
+    """
+
+    def __init__(self, f):
+        self._f = f
+        self._lock = threading.Lock()
+        self._start = time.time()
+        self.write(SESSION, b"0|0|")
+
+    def write(self, direction, data):
+        """Record the frame `data` sent or received by the wrapper."""
+        offset = int((time.time() - self._start) * 1e6)
+        header = "{}|{}|".format(offset, direction).encode("ascii")
+        # A wrapper may be used from more than one thread.
+        with self._lock:
+            self._f.write(header + data)
+
+    def close(self):
+        """Flush and close the transcript file."""
+        with self._lock:
+            self._f.close()
+
+
+def _read_field(f):
+    """Read bytes up to the next "|", or return None at the end of the file."""
+    field = b""
+    while True:
+        c = f.read(1)
+        if not c:
+            if field:
+                raise ValueError("Transcript ends in the middle of a record.")
+            return None
+        if c == b"|":
+            return field.decode("ascii")
+        field += c
+
+
+def read_transcript(f):
+    """Yield the records of the transcript in the binary file `f`.
+
+    Yields
+    ------
+    Record
+        With the offset in seconds since the session started, the direction,
+        the frame code and the decoded payload.
+    """
+    while True:
+        offset = _read_field(f)
+        if offset is None:
+            return
+        direction = _read_field(f)
+        size = int(_read_field(f))
+        code = int(_read_field(f))
+        payload = f.read(size)
+        if len(payload) < size:
+            raise ValueError("Transcript ends in the middle of a record.")
+        yield Record(int(offset) / 1e6, direction, code, payload.decode("utf-8"))
+
+
+def read_sessions(f):
+    """Return the records of `f` split into one list per session."""
+    sessions = []
+    for record in read_transcript(f):
+        if record.direction == SESSION:
+            sessions.append([])
+        elif sessions:
+            sessions[-1].append(record)
+    return sessions
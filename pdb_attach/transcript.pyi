@@ -0,0 +1,19 @@
+from typing import BinaryIO, Iterator, List, NamedTuple
+
+RECEIVED: str
+SENT: str
+SESSION: str
+
+class Record(NamedTuple):
+    offset: float
+    direction: str
+    code: int
+    payload: str
+
+class TranscriptWriter:
+    def __init__(self, f: BinaryIO) -> None: ...
+    def write(self, direction: str, data: bytes) -> None: ...
+    def close(self) -> None: ...
+
+def read_transcript(f: BinaryIO) -> Iterator[Record]: ...
+def read_sessions(f: BinaryIO) -> List[List[Record]]: ...
@@ -0,0 +1,1061 @@
+# -*- mode: python -*-
+"""Framing for the messages sent between the debugger and the client.
+
+The client imports this module, so it must not import `pdb`.
+"""
+import collections
+import contextlib
+import errno
+import io
+import mmap
+import os
+import select
+import socket
+import struct
+import sys
+import time
+
+from pdb_attach.transcript import RECEIVED, SENT
+
+if sys.version_info[0] >= 3 and sys.version_info[1] >= 3:
+    SocketError = OSError
+else:
+    SocketError = socket.error
+
+
+def _set_nodelay(sock):
+    """Send small frames right away instead of waiting to batch them.
+
+    A command and its output are several small frames, so with Nagle's algorithm
+    every command waits for a delayed ACK.
+    """
+    try:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    except (SocketError, AttributeError):
+        # Not a TCP socket.
+        pass
+
+
+class SessionTimeout(Exception):
+    """The client was idle for too long or did not come back after disconnecting."""
+
+
+@contextlib.contextmanager
+def _unguarded():
+    yield
+
+
+def _wait_readable(sock, timeout):
+    """Return whether `sock` becomes readable within `timeout` seconds.
+
+    select() only takes file descriptors below 1024, which busy programs run
+    out of, so poll() is used where there is one.
+    """
+    if not hasattr(select, "poll"):
+        readable, _, _ = select.select([sock], [], [], timeout)
+        return bool(readable)
+    poller = select.poll()
+    poller.register(sock, select.POLLIN)
+    # Round up, a timeout below a millisecond would never wait.
+    return bool(poller.poll(int(timeout * 1000 + 0.999)))
+
+
+class _PdbStr(str):
+    """Special string that indicates if it is a prompt."""
+
+    def __new__(cls, value, prompt=False):
+        self = str.__new__(cls, value)
+        self._is_prompt = prompt
+        return self
+
+    @property
+    def is_prompt(self):
+        return self._is_prompt
+
+
+class _PdbBuffer(object):
+    """Text buffer made up of the chunks that were appended to it.
+
+    Appending is O(1), searching for a separator only looks at text that wasn't
+    searched before, and taking text off the front doesn't copy what remains.
+    This keeps reading large inputs line by line linear in their size.
+    """
+
+    def __init__(self):
+        self._chunks = collections.deque()
+        # Positions are counted from the first character ever appended, so they
+        # stay valid as chunks are taken off the front.
+        self._front = 0  # Position of the start of the first chunk.
+        self._head = 0  # Offset of the first unread character in the first chunk.
+        self._len = 0
+        # A separator can't start before the scan position. It is kept as a chunk
+        # index, an offset into that chunk, and the position of that chunk.
+        self._scan_index = 0
+        self._scan_offset = 0
+        self._scan_base = 0
+
+    def __len__(self):
+        return self._len
+
+    def append(self, text):
+        """Add `text` to the end of the buffer."""
+        if len(text) > 0:
+            self._chunks.append(text)
+            self._len += len(text)
+
+    def _peek(self, index, size):
+        """Return up to `size` characters from the start of chunk `index` on."""
+        parts = []
+        while size > 0 and index < len(self._chunks):
+            parts.append(self._chunks[index][:size])
+            size -= len(parts[-1])
+            index += 1
+        return "".join(parts)
+
+    def find(self, sep):
+        """Return the number of characters up to and including the first `sep`.
+
+        Returns
+        -------
+        int : -1 if `sep` is not in the buffer.
+        """
+        start = self._front + self._head
+        while self._scan_index < len(self._chunks):
+            chunk = self._chunks[self._scan_index]
+            idx = chunk.find(sep, self._scan_offset)
+            if idx >= 0:
+                return self._scan_base + idx + len(sep) - start
+
+            # The separator may straddle this chunk and the next ones.
+            tail = max(len(chunk) - len(sep) + 1, self._scan_offset)
+            if self._scan_index + 1 == len(self._chunks):
+                self._scan_offset = tail
+                return -1
+            if len(sep) > 1:
+                following = self._peek(self._scan_index + 1, len(sep) - 1)
+                idx = (chunk[tail:] + following).find(sep)
+                if idx >= 0:
+                    return self._scan_base + tail + idx + len(sep) - start
+                if len(following) < len(sep) - 1:
+                    # Too little was appended since to rule out a separator
+                    # starting in this chunk.
+                    self._scan_offset = tail
+                    return -1
+
+            self._scan_base += len(chunk)
+            self._scan_index += 1
+            self._scan_offset = 0
+        return -1
+
+    def take(self, size):
+        """Remove and return up to `size` characters from the front."""
+        parts = []
+        size = min(size, self._len)
+        self._len -= size
+        while size > 0:
+            chunk, head = self._chunks[0], self._head
+            end = head + size
+            if end < len(chunk):
+                parts.append(chunk[head:end])
+                self._head = end
+                break
+
+            parts.append(chunk[head:] if head > 0 else chunk)
+            size -= len(chunk) - head
+            self._chunks.popleft()
+            self._front += len(chunk)
+            self._head = 0
+            self._scan_index -= 1
+
+        if (
+            self._scan_index < 0
+            or self._scan_base + self._scan_offset < self._front + self._head
+        ):
+            # Everything that was scanned has been taken.
+            self._scan_index = 0
+            self._scan_base = self._front
+            self._scan_offset = self._head
+        return "".join(parts)
+
+    def take_all(self):
+        """Remove and return everything in the buffer."""
+        return self.take(self._len)
+
+
+class _PdbObserver(object):
+    """Read-only peer that receives a mirrored copy of the session output.
+
+    Output is queued in a bounded buffer and flushed without blocking, so a slow
+    observer can never stall the debugger.
+    """
+
+    def __init__(self, sock, max_buffer):
+        sock.setblocking(False)
+        self._sock = sock
+        self._pending = bytearray()
+        self._max_buffer = max_buffer
+
+    def send(self, data):
+        """Queue `data` and send as much of the queue as the socket accepts.
+
+        Returns
+        -------
+        bool : False if the observer is gone or fell too far behind.
+        """
+        self._pending += data
+        try:
+            sent = self._sock.send(self._pending)
+        except SocketError as e:
+            if e.errno not in (errno.EAGAIN, errno.EWOULDBLOCK):
+                return False
+            sent = 0
+
+        del self._pending[:sent]
+        return len(self._pending) <= self._max_buffer
+
+    def close(self):
+        """Close connection to the observer."""
+        self._sock.close()
+
+
+class _Waiter(object):
+    """Back off while the other side of a shared ring makes progress."""
+
+    def __init__(self, timeout):
+        self.timeout = timeout
+        self.reset()
+
+    def reset(self):
+        """Note that progress was made."""
+        self._spins = 0
+        self._since = None
+
+    def wait(self):
+        """Wait a little, returning False if nothing happened for `timeout`."""
+        if self._since is None:
+            self._since = time.time()
+        elif time.time() - self._since > self.timeout:
+            return False
+        self._spins += 1
+        # Yield first, the other side is usually busy copying.
+        time.sleep(0 if self._spins < 100 else 0.0002)
+        return True
+
+
+class _SharedRing(object):
+    """Ring buffer in memory mapped by the debugger and the client.
+
+    The server writes bulk output into the ring and the client reads it, each
+    side advancing a byte counter in the header that the other polls. Data is
+    copied in and out through memoryviews of the map, with no other copy.
+
+    Parameters
+    ----------
+    fd : int
+        File descriptor of the file backing the ring.
+    capacity : int
+        Size of the data area in bytes.
+    """
+
+    # Header: bytes written so far, bytes read so far, then padding so the
+    # counters don't share a cache line with the data.
+    _COUNTER = struct.Struct("=Q")
+    _WRITTEN = 0
+    _READ = 8
+    _DATA = 64
+
+    def __init__(self, fd, capacity):
+        self.capacity = capacity
+        self._map = mmap.mmap(fd, self._DATA + capacity)
+        self._data = memoryview(self._map)[self._DATA :]
+        self._position = 0
+
+    @classmethod
+    def create(cls, capacity):
+        """Create a ring in a new file, shared memory if the system has it.
+
+        Returns
+        -------
+        (_SharedRing, str) : The ring and the path of its file, which the other
+            side opens with `open`.
+        """
+        # Only the client with shared memory enabled needs tempfile.
+        import tempfile
+
+        directory = "/dev/shm" if os.path.isdir("/dev/shm") else None
+        fd, path = tempfile.mkstemp(prefix="pdb-attach-", dir=directory)
+        try:
+            os.ftruncate(fd, cls._DATA + capacity)
+            return cls(fd, capacity), path
+        except BaseException:
+            os.unlink(path)
+            raise
+        finally:
+            os.close(fd)
+
+    @classmethod
+    def attach(cls, path, capacity):
+        """Map the ring created by the other side in the file at `path`."""
+        fd = os.open(path, os.O_RDWR)
+        try:
+            if os.fstat(fd).st_size != cls._DATA + capacity:
+                raise ValueError("{} is not a ring of {} bytes".format(path, capacity))
+            return cls(fd, capacity)
+        finally:
+            os.close(fd)
+
+    def _load(self, offset):
+        return self._COUNTER.unpack_from(self._map, offset)[0]
+
+    def _store(self, offset, value):
+        self._COUNTER.pack_into(self._map, offset, value)
+
+    def write(self, payload, timeout):
+        """Copy the bytes-like `payload` into the ring as the reader makes room.
+
+        Returns
+        -------
+        bool : False if the reader stopped reading for `timeout` seconds.
+        """
+        payload = memoryview(payload)
+        waiter = _Waiter(timeout)
+        done = 0
+        while done < len(payload):
+            free = self.capacity - (self._position - self._load(self._READ))
+            if free == 0:
+                if not waiter.wait():
+                    return False
+                continue
+            waiter.reset()
+            start = self._position % self.capacity
+            size = min(free, self.capacity - start, len(payload) - done)
+            self._data[start : start + size] = payload[done : done + size]
+            done += size
+            self._position += size
+            self._store(self._WRITTEN, self._position)
+        return True
+
+    def read_into(self, buf, timeout):
+        """Fill the writable bytes-like `buf` from the ring as the writer fills it.
+
+        Returns
+        -------
+        bool : False if the writer stopped writing for `timeout` seconds.
+        """
+        buf = memoryview(buf)
+        waiter = _Waiter(timeout)
+        done = 0
+        while done < len(buf):
+            available = self._load(self._WRITTEN) - self._position
+            if available == 0:
+                if not waiter.wait():
+                    return False
+                continue
+            waiter.reset()
+            start = self._position % self.capacity
+            size = min(available, self.capacity - start, len(buf) - done)
+            buf[done : done + size] = self._data[start : start + size]
+            done += size
+            self._position += size
+            self._store(self._READ, self._position)
+        return True
+
+    def close(self):
+        """Unmap the ring."""
+        self._data.release()
+        self._map.close()
+
+
+class PdbIOWrapper(io.TextIOBase):
+    """Wrapper for socket IO.
+
+    Allows for smoother IPC. Data sent over socket is formatted `<msg_size>|<code>|<msg_text>`.
+    """
+
+    def __init__(self, sock):
+        self._buffer = self._new_buffer()
+        self._sock = sock
+        _set_nodelay(sock)
+        self._observers = []
+
+        # Session resumption. Output frames are numbered implicitly by both
+        # sides, so a resuming client only has to say how many it has seen.
+        self.session_token = None
+        self.session_ended = False
+        self.frames_received = 0
+        self._frames_sent = 0
+        self._replay = None
+        self._reconnect = None
+
+        # Heartbeats and idle timeout, only used by the server.
+        self._heartbeat_interval = None
+        self._idle_timeout = None
+        self._idle_warning = None
+        self._last_input = None
+        self._warned = False
+
+        # Scripts uploaded by the client by name, only used by the server.
+        self.scripts = {}
+
+        # Ring carrying bulk output from the server when both sides share
+        # memory. The client keeps its ring pending until the server accepts.
+        self._ring = None
+        self._pending_ring = None
+        self._ring_path = None
+
+        self._transcript = None
+
+        # Context manager held around every frame sent, see `guard_writes`.
+        self._write_guard = _unguarded
+
+    _CLOSED = -1
+    _TEXT = 0
+    _PROMPT = 1
+    _EOFERROR = 2
+    _OBSERVE = 3
+    _SESSION = 4
+    _RESUME = 5
+    _END = 6
+    _HEARTBEAT = 7
+    _WARNING = 8
+    _SCRIPT = 9
+    _CANCEL = 10
+    _SHM = 11
+    _BULK = 12
+
+    # Output frames of at least this many bytes go through the shared ring.
+    bulk_threshold = 1 << 16
+
+    # Seconds either side of the shared ring waits for the other to move.
+    bulk_timeout = 10.0
+
+    @property
+    def encoding(self):
+        """Return the name of the stream encoding."""
+        return sys.getdefaultencoding()
+
+    @property
+    def errors(self):
+        """Return the error setting."""
+        return "strict"
+
+    def _format_msg(self, msg, code):
+        # The size is in bytes, so the reader knows exactly how much to receive.
+        data = msg.encode(self.encoding, self.errors)
+        return (
+            "{}|{}|".format(len(data), code).encode(self.encoding, self.errors) + data
+        )
+
+    def _new_buffer(self):
+        return _PdbBuffer()
+
+    def _recv_exact(self, size):
+        """Receive `size` bytes, or fewer if the connection closes first."""
+        chunks = []
+        while size > 0:
+            try:
+                chunk = self._sock.recv(min(size, 1 << 16))
+            except SocketError:
+                chunk = b""
+            if len(chunk) == 0:
+                break
+            chunks.append(chunk)
+            size -= len(chunk)
+        return b"".join(chunks)
+
+    def _wait_for_input(self):
+        """Wait for the client to send something, sending heartbeats meanwhile.
+
+        Raises
+        ------
+        SessionTimeout
+            If the idle timeout expires first.
+        """
+        while True:
+            now = time.time()
+            timeout = self._heartbeat_interval
+            if self._idle_timeout is not None:
+                deadline = self._last_input + self._idle_timeout
+                if now >= deadline:
+                    raise SessionTimeout("the session was idle for too long")
+
+                warn_at = deadline - self._idle_warning
+                if not self._warned and now >= warn_at:
+                    self._warned = True
+                    self._send_code(
+                        self._WARNING,
+                        "*** Idle for too long, detaching in {:.0f} seconds{}".format(
+                            deadline - now, os.linesep
+                        ),
+                    )
+                elif not self._warned:
+                    timeout = min(timeout, warn_at - now)
+                timeout = min(timeout, deadline - now)
+
+            if _wait_readable(self._sock, max(timeout, 0)) or not self._send_code(
+                self._HEARTBEAT
+            ):
+                # Either there is input, or the connection is broken and the
+                # read will find out.
+                return
+
+    def _read_frame(self):
+        if self._heartbeat_interval is not None:
+            self._wait_for_input()
+
+        msg_data = ""
+        while msg_data.count("|") < 2:
+            try:
+                c = self._sock.recv(1)
+            except SocketError:
+                c = b""
+            if len(c) == 0:
+                return _PdbStr(""), self._CLOSED
+
+            msg_data += c.decode(self.encoding, self.errors)
+
+        msg_data_items = msg_data.split("|")
+        msg_size = int(msg_data_items[0])
+        code = int(msg_data_items[1])
+        if code == self._EOFERROR:
+            self._record(RECEIVED, msg_data.encode(self.encoding, self.errors))
+            raise EOFError
+
+        data = self._recv_exact(msg_size)
+        if len(data) < msg_size:
+            return _PdbStr(""), self._CLOSED
+        self._record(RECEIVED, msg_data.encode(self.encoding, self.errors) + data)
+        msg = data.decode(self.encoding, self.errors)
+        return (_PdbStr(msg, prompt=(code == self._PROMPT)), code)
+
+    def _read(self):
+        """Read from the socket.
+
+        Session control frames are handled here and never returned.
+
+        Returns
+        -------
+        (_PdbStr, code)
+        """
+        while True:
+            try:
+                msg, code = self._read_frame()
+            except EOFError:
+                self._touch()
+                raise
+            except SessionTimeout:
+                raise
+            except Exception as e:
+                # End the session, the program must never see the failure.
+                raise SessionTimeout("reading from the client failed: {!r}".format(e))
+
+            if code == self._CLOSED and self._reconnect is not None:
+                if not self._resume_session():
+                    raise SessionTimeout("the connection to the client was lost")
+                self._touch()
+                continue
+
+            rv = self._handle_frame(msg, code)
+            if rv is not None:
+                return rv
+
+    def _handle_frame(self, msg, code):
+        """Act on control frames.
+
+        Returns
+        -------
+        (_PdbStr, code) or None if the frame was a control frame that should
+        not be returned to the reader.
+        """
+        if self._handle_control(msg, code):
+            return None
+        elif code == self._END:
+            self.session_ended = True
+            return _PdbStr(""), self._CLOSED
+        elif code == self._WARNING:
+            return msg, self._TEXT
+        elif code == self._BULK:
+            msg, code = self._read_bulk(msg)
+            if code == self._CLOSED:
+                return msg, code
+
+        if code in (self._TEXT, self._PROMPT):
+            self.frames_received += 1
+
+        if code == self._TEXT:
+            self._touch()
+            if self._observers:
+                # Let observers see what the driver typed.
+                self._mirror(self._format_msg(msg, self._TEXT))
+        return msg, code
+
+    def _handle_control(self, msg, code):
+        """Act on the control frames that are never returned to the reader.
+
+        Returns
+        -------
+        bool : True if the frame was one of them.
+        """
+        if code == self._SESSION:
+            self.session_token = str(msg)
+        elif code == self._SCRIPT:
+            name, _, source = msg.partition("\n")
+            self.scripts[name] = source
+        elif code == self._SHM:
+            self._share_memory(msg)
+        else:
+            return code == self._HEARTBEAT
+        return True
+
+    def request_shared_memory(self, capacity):
+        """Offer the server a ring in shared memory to send bulk output through.
+
+        Only the client calls this. The server maps the ring if it can, the
+        same host and user, and answers. Until then, and if it can't, output
+        keeps coming over the socket.
+
+        Parameters
+        ----------
+        capacity : int
+            Size of the ring in bytes.
+
+        Returns
+        -------
+        bool : True if send was successful.
+        """
+        self._pending_ring, path = _SharedRing.create(capacity)
+        self._ring_path = path
+        return self._send_code(self._SHM, "{}|{}".format(capacity, path))
+
+    def _share_memory(self, msg):
+        if self._pending_ring is not None:
+            # The server answered, its mapping keeps the memory alive.
+            os.unlink(self._ring_path)
+            if msg == "1":
+                self._ring = self._pending_ring
+            else:
+                self._pending_ring.close()
+            self._pending_ring = None
+            return
+
+        capacity, _, path = msg.partition("|")
+        try:
+            self._ring = _SharedRing.attach(path, int(capacity))
+        except (EnvironmentError, ValueError):
+            self._send_code(self._SHM, "0")
+        else:
+            self._send_code(self._SHM, "1")
+
+    def _drop_ring(self):
+        for ring in (self._ring, self._pending_ring):
+            if ring is not None:
+                ring.close()
+        if self._pending_ring is not None:
+            os.unlink(self._ring_path)
+        self._ring = self._pending_ring = None
+
+    def _read_bulk(self, msg):
+        """Read the output announced by a bulk frame from the ring."""
+        code, _, size = msg.partition("|")
+        code = int(code)
+        data = bytearray(int(size))
+        if self._ring is None or not self._ring.read_into(data, self.bulk_timeout):
+            self._drop_ring()
+            return _PdbStr(""), self._CLOSED
+        msg = data.decode(self.encoding, self.errors)
+        # A _PdbStr would copy the output again, prompts are small.
+        return (_PdbStr(msg, prompt=True) if code == self._PROMPT else msg), code
+
+    def _send_bulk(self, code, payload):
+        """Announce `payload` with a bulk frame and send it through the ring."""
+        header = self._format_msg("{}|{}".format(code, len(payload)), self._BULK)
+        self._sock.sendall(header)
+        if not self._ring.write(payload, self.bulk_timeout):
+            # The client is gone or stuck, the ring can't be trusted anymore.
+            self._drop_ring()
+            raise SocketError(errno.EPIPE, "The client stopped reading shared memory.")
+
+    def _touch(self):
+        self._last_input = time.time()
+        self._warned = False
+
+    def poll(self, timeout=0):
+        """Read output the server sent unprompted, such as idle warnings.
+
+        Parameters
+        ----------
+        timeout : float
+            Seconds to wait for output.
+
+        Returns
+        -------
+        (str, bool) : A tuple containing the str output from the connection and
+            a bool indicating if the connection is closed.
+        """
+        if not _wait_readable(self._sock, timeout):
+            return "", False
+
+        rv = self._handle_frame(*self._read_frame())
+        if rv is None:
+            return "", False
+        msg, code = rv
+        return msg, code == self._CLOSED
+
+    def _read_eof(self):
+        while True:
+            msg, code = self._read()
+            self._buffer.append(msg)
+            if code == self._CLOSED:
+                break
+
+    def read(self, size=-1):
+        """Read `size` characters or until EOF is reached.
+
+        Parameters
+        ----------
+        size : int
+            The number of characters to return. If negative, reads until EOF.
+
+        Returns
+        -------
+        str
+        """
+        if size is None or size < 0:
+            self._read_eof()
+            return self._buffer.take_all()
+
+        while len(self._buffer) < size:
+            msg, code = self._read()
+            self._buffer.append(msg)
+            if code == self._CLOSED:
+                size = min(len(self._buffer), size)
+
+        return self._buffer.take(size)
+
+    def readline(self, size=-1):
+        """Read a string until a newline or EOF is reached.
+
+        Parameters
+        ----------
+        size : int
+            The number of characters to read. If `size` characters are read before
+            a newline is seen, then `size` characters are returned.
+
+        Returns
+        -------
+        str
+        """
+        idx = self._buffer.find(os.linesep)
+        while idx < 0:
+            if size >= 0 and len(self._buffer) >= size:
+                break
+
+            msg, code = self._read()
+            self._buffer.append(msg)
+
+            if code == self._CLOSED:
+                break
+            idx = self._buffer.find(os.linesep)
+
+        if idx < 0:
+            idx = len(self._buffer)
+        if size >= 0:
+            idx = min(size, idx)
+
+        return self._buffer.take(idx)
+
+    def read_prompt(self):
+        """Read everything until a prompt is received and return it.
+
+        Returns
+        -------
+        (str, bool) : A tuple containing the str output from the connection and
+            a bool indicating if the connection is closed.
+        """
+        while True:
+            msg, code = self._read()
+            self._buffer.append(msg)
+            if code in (self._CLOSED, self._PROMPT):
+                break
+
+        return self._buffer.take_all(), code == self._CLOSED
+
+    def record(self, transcript):
+        """Record every frame sent and received from now on.
+
+        Parameters
+        ----------
+        transcript : TranscriptWriter
+            Where to record the frames, `None` stops recording.
+        """
+        self._transcript = transcript
+
+    def _record(self, direction, data):
+        if self._transcript is not None:
+            self._transcript.write(direction, data)
+
+    def guard_writes(self, guard):
+        """Send every frame while holding the context manager `guard()` returns.
+
+        The server uses this to keep an asynchronous exception from cutting a
+        frame short, which would leave the client unable to read the rest.
+        """
+        self._write_guard = guard
+
+    def _send_code(self, code, msg=""):
+        data = self._format_msg(msg, code)
+        self._record(SENT, data)
+        try:
+            with self._write_guard():
+                self._sock.sendall(data)
+        except SocketError:
+            return False
+        else:
+            return True
+
+    def raise_eoferror(self):
+        """Send `EOFError` code through socket.
+
+        Returns
+        -------
+        bool : True if send was successful.
+        """
+        return self._send_code(self._EOFERROR)
+
+    def request_observe(self):
+        """Ask the server to treat this connection as a read-only observer.
+
+        Returns
+        -------
+        bool : True if send was successful.
+        """
+        return self._send_code(self._OBSERVE)
+
+    def request_cancel(self, token):
+        """Ask the server to cancel the command running in the session `token`.
+
+        This is sent over a connection of its own, since the server doesn't
+        read from the session's connection while it runs a command.
+
+        Returns
+        -------
+        bool : True if send was successful.
+        """
+        return self._send_code(self._CANCEL, token)
+
+    def upload_script(self, name, source):
+        """Send a script for the server to run with the `runscript` command.
+
+        Parameters
+        ----------
+        name : str
+            Name the script is run under, it must not contain a newline.
+        source : str
+            Source code of the script.
+
+        Returns
+        -------
+        bool : True if send was successful.
+        """
+        return self._send_code(self._SCRIPT, "{}\n{}".format(name, source))
+
+    def enable_resume(self, token, max_frames, reconnect):
+        """Allow the client to resume the session after losing the connection.
+
+        The session token is sent to the client and the last `max_frames` output
+        frames are kept, so they can be replayed to a resuming client.
+
+        Parameters
+        ----------
+        token : str
+            Secret the client must present to resume the session.
+        max_frames : int
+            Number of output frames to keep for replay.
+        reconnect : callable
+            Called when the connection is lost. Returns a tuple of the new
+            socket and the number of output frames the client has seen, or
+            `None` if the client did not come back.
+        """
+        self.session_token = token
+        self._replay = collections.deque(maxlen=max_frames)
+        self._reconnect = reconnect
+        self._send_code(self._SESSION, token)
+
+    def _resume_session(self):
+        resumed = self._reconnect()
+        if resumed is None:
+            return False
+
+        sock, frames_seen = resumed
+        # Output may have been cut off halfway through the ring.
+        self._drop_ring()
+        self._sock.close()
+        self._sock = sock
+        _set_nodelay(sock)
+        replay = list(self._replay)
+        # Frames older than the ones kept can't be replayed, say so.
+        oldest = replay[0][0] if replay else self._frames_sent + 1
+        lost = oldest - 1 - frames_seen
+        try:
+            if lost > 0:
+                self._sock.sendall(
+                    self._format_msg(
+                        "*** Lost {} frame{} of output, only the last {} are kept.\n".format(
+                            lost, "" if lost == 1 else "s", self._replay.maxlen
+                        ),
+                        self._WARNING,
+                    )
+                )
+            for seq, header, payload in replay:
+                if seq > frames_seen:
+                    self._sock.sendall(header)
+                    self._sock.sendall(payload)
+        except SocketError:
+            # Lost again, the next read notices and waits for the client.
+            pass
+        return True
+
+    def enable_heartbeat(self, interval, idle_timeout=None, idle_warning=0):
+        """Send heartbeats while waiting for input and time out idle clients.
+
+        Parameters
+        ----------
+        interval : float
+            Seconds between heartbeats.
+        idle_timeout : float
+            Seconds without input from the client before reads raise
+            `SessionTimeout`. `None` means wait forever.
+        idle_warning : float
+            Seconds before the idle timeout expires to warn the client.
+        """
+        self._heartbeat_interval = interval
+        self._idle_timeout = idle_timeout
+        self._idle_warning = idle_warning
+        self._touch()
+
+    def resume(self, sock, timeout=None):
+        """Resume the session over the new connection `sock`.
+
+        Parameters
+        ----------
+        sock : socket.socket
+            New connection to the server.
+        timeout : float
+            Seconds to wait for the server to confirm the session was resumed.
+
+        Returns
+        -------
+        bool : True if the server resumed the session.
+        """
+        if self._sock is not None:
+            self._sock.close()
+        self._sock = sock
+        _set_nodelay(sock)
+        self._drop_ring()
+        msg = "{}:{}".format(self.session_token, self.frames_received)
+        if not self._send_code(self._RESUME, msg):
+            return False
+
+        sock.settimeout(timeout)
+        try:
+            _, code = self._read_frame()
+        except (EOFError, SocketError, ValueError):
+            code = self._CLOSED
+        sock.settimeout(None)
+        return code == self._SESSION
+
+    def end_session(self):
+        """Tell the client the session ended and must not be resumed.
+
+        Returns
+        -------
+        bool : True if send was successful.
+        """
+        return self._send_code(self._END)
+
+    def add_observer(self, sock, max_buffer):
+        """Mirror everything written to this wrapper to `sock`.
+
+        Parameters
+        ----------
+        sock : socket.socket
+            Connection to the observer.
+        max_buffer : int
+            Number of unsent bytes the observer may lag behind before it is
+            dropped.
+        """
+        self._observers.append(_PdbObserver(sock, max_buffer))
+
+    def _mirror(self, data):
+        # Iterate over a copy, observers can be added from another thread.
+        for observer in list(self._observers):
+            if not observer.send(data):
+                self._observers.remove(observer)
+                observer.close()
+
+    def write(self, msg):
+        """Write `msg` to the socket and return the number of bytes sent.
+
+        Parameters
+        ----------
+        msg : str
+            A string to send through the socket.
+
+        Returns
+        -------
+        int : The number of bytes written to the socket.
+        """
+        # Large output is never copied whole after encoding: not into a
+        # _PdbStr, and not to prepend the header.
+        code = self._PROMPT if getattr(msg, "is_prompt", False) else self._TEXT
+        payload = msg.encode(self.encoding, self.errors)
+        header = "{}|{}|".format(len(payload), code).encode(self.encoding, self.errors)
+        with self._write_guard():
+            if not self._send_frame(code, header, payload):
+                return 0
+        # Offset num bytes written by the additional characters in the formatted
+        # message.
+        return len(msg)
+
+    def _send_frame(self, code, header, payload):
+        """Send an output frame, numbered for replay, and return whether it was sent."""
+        if self._replay is not None:
+            self._frames_sent += 1
+            self._replay.append((self._frames_sent, header, payload))
+        if self._transcript is not None:
+            self._record(SENT, header + payload)
+        try:
+            if len(payload) < self.bulk_threshold:
+                self._sock.sendall(header + payload)
+            elif self._ring is not None:
+                self._send_bulk(code, payload)
+            else:
+                self._sock.sendall(header)
+                self._sock.sendall(payload)
+        except SocketError:
+            return False
+
+        if self._observers:
+            self._mirror(header + payload)
+        return True
+
+    def detach(self):
+        """Separate the underlying socket from the wrapper and return it.
+
+        After the socket has been detached, the wrapper is unusable.
+
+        Returns
+        -------
+        socket.socket
+        """
+        sock, self._sock = self._sock, None
+        return sock
+
+    def close(self):
+        """Close connection to client and observers."""
+        for observer in self._observers:
+            observer.close()
+        self._observers = []
+        self._drop_ring()
+        if self._sock is not None:
+            self._sock.close()
@@ -0,0 +1,71 @@
+import io
+import socket
+from pdb_attach.transcript import TranscriptWriter
+from typing import Any, AnyStr, Callable, ContextManager, Dict, Optional, Tuple, Type
+
+SocketError: Type[OSError]
+
+class SessionTimeout(Exception): ...
+
+def _unguarded() -> ContextManager[None]: ...
+def _wait_readable(sock: socket.socket, timeout: float) -> bool: ...
+
+class PdbStr(str):
+    def __new__(cls, value: str, prompt: bool = False) -> PdbStr: ...
+    is_prompt: bool = ...
+
+class _Waiter:
+    timeout: float = ...
+    def __init__(self, timeout: float) -> None: ...
+    def reset(self) -> None: ...
+    def wait(self) -> bool: ...
+
+class _SharedRing:
+    capacity: int = ...
+    def __init__(self, fd: int, capacity: int) -> None: ...
+    @classmethod
+    def create(cls, capacity: int) -> Tuple[_SharedRing, str]: ...
+    @classmethod
+    def attach(cls, path: str, capacity: int) -> _SharedRing: ...
+    def write(self, payload: Any, timeout: float) -> bool: ...
+    def read_into(self, buf: Any, timeout: float) -> bool: ...
+    def close(self) -> None: ...
+
+class PdbIOWrapper(io.TextIOBase):
+    bulk_threshold: int = ...
+    bulk_timeout: float = ...
+    session_token: Optional[str] = ...
+    session_ended: bool = ...
+    frames_received: int = ...
+    scripts: Dict[str, str] = ...
+    def __init__(self, sock: socket.socket) -> None: ...
+    def detach(self) -> socket.socket: ...  # type: ignore[override]
+    def read(self, size: Optional[int] = -1) -> AnyStr: ...
+    def readline(self, size: Optional[int] = -1) -> AnyStr: ...
+    def read_prompt(self) -> Tuple[AnyStr, bool]: ...
+    def raise_eoferror(self) -> bool: ...
+    def request_observe(self) -> bool: ...
+    def record(self, transcript: Optional[TranscriptWriter]) -> None: ...
+    def request_cancel(self, token: str) -> bool: ...
+    def request_shared_memory(self, capacity: int) -> bool: ...
+    def upload_script(self, name: str, source: str) -> bool: ...
+    def enable_resume(
+        self,
+        token: str,
+        max_frames: int,
+        reconnect: Callable[[], Optional[Tuple[socket.socket, int]]],
+    ) -> None: ...
+    def resume(self, sock: socket.socket, timeout: Optional[float] = ...) -> bool: ...
+    def end_session(self) -> bool: ...
+    def enable_heartbeat(
+        self,
+        interval: float,
+        idle_timeout: Optional[float] = ...,
+        idle_warning: float = ...,
+    ) -> None: ...
+    def poll(self, timeout: float = ...) -> Tuple[str, bool]: ...
+    def add_observer(self, sock: socket.socket, max_buffer: int) -> None: ...
+    def guard_writes(self, guard: Callable[[], ContextManager[None]]) -> None: ...
+    def write(self, msg: str) -> int: ...
+    def _send_frame(self, code: int, header: bytes, payload: bytes) -> bool: ...
+    def flush(self) -> None: ...
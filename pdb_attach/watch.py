@@ -0,0 +1,369 @@
+# -*- mode: python -*-
+"""Watchpoints on object attributes for the debugger."""
+import collections
+import pdb
+import sys
+import threading
+
+from pdb_attach.reprs import safe_repr
+
+_MISSING = object()
+
+_lock = threading.Lock()
+
+# A change to a watched attribute. `stack` is a list of (filename, lineno,
+# function) from the outermost frame to the one that made the change.
+Change = collections.namedtuple("Change", ["old", "new", "stack", "thread"])
+
+
+def _current(obj, name):
+    try:
+        return getattr(obj, name)
+    except Exception:
+        return _MISSING
+
+
+class Watchpoint(object):
+    """An attribute being watched and the last changes made to it.
+
+    Parameters
+    ----------
+    number : int
+        Number the debugger refers to the watchpoint by.
+    expr : str
+        The `obj.attr` expression the watchpoint was set on.
+    debugger : PdbWatch
+        Debugger to break into when `break_on_change` is set.
+    """
+
+    def __init__(self, number, expr, debugger):
+        self.number = number
+        self.expr = expr
+        self.break_on_change = False
+        self.count = 0
+        self.changes = collections.deque(maxlen=debugger.watch_history)
+        self._debugger = debugger
+        self._undo = None
+
+    def hit(self, old, new, frame):
+        """Record a change made by the code running in `frame`."""
+        debugger = self._debugger
+        stack = []
+        caller = frame
+        while caller is not None and len(stack) < debugger.watch_stack_limit:
+            stack.append(
+                (caller.f_code.co_filename, caller.f_lineno, caller.f_code.co_name)
+            )
+            caller = caller.f_back
+        stack.reverse()
+        self.count += 1
+        self.changes.append(
+            Change(
+                "<unset>"
+                if old is _MISSING
+                else safe_repr(old, debugger.watch_repr_limit),
+                "<deleted>"
+                if new is _MISSING
+                else safe_repr(new, debugger.watch_repr_limit),
+                stack,
+                threading.current_thread().name,
+            )
+        )
+        if self.break_on_change:
+            debugger._watch_changed(self, frame)
+
+    def remove(self):
+        """Remove the instrumentation, the attribute is no longer watched."""
+        if self._undo is not None:
+            self._undo()
+            self._undo = None
+
+
+def _watch_instance(obj, name, watchpoint):
+    """Watch `name` on `obj` alone by swapping its class for a hooked subclass.
+
+    Modules are watched the same way. Other instances of the class, and the
+    rest of the program, are left alone. Until the watchpoint is removed,
+    `type(obj)` is the subclass, so `type(obj) is cls` checks fail, and pickle
+    refuses the object because the subclass can't be found by its name.
+    `isinstance` checks keep working.
+    """
+    cls = type(obj)
+    watches = cls.__dict__.get("_pdb_attach_watches")
+    if watches is None:
+        watched_cls = cls
+        watches = {}
+        base_setattr = cls.__setattr__
+        base_delattr = cls.__delattr__
+
+        def __setattr__(self, attr, value):
+            watchpoint = watches.get(attr)
+            if watchpoint is None:
+                return base_setattr(self, attr, value)
+            old = _current(self, attr)
+            base_setattr(self, attr, value)
+            watchpoint.hit(old, value, sys._getframe(1))
+
+        def __delattr__(self, attr):
+            watchpoint = watches.get(attr)
+            if watchpoint is None:
+                return base_delattr(self, attr)
+            old = _current(self, attr)
+            base_delattr(self, attr)
+            watchpoint.hit(old, _MISSING, sys._getframe(1))
+
+        namespace = {
+            # No __dict__ or __weakref__, so the layout matches and __class__
+            # can be assigned.
+            "__slots__": (),
+            "__module__": cls.__module__,
+            "__setattr__": __setattr__,
+            "__delattr__": __delattr__,
+            "_pdb_attach_watches": watches,
+        }
+        if hasattr(cls, "__qualname__"):
+            namespace["__qualname__"] = cls.__qualname__
+        obj.__class__ = type(cls.__name__, (cls,), namespace)
+    else:
+        watched_cls = cls.__mro__[1]
+        if name in watches:
+            raise ValueError(
+                "already watched by watchpoint {}".format(watches[name].number)
+            )
+    watches[name] = watchpoint
+
+    def undo():
+        del watches[name]
+        if not watches and type(obj).__dict__.get("_pdb_attach_watches") is watches:
+            obj.__class__ = watched_cls
+
+    return undo
+
+
+class _WatchedAttribute(object):
+    """Descriptor standing in for an attribute watched on every instance of a class."""
+
+    def __init__(self, cls, name, watchpoint):
+        self.cls = cls
+        self.name = name
+        self.watchpoint = watchpoint
+        # Put back when the watchpoint is removed.
+        self.original = cls.__dict__.get(name, _MISSING)
+        # Slots and properties keep handling the value, inherited ones too,
+        # anything else is stored in the instance's __dict__.
+        self.descriptor = _MISSING
+        for base in cls.__mro__:
+            if name in base.__dict__:
+                self.descriptor = base.__dict__[name]
+                break
+        self.data = hasattr(type(self.descriptor), "__set__")
+
+    def _class_value(self, obj, owner):
+        value = self.original
+        if value is _MISSING:
+            for cls in self.cls.__mro__[1:]:
+                if self.name in cls.__dict__:
+                    value = cls.__dict__[self.name]
+                    break
+            else:
+                raise AttributeError(self.name)
+        if hasattr(type(value), "__get__"):
+            return value.__get__(obj, owner)
+        return value
+
+    def __get__(self, obj, owner=None):
+        if obj is None or self.data:
+            return self._class_value(obj, owner)
+        try:
+            return obj.__dict__[self.name]
+        except KeyError:
+            return self._class_value(obj, owner)
+
+    def __set__(self, obj, value):
+        old = _current(obj, self.name)
+        if self.data:
+            self.descriptor.__set__(obj, value)
+        else:
+            obj.__dict__[self.name] = value
+        self.watchpoint.hit(old, value, sys._getframe(1))
+
+    def __delete__(self, obj):
+        old = _current(obj, self.name)
+        if self.data:
+            self.descriptor.__delete__(obj)
+        else:
+            try:
+                del obj.__dict__[self.name]
+            except KeyError:
+                raise AttributeError(self.name)
+        self.watchpoint.hit(old, _MISSING, sys._getframe(1))
+
+
+def _watch_class(cls, name, watchpoint):
+    """Watch `name` on every instance of `cls` with a descriptor."""
+    if isinstance(cls.__dict__.get(name), _WatchedAttribute):
+        raise ValueError(
+            "already watched by watchpoint {}".format(
+                cls.__dict__[name].watchpoint.number
+            )
+        )
+    attribute = _WatchedAttribute(cls, name, watchpoint)
+    setattr(cls, name, attribute)
+
+    def undo():
+        if attribute.original is _MISSING:
+            delattr(cls, name)
+        else:
+            setattr(cls, name, attribute.original)
+
+    return undo
+
+
+class PdbWatch(pdb.Pdb):
+    """PdbWatch extends Pdb with watchpoints on attributes.
+
+    Only the watched object is instrumented, so the rest of the program runs
+    at full speed. No tracing is involved, and watchpoints keep recording after
+    the debugger detaches.
+    """
+
+    # Number of changes remembered per watchpoint.
+    watch_history = 20
+
+    # Number of frames recorded with each change.
+    watch_stack_limit = 10
+
+    # Number of characters kept of the old and new values' reprs.
+    watch_repr_limit = 200
+
+    _watchpoints = None
+    _watch_number = 0
+    _watch_stopped = False
+
+    def interaction(self, *args, **kwargs):
+        """Remember that the debugger is stopped, changes made from the prompt don't break."""
+        self._watch_stopped = True
+        try:
+            return pdb.Pdb.interaction(self, *args, **kwargs)
+        finally:
+            self._watch_stopped = False
+
+    def do_watch(self, arg):
+        """Record changes to an attribute, optionally breaking on them.
+
+        Usage: watch [expression.attribute [break]]
+
+        When the expression is a class, the attribute is watched on every
+        instance of the class. Otherwise only that object is watched. Each
+        change is recorded with the old and new values and the stack that made
+        it. With `break`, the debugger also stops where the change was made
+        while a session is active.
+
+        Without an argument, list the watchpoints and their recent changes.
+        Assignments to a module's globals from inside the module aren't seen,
+        only `module.attribute = value` from elsewhere is.
+        """
+        args = arg.split()
+        if not args:
+            self._list_watchpoints()
+            return
+        if args[1:] not in ([], ["break"]):
+            self.stdout.write("*** Usage: watch [expression.attribute [break]]\n")
+            return
+
+        target, _, name = args[0].rpartition(".")
+        if not target or not name:
+            self.stdout.write(
+                "*** Expected expression.attribute, got {!r}.\n".format(args[0])
+            )
+            return
+        try:
+            obj = self._getval(target)
+        except Exception:
+            # _getval printed the error.
+            return
+
+        self._watch_number += 1
+        watchpoint = Watchpoint(self._watch_number, args[0], self)
+        watchpoint.break_on_change = args[1:] == ["break"]
+        try:
+            if isinstance(obj, type):
+                watchpoint._undo = _watch_class(obj, name, watchpoint)
+            else:
+                watchpoint._undo = _watch_instance(obj, name, watchpoint)
+        except (TypeError, ValueError) as e:
+            self.stdout.write("*** Can't watch {}: {}\n".format(args[0], e))
+            return
+
+        if self._watchpoints is None:
+            self._watchpoints = {}
+        self._watchpoints[watchpoint.number] = watchpoint
+        self.stdout.write(
+            "Watchpoint {} on {}\n".format(watchpoint.number, watchpoint.expr)
+        )
+
+    def do_unwatch(self, arg):
+        """Remove watchpoints.
+
+        Usage: unwatch [number ...]
+
+        Without numbers, remove all watchpoints.
+        """
+        watchpoints = self._watchpoints or {}
+        numbers = arg.split() or [str(number) for number in sorted(watchpoints)]
+        for number in numbers:
+            watchpoint = (
+                watchpoints.pop(int(number), None) if number.isdigit() else None
+            )
+            if watchpoint is None:
+                self.stdout.write("*** No watchpoint {!r}.\n".format(number))
+                continue
+            watchpoint.remove()
+            self.stdout.write(
+                "Removed watchpoint {} on {}\n".format(
+                    watchpoint.number, watchpoint.expr
+                )
+            )
+
+    def _list_watchpoints(self):
+        watchpoints = self._watchpoints or {}
+        if not watchpoints:
+            self.stdout.write("No watchpoints.\n")
+        for number in sorted(watchpoints):
+            watchpoint = watchpoints[number]
+            self.stdout.write(
+                "{:<3} {}{}, {} changes\n".format(
+                    number,
+                    watchpoint.expr,
+                    " (break)" if watchpoint.break_on_change else "",
+                    watchpoint.count,
+                )
+            )
+            for change in watchpoint.changes:
+                self.stdout.write(
+                    "    {} -> {} in thread {}\n".format(
+                        change.old, change.new, change.thread
+                    )
+                )
+                for filename, lineno, function in change.stack:
+                    self.stdout.write(
+                        "      {}({}){}()\n".format(filename, lineno, function)
+                    )
+
+    def _can_break_on_watch(self):
+        """Return whether a change may stop the program in the debugger."""
+        return True
+
+    def _watch_changed(self, watchpoint, frame):
+        with _lock:
+            if self._watch_stopped or not self._can_break_on_watch():
+                return
+            # Changes in other threads don't break until this one is done.
+            self._watch_stopped = True
+        change = watchpoint.changes[-1]
+        self.stdout.write(
+            "Watchpoint {}: {} changed from {} to {}\n".format(
+                watchpoint.number, watchpoint.expr, change.old, change.new
+            )
+        )
+        pdb.Pdb.set_trace(self, frame)
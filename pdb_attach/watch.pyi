@@ -0,0 +1,62 @@
+import pdb
+import threading
+from types import FrameType
+from typing import Any, Callable, Deque, Dict, List, NamedTuple, Optional, Tuple
+
+_MISSING: object
+_lock: threading.Lock
+
+class Change(NamedTuple):
+    old: str
+    new: str
+    stack: List[Tuple[str, int, str]]
+    thread: str
+
+def _current(obj: Any, name: str) -> Any: ...
+
+class Watchpoint:
+    number: int = ...
+    expr: str = ...
+    break_on_change: bool = ...
+    count: int = ...
+    changes: Deque[Change] = ...
+    _undo: Optional[Callable[[], None]] = ...
+    def __init__(self, number: int, expr: str, debugger: PdbWatch) -> None: ...
+    def hit(self, old: Any, new: Any, frame: Optional[FrameType]) -> None: ...
+    def remove(self) -> None: ...
+
+def _watch_instance(
+    obj: Any, name: str, watchpoint: Watchpoint
+) -> Callable[[], None]: ...
+
+class _WatchedAttribute:
+    cls: type = ...
+    name: str = ...
+    watchpoint: Watchpoint = ...
+    original: Any = ...
+    descriptor: Any = ...
+    data: bool = ...
+    def __init__(self, cls: type, name: str, watchpoint: Watchpoint) -> None: ...
+    def __get__(self, obj: Any, owner: Optional[type] = ...) -> Any: ...
+    def __set__(self, obj: Any, value: Any) -> None: ...
+    def __delete__(self, obj: Any) -> None: ...
+
+def _watch_class(
+    cls: type, name: str, watchpoint: Watchpoint
+) -> Callable[[], None]: ...
+
+class PdbWatch(pdb.Pdb):
+    watch_history: int = ...
+    watch_stack_limit: int = ...
+    watch_repr_limit: int = ...
+    _watchpoints: Optional[Dict[int, Watchpoint]] = ...
+    _watch_number: int = ...
+    _watch_stopped: bool = ...
+    def interaction(self, *args: Any, **kwargs: Any) -> None: ...
+    def do_watch(self, arg: str) -> None: ...
+    def do_unwatch(self, arg: str) -> None: ...
+    def _list_watchpoints(self) -> None: ...
+    def _can_break_on_watch(self) -> bool: ...
+    def _watch_changed(
+        self, watchpoint: Watchpoint, frame: Optional[FrameType]
+    ) -> None: ...
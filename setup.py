@@ -47,4 +47,5 @@ setuptools.setup(
     ],
     python_requires=">=2.7, !=3.0.*, !=3.1.*, !=3.2.*, <4",
     package_data={"pdb_attach": ["py.typed", "*.pyi", "VERSION.txt"]},
+    entry_points={"console_scripts": ["pdb-attach = pdb_attach.__main__:main"]},
 )
@@ -11,6 +11,20 @@ import pytest
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
 import pdb_attach
+import pdb_attach.catch as pdb_catch
+import pdb_attach.client as pdb_client
 import pdb_attach.detach as pdb_detach
+import pdb_attach.diagnostics as pdb_diagnostics
+import pdb_attach.listener as pdb_listener
+import pdb_attach.patch as pdb_patch
 import pdb_attach.pdb_socket as pdb_socket
 import pdb_attach.pdb_signal as pdb_signal
+import pdb_attach.postmortem as pdb_postmortem
+import pdb_attach.replay as pdb_replay
+import pdb_attach.reprs as pdb_reprs
+import pdb_attach.stack as pdb_stack
+import pdb_attach.tasks as pdb_tasks
+import pdb_attach.transcript as pdb_transcript
+import pdb_attach.transport as pdb_transport
+import pdb_attach.pdb_thread as pdb_thread
+import pdb_attach.watch as pdb_watch
@@ -1,10 +1,10 @@
 import os, sys
 
-port = int(sys.argv[1])
+port, ready = int(sys.argv[1]), sys.argv[2]
 
 import pdb_attach
 
-pdb_attach.listen(port)
+pdb_attach.listen(port, ready=ready)
 
 running = True
 
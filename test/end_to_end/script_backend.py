@@ -0,0 +1,14 @@
+import os, sys
+
+port, ready, backend, signum = int(sys.argv[1]), sys.argv[2], sys.argv[3], int(sys.argv[4]) or None
+
+import pdb_attach
+
+pdb_attach.listen(port, signum=signum, backend=backend, ready=ready)
+
+running = True
+
+while running: pass
+
+sys.stdout.write("done" + os.linesep)
+sys.stdout.flush()
@@ -0,0 +1,3 @@
+for i in range(2):
+    print("line {}".format(i))
+print("running is {}".format(running))
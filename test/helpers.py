@@ -0,0 +1,24 @@
+# -*- mode: python -*-
+"""Helpers shared by the tests of the debugger's commands."""
+from __future__ import unicode_literals
+
+import io
+
+
+def run_debugger(cls, cmds, break_in=None, **attrs):
+    """Run a `cls` debugger on `cmds` and return its output.
+
+    The debugger continues after the commands. Its attributes are set from
+    `attrs` first, e.g. to lower its limits. `break_in` is called with the
+    debugger to stop the program, by default the debugger stops right here.
+    """
+    inp = io.StringIO("\n".join(cmds + ["continue", ""]))
+    out = io.StringIO()
+    debugger = cls(stdin=inp, stdout=out)
+    for name, value in attrs.items():
+        setattr(debugger, name, value)
+    if break_in is None:
+        debugger.set_trace()
+    else:
+        break_in(debugger)
+    return out.getvalue()
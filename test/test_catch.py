@@ -0,0 +1,120 @@
+# -*- mode: python -*-
+"""PdbCatch tests."""
+from __future__ import unicode_literals
+
+import io
+
+import pytest
+
+from context import pdb_catch
+
+needs_monitoring = pytest.mark.skipif(
+    pdb_catch.monitoring is None, reason="Needs sys.monitoring."
+)
+
+
+def lookup(table, key):
+    """Look up `key`, raising KeyError as control flow when it's missing."""
+    try:
+        return table[key]
+    except KeyError:
+        return None
+
+
+def lookup_or_raise(table, key):
+    """Raise KeyError out of this frame."""
+    return table[key]
+
+
+def nested_lookup(table, key):
+    """Handle the KeyError after it propagated through a frame."""
+    try:
+        return lookup_or_raise(table, key)
+    except KeyError:
+        return None
+
+
+def make_debugger(cmds):
+    """Return a debugger with `cmds` as input and its output."""
+    inp = io.StringIO("\n".join(cmds + [""]))
+    out = io.StringIO()
+    return pdb_catch.PdbCatch(stdin=inp, stdout=out), out
+
+
+@needs_monitoring
+def test_catch_every_and_max():
+    """Test every Nth exception stops, up to the limit, then nothing is hooked."""
+    debugger, out = make_debugger(
+        [
+            "catch KeyError every 3 max 2",
+            "continue",
+            "p key",
+            "continue",
+            "p key",
+            "catch",
+            "continue",
+        ]
+    )
+    debugger.set_trace()
+    for key in range(10):
+        lookup({}, key)
+    assert pdb_catch._tool_id is None
+    lookup({}, "after")
+
+    out = out.getvalue()
+    assert out.count("Catchpoint 1: KeyError") == 2
+    assert "(Pdb) 2\n" in out and "(Pdb) 5\n" in out
+    assert "1   KeyError every 3 max 2 (done), 6 raised, 2 stops" in out
+    assert "in thread MainThread" in out
+    debugger.do_uncatch("")
+
+
+@needs_monitoring
+def test_catch_counts_once_and_only_counts():
+    """Test propagating exceptions are counted once, `max 0` never stops."""
+    debugger, out = make_debugger(
+        ["catch LookupError max 0", "continue", "catch", "uncatch", "catch", "continue"]
+    )
+    debugger.set_trace()
+    for key in range(5):
+        lookup({}, key)
+    lookup({1: 1}, 1)
+    nested_lookup({}, 1)
+    debugger.set_trace()
+
+    assert pdb_catch._tool_id is None
+    out = out.getvalue()
+    assert "Catchpoint 1:" not in out
+    assert "1   LookupError every 1 max 0, 6 raised, 0 stops" in out
+    assert (
+        "test_catch.py({})lookup_or_raise()".format(
+            lookup_or_raise.__code__.co_firstlineno + 2
+        )
+        in out
+    )
+    assert "Removed catchpoint 1 on LookupError" in out
+    assert "No catchpoints." in out
+
+
+@needs_monitoring
+def test_catch_errors():
+    """Test bad arguments are reported."""
+    debugger, out = make_debugger(
+        [
+            "catch int",
+            "catch nope",
+            "catch KeyError every",
+            "catch KeyError every 0",
+            "catch KeyError often 3",
+            "catch KeyError max 1 max 2",
+            "uncatch 3",
+            "continue",
+        ]
+    )
+    debugger.set_trace()
+    out = out.getvalue()
+    assert "*** int is not an exception class." in out
+    assert "NameError" in out
+    assert out.count("*** Usage: catch [exception [every N] [max M]]") == 4
+    assert "*** No catchpoint '3'." in out
+    assert pdb_catch._tool_id is None
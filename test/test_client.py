@@ -0,0 +1,70 @@
+# -*- mode: python -*-
+"""Client tests."""
+from __future__ import unicode_literals
+
+import os
+import socket
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from context import pdb_client, pdb_listener, pdb_socket
+
+pdb_path = os.path.abspath(
+    os.path.join(os.path.abspath(os.path.dirname(__file__)), os.pardir)
+)
+
+
+def test_client_does_not_import_pdb():
+    """Test the client entry point doesn't import the debugger."""
+    env = os.environ.copy()
+    env["PYTHONPATH"] = pdb_path
+    code = "; ".join(
+        [
+            "import sys",
+            "import pdb_attach.__main__",
+            "print(sorted({'pdb', 'bdb', 'pdb_attach.pdb_socket'} & set(sys.modules)))",
+        ]
+    )
+    out = subprocess.check_output([sys.executable, "-c", code], env=env)
+    assert out.decode().strip() == "[]"
+
+
+def test_client_still_importable_from_pdb_socket():
+    """Test the classes moved to the client modules are still importable."""
+    from pdb_attach import client, transport
+
+    assert pdb_socket.PdbClient is client.PdbClient
+    assert pdb_socket.PdbIOWrapper is transport.PdbIOWrapper
+
+
+def test_wait_ready(tmpdir):
+    """Test waiting for a readiness file returns its pid and port."""
+    path = os.path.join(str(tmpdir), "ready")
+    with pytest.raises(IOError):
+        pdb_client.wait_ready(path, timeout=0.05)
+
+    with open(path, "w") as f:
+        f.write("123 50000\n")
+    assert pdb_client.wait_ready(path) == (123, 50000)
+
+
+def test_connect_waits_for_ready(tmpdir):
+    """Test the client attaches to the endpoint in the readiness file."""
+    path = os.path.join(str(tmpdir), "ready")
+    serv = socket.socket()
+    serv.bind(("localhost", 0))
+    serv.listen(1)
+    # Signal 0 only checks this process exists.
+    client = pdb_client.PdbSignaler(None, None, signum=0)
+    timer = threading.Timer(
+        0.1, pdb_listener.notify_ready, [path, serv.getsockname()[1]]
+    )
+    timer.start()
+    client.connect(ready=path)
+    conn, _ = serv.accept()
+    assert client.server_pid == os.getpid()
+    conn.close()
+    serv.close()
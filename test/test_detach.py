@@ -2,6 +2,7 @@
 """PdbDetach tests."""
 from __future__ import unicode_literals
 
+import gc
 import io
 import os
 
@@ -57,3 +58,84 @@ def test_precmd_handler_runs():
         debugger.attach_precmd_handler(precmd)
         debugger.set_trace()
         assert val[0] is True
+
+
+def hot_loop(n):
+    """Run a loop for breakpoints to be set in."""
+    total = 0
+    for i in range(n):
+        total += i
+    return total
+
+
+def test_conditional_breakpoints():
+    """Test conditions and ignore counts with the breakpoint index."""
+    line = hot_loop.__code__.co_firstlineno + 4
+    inp = io.StringIO(
+        "\n".join(
+            [
+                "break {}:{}, i % 10 == 3".format(__file__, line),
+                "ignore 1 2",
+                "tbreak hot_loop",
+                "continue",
+                "p n",
+                "continue",
+                "p i",
+                "clear 1",
+                "continue",
+                "",
+            ]
+        )
+    )
+    out = io.StringIO()
+    debugger = pdb_detach.PdbDetach(stdin=inp, stdout=out)
+    debugger.set_trace()
+    assert hot_loop(100) == 4950
+    assert hot_loop(100) == 4950
+
+    out = out.getvalue()
+    assert "(Pdb) 100\n" in out
+    assert "(Pdb) 23\n" in out
+    assert "Deleted breakpoint 2" in out
+    assert list(debugger._conditions) == ["i % 10 == 3"]
+    assert not debugger.breaks
+
+
+def test_breakpoint_index():
+    """Test breakpoints are indexed by code object and the index follows changes."""
+    line = hot_loop.__code__.co_firstlineno + 4
+    debugger = pdb_detach.PdbDetach(stdin=io.StringIO(), stdout=io.StringIO())
+    debugger.set_break(__file__, line)
+    assert debugger._code_breaks(hot_loop.__code__)[2] == {line}
+    assert not debugger._code_breaks(test_breakpoint_index.__code__)[2]
+    debugger.set_break(__file__, hot_loop.__code__.co_firstlineno, funcname="hot_loop")
+    assert debugger._code_breaks(hot_loop.__code__)[2] == {
+        line,
+        hot_loop.__code__.co_firstlineno,
+    }
+    debugger.clear_all_file_breaks(__file__)
+    assert not debugger._code_breaks(hot_loop.__code__)[2]
+
+
+def test_breakpoint_index_drops_freed_code():
+    """Test the index doesn't keep code objects alive."""
+    debugger = pdb_detach.PdbDetach(stdin=io.StringIO(), stdout=io.StringIO())
+    code = compile("x = 1", "<generated>", "exec")
+    assert debugger._code_breaks(code)[0]() is code
+    assert id(code) in debugger._break_index
+    key = id(code)
+    del code
+    gc.collect()
+    assert key not in debugger._break_index
+
+
+def test_broken_condition_stops():
+    """Test a condition that raises stops the program like in bdb."""
+    line = hot_loop.__code__.co_firstlineno + 4
+    inp = io.StringIO(
+        "break {}:{}, nope\ncontinue\np i\ndetach\n".format(__file__, line)
+    )
+    out = io.StringIO()
+    pdb_detach.PdbDetach(stdin=inp, stdout=out).set_trace()
+    hot_loop(10)
+    assert "(Pdb) 0\n" in out.getvalue()
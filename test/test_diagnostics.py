@@ -0,0 +1,84 @@
+# -*- mode: python -*-
+"""PdbDiagnostics tests."""
+from __future__ import unicode_literals
+
+import re
+
+import pytest
+
+from context import pdb_diagnostics
+from helpers import run_debugger
+
+
+class Leak(object):
+    """Objects for the heap summary to find."""
+
+
+class BadSize(object):
+    """Object sys.getsizeof fails on."""
+
+    def __sizeof__(self):
+        """Fail like a broken extension type."""
+        raise RuntimeError("no size")
+
+
+def run_commands(cmds, **attrs):
+    """Run the debugger with `cmds` as input and return its output."""
+    return run_debugger(pdb_diagnostics.PdbDiagnostics, cmds, **attrs)
+
+
+def test_format_size():
+    """Test sizes are shown in the largest fitting unit."""
+    assert pdb_diagnostics._format_size(10) == "10 B"
+    assert pdb_diagnostics._format_size(1536) == "1.5 KiB"
+    assert pdb_diagnostics._format_size(3 << 20) == "3.0 MiB"
+    assert pdb_diagnostics._format_size(5 << 40) == "5120.0 GiB"
+
+
+def test_heap_summary():
+    """Test the heap summary counts objects by type and reports progress."""
+    leaks = [Leak() for _ in range(20000)]  # noqa: F841
+    out = run_commands(["heap 100"], heap_chunk_size=10000)
+    assert re.search(r"Scanned 10000 of \d+ objects in generation \d\.\.\.", out)
+    row = [line for line in out.splitlines() if line.endswith("test_diagnostics.Leak")]
+    assert len(row) == 1
+    assert int(row[0].split()[0]) >= 20000
+    assert "objects," in out
+
+
+def test_heap_unsized_objects():
+    """Test objects that can't be sized are counted and reported."""
+    bad = [BadSize() for _ in range(3)]  # noqa: F841
+    out = run_commands(["heap 1000"])
+    row = [
+        line for line in out.splitlines() if line.endswith("test_diagnostics.BadSize")
+    ]
+    assert row[0].split()[:3] == ["3", "0", "B"]
+    assert re.search(r"^\d+ objects couldn't be sized\.$", out, re.M)
+
+
+def test_heap_bad_limit():
+    """Test the heap command rejects a limit that isn't a number."""
+    out = run_commands(["heap lots"])
+    assert "*** Expected a number, got 'lots'." in out
+
+
+@pytest.mark.skipif(pdb_diagnostics.tracemalloc is None, reason="Needs tracemalloc.")
+def test_tracemalloc_diff():
+    """Test the diff shows allocations made since the snapshot."""
+    out = run_commands(
+        [
+            "tracemalloc diff",
+            "tracemalloc start",
+            "tracemalloc diff",
+            "tracemalloc snapshot 1",
+            "!data = [bytearray(1000) for _ in range(1000)]",
+            "tracemalloc diff 1",
+            "tracemalloc stop",
+        ]
+    )
+    assert "*** Not tracing, run 'tracemalloc start' first." in out
+    assert "*** No snapshot, run 'tracemalloc snapshot' first." in out
+    assert re.search(r"<stdin>:1: size=\S+ \w+ \(\+", out)
+    assert "Stopped tracing allocations." in out
+    assert not pdb_diagnostics.tracemalloc.is_tracing()
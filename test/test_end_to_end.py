@@ -3,8 +3,10 @@
 from __future__ import unicode_literals
 
 import os
+import shutil
+import signal
 import subprocess
-import time
+import tempfile
 
 try:
     from test.support.socket_helper import find_unused_port
@@ -19,13 +21,19 @@ pdb_path = os.path.abspath(
 )
 
 
-def run_script(script_input):
+def run_script(script_input, script="script.py", script_args=(), client_args=()):
     """Run pdb-attach from the command line.
 
     Parameters
     ----------
     script_input
         Which input file to use with the script.
+    script
+        Which script to debug.
+    script_args
+        Extra arguments for the script.
+    client_args
+        Extra arguments for the client.
 
     Returns
     -------
@@ -35,6 +43,8 @@ def run_script(script_input):
     input_file = "test/end_to_end/input/{}.txt".format(script_input)
 
     port = find_unused_port()
+    ready_dir = tempfile.mkdtemp()
+    ready = os.path.join(ready_dir, "ready")
     env = os.environ.copy()
 
     if len(env.get("PYTHONPATH", "")) == 0:
@@ -43,16 +53,16 @@ def run_script(script_input):
         env["PYTHONPATH"] += os.pathsep + pdb_path
 
     script = subprocess.Popen(
-        ["python", "test/end_to_end/script.py", str(port)],
+        ["python", "test/end_to_end/" + script, str(port), ready] + list(script_args),
         stdout=subprocess.PIPE,
         stderr=subprocess.PIPE,
         env=env,
     )
-    time.sleep(1)  # Give the script time to set up the server.
 
     with open(input_file) as f:
+        # The client attaches as soon as the script says it is listening.
         client = subprocess.Popen(
-            ["python", "-m" "pdb_attach", str(script.pid), str(port)],
+            ["python", "-m" "pdb_attach", "--ready", ready] + list(client_args),
             stdin=f,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
@@ -65,6 +75,7 @@ def run_script(script_input):
     assert len(err) == 0
 
     out, err = script.communicate()
+    shutil.rmtree(ready_dir)
     assert len(err) == 0
 
     return output, out.decode() == "done" + os.linesep
@@ -75,7 +86,7 @@ expected_detach = os.linesep.join(
         "> /path/to/pdb-attach/test/end_to_end/script.py(11)<module>()",
         "-> while running: pass",
         "(Pdb)   6  	",
-        "  7  	pdb_attach.listen(port)",
+        "  7  	pdb_attach.listen(port, ready=ready)",
         "  8  	",
         "  9  	running = True",
         " 10  	",
@@ -118,3 +129,61 @@ def test_end_to_end_empty():
         assert expected == actual
 
     assert done is True
+
+
+@skip_windows
+def test_end_to_end_thread_backend():
+    """Test attaching to the thread backend without a signal."""
+    actual_lines, done = run_script(
+        "detach",
+        script="script_backend.py",
+        script_args=["thread", "0"],
+        client_args=["--signal", "0"],
+    )
+
+    assert actual_lines[0] == expected_detach.split(os.linesep)[0].replace(
+        "script.py", "script_backend.py"
+    )
+    assert done is True
+
+
+@skip_windows
+def test_end_to_end_custom_signal():
+    """Test attaching with a signal other than SIGUSR2."""
+    actual_lines, done = run_script(
+        "detach",
+        script="script_backend.py",
+        script_args=["signal", str(int(signal.SIGUSR1))],
+        client_args=["--signal", "USR1"],
+    )
+
+    assert actual_lines[0] == expected_detach.split(os.linesep)[0].replace(
+        "script.py", "script_backend.py"
+    )
+    assert done is True
+
+
+expected_runscript = os.linesep.join(
+    [
+        "> /path/to/pdb-attach/test/end_to_end/script.py(11)<module>()",
+        "-> while running: pass",
+        "(Pdb) line 0",
+        "line 1",
+        "running is True",
+        "(Pdb) line 0",
+        "line 1",
+        "running is True",
+        "(Pdb) (Pdb) ",
+    ]
+).replace("/path/to/pdb-attach", pdb_path)
+
+
+@skip_windows
+def test_end_to_end_runscript():
+    """Test running an uploaded script with `--script` and `runscript`."""
+    actual_lines, done = run_script(
+        "runscript", client_args=["--script", "test/end_to_end/upload.py"]
+    )
+
+    assert actual_lines == expected_runscript.split(os.linesep)
+    assert done is True
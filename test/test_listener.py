@@ -0,0 +1,152 @@
+# -*- mode: python -*-
+"""PdbListener tests."""
+from __future__ import unicode_literals
+
+import os
+import signal
+import subprocess
+import sys
+
+import pytest
+
+from context import pdb_attach, pdb_listener, pdb_signal
+from skip import skip_windows
+
+
+pdb_path = os.path.abspath(
+    os.path.join(os.path.abspath(os.path.dirname(__file__)), os.pardir)
+)
+
+
+@skip_windows
+def test_listener_set_listen():
+    """Test the signal handler is set and unset by listen and unlisten."""
+    pdb_listener.PdbListener.listen(0)
+    assert isinstance(signal.getsignal(signal.SIGUSR2), pdb_listener.PdbListener)
+    pdb_listener.PdbListener.unlisten()
+    assert not isinstance(signal.getsignal(signal.SIGUSR2), pdb_listener.PdbListener)
+
+
+@skip_windows
+def test_listener_original_signal_restored():
+    """Test the original signal is restored by unlisten."""
+    pdb_listener.PdbListener.listen(0)
+    cur_sig = signal.getsignal(signal.SIGUSR2)
+    pdb_listener.PdbListener.unlisten()
+    assert cur_sig._old_handler == signal.getsignal(signal.SIGUSR2)
+
+
+def test_debugger_built_on_demand():
+    """Test the debugger is only built when it's needed."""
+    listener = pdb_listener.PdbListener(None, 0)
+    assert listener._debugger is None
+    assert isinstance(listener.debugger, pdb_signal.PdbSignal)
+    assert listener.debugger is listener.debugger
+    listener.close()
+
+
+def test_listener_warns_when_port_taken():
+    """Test a debugger that can't bind warns instead of raising in the program."""
+    taken = pdb_listener.PdbListener(None, 0)
+    listener = pdb_listener.PdbListener(None, taken.debugger.bound_port)
+    try:
+        with pytest.warns(RuntimeWarning, match="Can't start the debugger on port"):
+            listener(signal.SIGUSR2, None)
+        assert listener._debugger is None
+    finally:
+        taken.close()
+
+
+@skip_windows
+def test_listen_does_not_import_pdb():
+    """Test importing pdb_attach and listening doesn't import the debugger."""
+    env = os.environ.copy()
+    env["PYTHONPATH"] = pdb_path
+    code = "; ".join(
+        [
+            "import sys",
+            "import pdb_attach",
+            "pdb_attach.listen(0)",
+            "print(sorted({'pdb', 'socket', 'pdb_attach.pdb_signal'} & set(sys.modules)))",
+        ]
+    )
+    out = subprocess.check_output([sys.executable, "-c", code], env=env)
+    assert out.decode().strip() == "[]"
+
+
+def _in_child(func):
+    """Run `func` in a forked child and return what it printed."""
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        try:
+            out = str(func())
+        except Exception as e:
+            out = repr(e)
+        os.write(write_fd, out.encode())
+        os._exit(0)
+
+    os.close(write_fd)
+    with os.fdopen(read_fd) as f:
+        out = f.read()
+    os.waitpid(pid, 0)
+    return out
+
+
+@skip_windows
+@pytest.mark.skipif(
+    not hasattr(os, "register_at_fork"), reason="Needs os.register_at_fork."
+)
+def test_listener_rearmed_after_fork():
+    """Test each forked child gets a listener on a port of its own."""
+    pdb_listener.PdbListener.listen(50000)
+    parent = signal.getsignal(signal.SIGUSR2)
+    try:
+        ports = [
+            _in_child(lambda: signal.getsignal(signal.SIGUSR2).port) for _ in range(2)
+        ]
+        assert ports == ["50001", "50002"]
+        assert parent.children == 2
+
+        def grandchildren():
+            return [
+                _in_child(lambda: signal.getsignal(signal.SIGUSR2).port)
+                for _ in range(2)
+            ]
+
+        # The third child numbers its children in hundreds, clear of its siblings.
+        assert _in_child(grandchildren) == "['50103', '50203']"
+        assert signal.getsignal(signal.SIGUSR2) is parent
+    finally:
+        pdb_listener.PdbListener.unlisten()
+
+
+def test_notify_ready(tmpdir):
+    """Test readiness is reported to callables, file descriptors and paths."""
+    ports = []
+    pdb_listener.notify_ready(ports.append, 50000)
+    assert ports == [50000]
+
+    read_fd, write_fd = os.pipe()
+    pdb_listener.notify_ready(write_fd, 50000)
+    with os.fdopen(read_fd) as f:
+        assert f.read() == "{} 50000\n".format(os.getpid())
+
+    path = os.path.join(str(tmpdir), "ready")
+    pdb_listener.notify_ready(path, 50000)
+    with open(path) as f:
+        assert f.read() == "{} 50000\n".format(os.getpid())
+    assert os.listdir(str(tmpdir)) == ["ready"]
+
+
+@skip_windows
+def test_listen_ready_reports_bound_port():
+    """Test listening on port 0 reports the port that was bound."""
+    ports = []
+    pdb_attach.listen(0, ready=ports.append)
+    try:
+        assert ports[0] > 0
+        assert signal.getsignal(signal.SIGUSR2).debugger.bound_port == ports[0]
+    finally:
+        pdb_attach.unlisten()
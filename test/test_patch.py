@@ -0,0 +1,146 @@
+# -*- mode: python -*-
+"""PdbPatch tests."""
+from __future__ import unicode_literals
+
+import functools
+import io
+import os
+
+from context import pdb_patch
+
+
+class Base(object):
+    """Class with a method the patched one calls through super()."""
+
+    def total(self, items):
+        """Add up the items."""
+        return sum(items)
+
+
+class Cart(Base):
+    """Class with a method to patch."""
+
+    def total(self, items, tax=0):
+        """Return the total, wrongly."""
+        return super(Cart, self).total(items) * 2
+
+
+def make_scale(factor):
+    """Return a closure to patch."""
+    offset = 1
+
+    def scale(x):
+        return x * factor * offset
+
+    return scale
+
+
+scale = make_scale(3)
+
+# What the functions returned while they were patched.
+results = {}
+
+
+def logged(func):
+    """Wrap `func` like decorators using functools.wraps do."""
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return func(*args, **kwargs)
+
+    return wrapper
+
+
+@logged
+def greet(name):
+    """Return a greeting."""
+    return "hi " + name
+
+
+FIX = """\
+class Cart:
+    def total(self, items, tax=1):
+        return super(Cart, self).total(items) + tax
+
+def scale(x):
+    return x * factor + offset
+
+def greet(name):
+    return "hello " + name
+"""
+
+BROKEN = """\
+def scale(x):
+    return x * factor
+
+def greet(name, loud):
+    return name
+
+def total(self, items, tax=0):
+    yield items
+"""
+
+
+def run_patch(tmpdir, cmds):
+    """Run the debugger on `cmds` with the fixes in tmpdir and return its output."""
+    for name, source in [("fix.py", FIX), ("broken.py", BROKEN)]:
+        with open(os.path.join(str(tmpdir), name), "w") as f:
+            f.write(source)
+    cmds = [cmd.replace("{tmpdir}", str(tmpdir)) for cmd in cmds]
+    inp = io.StringIO("\n".join(cmds + ["continue", ""]))
+    out = io.StringIO()
+    pdb_patch.PdbPatch(stdin=inp, stdout=out).set_trace()
+    return out.getvalue()
+
+
+def test_patch_and_unpatch(tmpdir):
+    """Test methods, closures and decorated functions are patched and restored."""
+    bound = results["bound"] = Cart().total
+    out = run_patch(
+        tmpdir,
+        [
+            "patch {}.Cart.total {{tmpdir}}/fix.py".format(__name__),
+            "patch {}.scale {{tmpdir}}/fix.py".format(__name__),
+            "patch {}.greet {{tmpdir}}/fix.py".format(__name__),
+            "!results['patched'] = (results['bound']([1, 2], 5), scale(10), greet('you'))",
+            "patch",
+            "unpatch {}.scale nope".format(__name__),
+            "!results['scaled'] = scale(10)",
+            "unpatch",
+            "patch",
+        ],
+    )
+    assert results["patched"] == (8, 31, "hello you")
+    assert results["scaled"] == 30
+    assert (bound([1, 2], 5), scale(10), greet("you")) == (6, 30, "hi you")
+    assert "Patched {}.Cart.total with".format(__name__) in out
+    assert "{}.scale with {}/fix.py".format(__name__, tmpdir) in out
+    assert "Restored {}.scale".format(__name__) in out
+    assert "*** nope is not patched." in out
+    assert "No patched functions." in out
+
+
+def test_patch_refuses_incompatible(tmpdir):
+    """Test changes to the arguments, kind and closure are refused."""
+    out = run_patch(
+        tmpdir,
+        [
+            "patch {}.scale {{tmpdir}}/broken.py".format(__name__),
+            "patch {}.greet {{tmpdir}}/broken.py".format(__name__),
+            "patch {}.make_scale {{tmpdir}}/fix.py".format(__name__),
+            "patch {}.Cart.total {{tmpdir}}/broken.py".format(__name__),
+            "patch {}.Cart {{tmpdir}}/fix.py".format(__name__),
+            "patch nope.nope {tmpdir}/fix.py",
+            "patch {}.greet {{tmpdir}}/missing.py".format(__name__),
+            "patch {}.greet".format(__name__),
+        ],
+    )
+    assert "the closure changed from (factor, offset) to (factor)." in out
+    assert "the arguments changed from (name) to (name, loud)." in out
+    assert "fix.py has no definition of make_scale." in out
+    assert "it is a plain function, not a generator one." in out
+    assert "is not a Python function." in out
+    assert "no module of nope.nope is imported." in out
+    assert "No such file or directory" in out
+    assert "*** Usage: patch [module.function file]" in out
+    assert greet("you") == "hi you"
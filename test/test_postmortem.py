@@ -0,0 +1,112 @@
+# -*- mode: python -*-
+"""Post-mortem snapshot tests."""
+from __future__ import unicode_literals
+
+import glob
+import io
+import os
+import subprocess
+import sys
+
+from context import pdb_postmortem
+
+
+class _BadRepr(object):
+    def __repr__(self):
+        raise RuntimeError("no repr")
+
+
+def _inner(items):
+    bad = _BadRepr()  # noqa: F841
+    return items[len(items)]
+
+
+def _outer():
+    long_text = "x" * 5000  # noqa: F841
+    return _inner([1, 2, 3])
+
+
+def _snapshot(**kwargs):
+    try:
+        _outer()
+    except IndexError:
+        return pdb_postmortem.capture(*sys.exc_info(), **kwargs)
+
+
+def test_capture_round_trip(tmpdir):
+    """Test frames, source and bounded reprs of locals are saved and read back."""
+    path = os.path.join(str(tmpdir), "crash.snapshot.gz")
+    pdb_postmortem.write(path, _snapshot(max_repr=100))
+    snapshot = pdb_postmortem.read(path)
+
+    assert snapshot["exception"].startswith("IndexError")
+    names = [frame["name"] for frame in snapshot["frames"]]
+    assert names == ["_snapshot", "_outer", "_inner"]
+    inner = snapshot["frames"][-1]
+    assert inner["args"] == ["items"]
+    assert inner["locals"] == {
+        "items": "[1, 2, 3]",
+        "bad": "<repr failed: RuntimeError>",
+    }
+    assert dict(inner["source"])[inner["lineno"]].strip() == "return items[len(items)]"
+    assert len(snapshot["frames"][1]["locals"]["long_text"]) == 100
+
+
+def test_browser_navigates_frames():
+    """Test the browser moves between frames and prints saved locals."""
+    stdin = io.StringIO(
+        "where\np items\nup\np long_text\nup 5\ndown 5\ndown\nargs\np nope\nlist\nq\n"
+    )
+    stdout = io.StringIO()
+    pdb_postmortem.SnapshotBrowser(
+        _snapshot(max_repr=10), stdin=stdin, stdout=stdout
+    ).cmdloop()
+    out = stdout.getvalue()
+
+    assert out.startswith("IndexError")
+    assert "> {}(".format(__file__.rstrip("c")) in out
+    assert "-> return items[len(items)]" in out
+    assert "[1, 2, 3]\n" in out
+    assert "'xxxxxx...\n" in out
+    assert "*** Oldest frame" in out
+    assert "*** Newest frame" in out
+    assert "items = [1, 2, 3]\n" in out
+    assert "*** No local 'nope' was saved in this frame." in out
+    assert "->     return items[len(items)]" in out
+
+
+def test_crashing_process_saves_snapshot(tmpdir):
+    """Test a process listening with postmortem saves a snapshot as it dies."""
+    env = os.environ.copy()
+    env["PYTHONPATH"] = os.pathsep.join(
+        [
+            os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)),
+            env.get("PYTHONPATH", ""),
+        ]
+    )
+    script = os.path.join(str(tmpdir), "crash.py")
+    with open(script, "w") as f:
+        f.write(
+            "import pdb_attach\n"
+            "pdb_attach.listen(0, postmortem={!r})\n"
+            "def crash(reason):\n"
+            "    raise ValueError(reason)\n"
+            "crash('boom')\n".format(str(tmpdir))
+        )
+    proc = subprocess.Popen([sys.executable, script], stderr=subprocess.PIPE, env=env)
+    _, err = proc.communicate()
+    assert proc.returncode == 1
+    assert b"ValueError: boom" in err
+
+    (path,) = glob.glob(os.path.join(str(tmpdir), "*.snapshot.gz"))
+    assert path.encode() in err
+    client = subprocess.Popen(
+        [sys.executable, "-m", "pdb_attach", "--postmortem", path],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        env=env,
+    )
+    out, _ = client.communicate(b"args\n")
+    assert b"ValueError: boom" in out
+    assert b"-> raise ValueError(reason)" in out
+    assert b"reason = 'boom'" in out
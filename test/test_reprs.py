@@ -0,0 +1,55 @@
+# -*- mode: python -*-
+"""Bounded repr tests."""
+from __future__ import unicode_literals
+
+import collections
+
+from context import pdb_reprs
+
+
+class _CountedRepr(object):
+    calls = 0
+
+    def __repr__(self):
+        _CountedRepr.calls += 1
+        return "counted"
+
+
+class _Dict(dict):
+    pass
+
+
+def test_safe_repr_stops_early():
+    """Test only the items of a large value that fit in the repr are repr'd."""
+    _CountedRepr.calls = 0
+    text = pdb_reprs.safe_repr([[_CountedRepr()] * 1000] * 1000, 100)
+    assert text.startswith("[[counted, counted") and text.endswith("...")
+    assert len(text) == 100
+    assert _CountedRepr.calls < 200
+
+
+def test_safe_repr_bounds_bytes_and_mappings():
+    """Test bytes and mappings are repr'd only as far as the repr shows."""
+    ordered = collections.OrderedDict((i, _CountedRepr()) for i in range(100000))
+    default = collections.defaultdict(list, ordered)
+    values = [b"x" * (1 << 24), ordered, default, _Dict(ordered), dict(ordered)]
+    _CountedRepr.calls = 0
+    texts = [pdb_reprs.safe_repr(value, 100) for value in values]
+    assert _CountedRepr.calls < 100
+
+    assert texts[0].startswith(("b'xxx", "'xxx")) and len(texts[0]) == 100
+    assert texts[1].startswith("OrderedDict({0: counted, 1: counted")
+    assert texts[2].startswith("defaultdict(<")
+    assert texts[3].startswith("_Dict({0: counted")
+    assert texts[4].startswith("{0: counted, 1: counted")
+    assert all(text.endswith("...") and len(text) <= 100 for text in texts[1:])
+
+
+def test_safe_repr_reports_failure():
+    """Test a repr that raises is reported instead of raising."""
+
+    class _BadRepr(object):
+        def __repr__(self):
+            raise RuntimeError("no repr")
+
+    assert pdb_reprs.safe_repr([_BadRepr()], 100) == "<repr failed: RuntimeError>"
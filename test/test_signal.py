@@ -2,9 +2,14 @@
 """PdbDetach tests."""
 from __future__ import unicode_literals
 
+import os
+import pdb
 import signal
+import socket
 
-from context import pdb_signal
+import pytest
+
+from context import pdb_signal, pdb_socket
 from skip import skip_windows
 
 
@@ -24,3 +29,53 @@ def test_original_signal_restored():
     cur_sig = signal.getsignal(signal.SIGUSR2)
     pdb_signal.PdbSignal.unlisten()
     assert cur_sig._old_handler is signal.getsignal(signal.SIGUSR2)
+
+
+@skip_windows
+def test_idle_timeout_detaches():
+    """Test an idle session detaches and lets the program continue."""
+    val = False
+    debugger = pdb_signal.PdbSignal(None, 0, idle_timeout=0.5)
+    debugger.heartbeat_interval = 0.05
+    debugger.idle_warning = 0.25
+    sock1, sock2 = socket.socketpair()
+    debugger._start_session(sock1)
+    pdb.Pdb.set_trace(debugger)
+    val = True
+
+    client_io = pdb_socket.PdbIOWrapper(sock2)
+    output, closed = client_io.read_prompt()
+    output, closed = client_io.read_prompt()
+    assert "*** Idle for too long" in output
+    assert "*** Detaching, the session was idle for too long" in output
+    assert closed is True
+    assert val is True
+
+
+@skip_windows
+@pytest.mark.skipif(
+    not hasattr(os, "register_at_fork"), reason="Needs os.register_at_fork."
+)
+def test_signal_rearmed_after_fork():
+    """Test a forked child closes the parent's socket and binds its own."""
+    probe = socket.socket()
+    probe.bind(("localhost", 0))
+    port = probe.getsockname()[1]
+    probe.close()
+
+    pdb_signal.PdbSignal.listen(port)
+    parent = signal.getsignal(signal.SIGUSR2)
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        child = signal.getsignal(signal.SIGUSR2)
+        out = "{} {}".format(parent._sock.fileno(), child._sock.getsockname()[1])
+        os.write(write_fd, out.encode())
+        os._exit(0)
+
+    os.close(write_fd)
+    with os.fdopen(read_fd) as f:
+        out = f.read()
+    os.waitpid(pid, 0)
+    pdb_signal.PdbSignal.unlisten()
+    assert out == "-1 {}".format(port + 1)
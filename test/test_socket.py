@@ -3,8 +3,14 @@
 from __future__ import unicode_literals
 
 import io
+import pdb
 import os
+import random
 import socket
+import sys
+import threading
+import time
+import weakref
 
 try:
     from test.support.socket_helper import find_unused_port
@@ -13,7 +19,7 @@ except ImportError:
 
 import pytest
 
-from context import pdb_socket
+from context import pdb_socket, pdb_transport
 
 
 def _server():
@@ -36,6 +42,18 @@ if not hasattr(socket, "socketpair"):
     socket.socketpair = _socketpair
 
 
+def _high_fd(sock):
+    """Move `sock` to a file descriptor above 1023, where select() fails."""
+    fcntl = pytest.importorskip("fcntl")
+    resource = pytest.importorskip("resource")
+    if resource.getrlimit(resource.RLIMIT_NOFILE)[0] <= 1100:
+        pytest.skip("Can't open file descriptors above 1023.")
+    fd = fcntl.fcntl(sock.fileno(), fcntl.F_DUPFD, 1100)
+    moved = socket.socket(sock.family, sock.type, sock.proto, fileno=fd)
+    sock.close()
+    return moved
+
+
 @pytest.fixture()
 def server():
     """Return a port and a socket server listening on that port."""
@@ -263,3 +281,582 @@ def test_interact_eoferror():
     pdb_io2.raise_eoferror()
     with pytest.raises(EOFError):
         interact.raw_input()
+
+
+def test_wrapper_mirrors_to_observer():
+    """Test output written to the wrapper is mirrored to observers."""
+    sock1, sock2 = socket.socketpair()
+    obs1, obs2 = socket.socketpair()
+    pdb_io1 = pdb_socket.PdbIOWrapper(sock1)
+    pdb_io2 = pdb_socket.PdbIOWrapper(sock2)
+    observer_io = pdb_socket.PdbIOWrapper(obs2)
+    pdb_io1.add_observer(obs1, 1 << 20)
+    msg = "hello world"
+    pdb_io1.write(msg)
+    assert pdb_io2.read(len(msg)) == msg
+    assert observer_io.read(len(msg)) == msg
+
+
+def test_wrapper_mirrors_input_to_observer():
+    """Test input read by the wrapper is mirrored to observers."""
+    sock1, sock2 = socket.socketpair()
+    obs1, obs2 = socket.socketpair()
+    pdb_io1 = pdb_socket.PdbIOWrapper(sock1)
+    pdb_io2 = pdb_socket.PdbIOWrapper(sock2)
+    observer_io = pdb_socket.PdbIOWrapper(obs2)
+    pdb_io1.add_observer(obs1, 1 << 20)
+    msg = "hello world" + os.linesep
+    pdb_io2.write(msg)
+    assert pdb_io1.readline() == msg
+    assert observer_io.readline() == msg
+
+
+def test_wrapper_drops_slow_observer():
+    """Test an observer that doesn't keep up is dropped instead of blocking."""
+    sock1, sock2 = socket.socketpair()
+    obs1, _obs2 = socket.socketpair()
+    pdb_io1 = pdb_socket.PdbIOWrapper(sock1)
+    pdb_io1.add_observer(obs1, 1024)
+
+    def drain():
+        while len(sock2.recv(1 << 16)) > 0:
+            pass
+
+    drainer = threading.Thread(target=drain)
+    drainer.start()
+    msg = "x" * (1 << 16)
+    for _ in range(64):
+        pdb_io1.write(msg)
+    sock1.close()
+    drainer.join()
+    assert pdb_io1._observers == []
+
+
+def test_server_accepts_observer():
+    """Test an observer can join an active session."""
+    port = find_unused_port()
+    debugger = pdb_socket.PdbServer(port)
+    sock1, sock2 = socket.socketpair()
+    debugger._start_session(sock1)
+
+    observer = pdb_socket.PdbClient(port)
+    observer.observe()
+    deadline = time.time() + 5
+    while not debugger.stdout._observers and time.time() < deadline:
+        time.sleep(0.01)
+
+    prompt = pdb_socket._PdbStr("(Pdb) ", prompt=True)
+    debugger.stdout.write(prompt)
+    assert observer.recv() == (prompt, False)
+
+    debugger.close()
+    sock2.close()
+    assert observer.recv() == ("", True)
+
+
+def test_server_turns_away_peers_without_session():
+    """Test a client observing between sessions doesn't take the driver's place."""
+    port = find_unused_port()
+    debugger = pdb_socket.PdbServer(port)
+    observer = pdb_socket.PdbClient(port)
+    observer.observe()
+    driver = pdb_socket.PdbClient(port)
+    driver.connect()
+
+    thread = threading.Thread(target=debugger.set_trace)
+    thread.start()
+    assert observer.recv() == ("", True)
+    msg, closed = driver.recv()
+    assert msg.endswith("(Pdb) ")
+    assert not closed
+
+    driver.send("continue")
+    thread.join(5)
+    assert not thread.is_alive()
+    debugger.close()
+    debugger.close_listener()
+
+
+def test_server_accepts_observer_high_fd():
+    """Test observers are accepted on a listening socket select() can't take."""
+    port = find_unused_port()
+    debugger = pdb_socket.PdbServer(port)
+    debugger._sock = _high_fd(debugger._sock)
+    sock1, sock2 = socket.socketpair()
+    debugger._start_session(sock1)
+
+    observer = pdb_socket.PdbClient(port)
+    observer.observe()
+    deadline = time.time() + 5
+    while not debugger.stdout._observers and time.time() < deadline:
+        time.sleep(0.01)
+    assert debugger._peer_thread.is_alive()
+    assert len(debugger.stdout._observers) == 1
+
+    debugger.close()
+    sock2.close()
+
+
+def test_wrapper_resume_replays_missed_output():
+    """Test a resumed session replays only the output the client missed."""
+    sock1, sock2 = socket.socketpair()
+    sock3, sock4 = socket.socketpair()
+    server_io = pdb_socket.PdbIOWrapper(sock1)
+    client_io = pdb_socket.PdbIOWrapper(sock2)
+    server_io.enable_resume("token", 10, lambda: (sock3, 1))
+    prompt = pdb_socket._PdbStr("(Pdb) ", prompt=True)
+
+    server_io.write(prompt)
+    assert client_io.read_prompt() == (prompt, False)
+    assert client_io.session_token == "token"
+    server_io.write("missed" + os.linesep)
+    server_io.write(prompt)
+    sock2.close()
+
+    # Play the part of the server accepting the resumed connection.
+    sock4.sendall("{}|0|{}".format(len("n" + os.linesep), "n" + os.linesep).encode())
+    assert server_io.readline() == "n" + os.linesep
+
+    resumed_io = pdb_socket.PdbIOWrapper(sock4)
+    assert resumed_io.read_prompt() == ("missed" + os.linesep + prompt, False)
+
+
+def test_wrapper_resume_reports_lost_output():
+    """Test a client that missed more output than is kept is told how much was lost."""
+    sock1, sock2 = socket.socketpair()
+    sock3, sock4 = socket.socketpair()
+    server_io = pdb_socket.PdbIOWrapper(sock1)
+    client_io = pdb_socket.PdbIOWrapper(sock2)
+    server_io.enable_resume("token", 2, lambda: (sock3, 1))
+    prompt = pdb_socket._PdbStr("(Pdb) ", prompt=True)
+
+    server_io.write(prompt)
+    assert client_io.read_prompt() == (prompt, False)
+    for line in ["lost", "kept"]:
+        server_io.write(line + os.linesep)
+    server_io.write(prompt)
+    sock2.close()
+
+    sock4.sendall("{}|0|{}".format(len("n" + os.linesep), "n" + os.linesep).encode())
+    assert server_io.readline() == "n" + os.linesep
+
+    resumed_io = pdb_socket.PdbIOWrapper(sock4)
+    msg, _ = resumed_io.read_prompt()
+    assert (
+        msg
+        == "*** Lost 1 frame of output, only the last 2 are kept.\n"
+        + "kept"
+        + os.linesep
+        + prompt
+    )
+    assert resumed_io.frames_received == 2
+
+
+def test_server_resumes_session():
+    """Test a client can resume a session after its connection drops."""
+    port = find_unused_port()
+    debugger = pdb_socket.PdbServer(port)
+    client = pdb_socket.PdbClient(port)
+    client.connect()
+    sock, _ = debugger._sock.accept()
+    debugger._start_session(sock)
+
+    prompt = pdb_socket._PdbStr("(Pdb) ", prompt=True)
+    debugger.stdout.write(prompt)
+    assert client.recv() == (prompt, False)
+    client._client.shutdown(socket.SHUT_RDWR)
+    debugger.stdout.write("missed" + os.linesep)
+    debugger.stdout.write(prompt)
+
+    assert client.resume(timeout=5)
+    client.send("n")
+    assert debugger.stdin.readline() == "n" + os.linesep
+    assert client.recv() == ("missed" + os.linesep + prompt, False)
+
+    debugger.close()
+    assert client.recv() == ("", True)
+    assert not client.resume(timeout=0)
+
+
+def test_server_rejects_bad_token():
+    """Test a client can't resume a session without the right token."""
+    port = find_unused_port()
+    debugger = pdb_socket.PdbServer(port)
+    client = pdb_socket.PdbClient(port)
+    client.connect()
+    sock, _ = debugger._sock.accept()
+    debugger._start_session(sock)
+
+    prompt = pdb_socket._PdbStr("(Pdb) ", prompt=True)
+    debugger.stdout.write(prompt)
+    client.recv()
+    client._client_io.session_token = "bad"
+    assert not client.resume(timeout=5)
+    debugger.close()
+
+
+def test_wrapper_idle_timeout():
+    """Test the wrapper sends heartbeats, warns, then times out an idle client."""
+    sock1, sock2 = socket.socketpair()
+    server_io = pdb_socket.PdbIOWrapper(sock1)
+    client_io = pdb_socket.PdbIOWrapper(sock2)
+    server_io.enable_heartbeat(0.05, idle_timeout=0.5, idle_warning=0.25)
+    with pytest.raises(pdb_socket.SessionTimeout):
+        server_io.readline()
+
+    sock1.close()
+    assert client_io.read().startswith("*** Idle for too long")
+
+
+def test_wrapper_heartbeat_high_fd():
+    """Test waiting for input works on file descriptors select() can't take."""
+    sock1, sock2 = socket.socketpair()
+    server_io = pdb_socket.PdbIOWrapper(_high_fd(sock1))
+    client_io = pdb_socket.PdbIOWrapper(sock2)
+    server_io.enable_heartbeat(0.05)
+    threading.Timer(0.2, client_io.write, ("continue\n",)).start()
+    assert server_io.readline() == "continue\n"
+
+
+def test_wrapper_read_error_ends_session():
+    """Test unexpected errors while reading end the session instead of escaping."""
+    sock1, sock2 = socket.socketpair()
+    server_io = pdb_socket.PdbIOWrapper(sock1)
+    server_io.enable_heartbeat(0.05)
+    server_io._wait_for_input = lambda: 1 / 0
+    with pytest.raises(pdb_socket.SessionTimeout):
+        server_io.readline()
+
+
+def test_wrapper_input_resets_idle_timeout():
+    """Test input from the client keeps the session alive."""
+    sock1, sock2 = socket.socketpair()
+    server_io = pdb_socket.PdbIOWrapper(sock1)
+    client_io = pdb_socket.PdbIOWrapper(sock2)
+    server_io.enable_heartbeat(0.05, idle_timeout=0.5, idle_warning=0.1)
+    for _ in range(3):
+        time.sleep(0.3)
+        client_io.write("n" + os.linesep)
+        assert server_io.readline() == "n" + os.linesep
+    # Heartbeats are swallowed by the client.
+    assert client_io.poll(0.2) == ("", False)
+
+
+@pytest.mark.parametrize("sep", ["\n", "\r\n", "a\r\nb", "\r\n\r\n"])
+def test_buffer_matches_str(sep):
+    """Test the chunked buffer behaves like slicing a str."""
+    rng = random.Random(0)
+    buf = pdb_socket._PdbBuffer()
+    expected = ""
+    for _ in range(2000):
+        if rng.random() < 0.6:
+            text = "".join(rng.choice("ab\r\n") for _ in range(rng.randint(0, 5)))
+            buf.append(text)
+            expected += text
+        else:
+            idx = buf.find(sep)
+            assert idx == (expected.find(sep) + len(sep) if sep in expected else -1)
+            size = idx if idx >= 0 else rng.randint(0, len(expected))
+            assert buf.take(size) == expected[:size]
+            expected = expected[size:]
+        assert len(buf) == len(expected)
+    assert buf.take_all() == expected
+
+
+def test_buffer_finds_long_separator_across_chunks():
+    """Test a separator split over more chunks than were there when searching."""
+    buf = pdb_socket._PdbBuffer()
+    for text in ["x\r", "\n", "\r"]:
+        buf.append(text)
+        assert buf.find("\r\n\r\n") == -1
+    buf.append("\ny")
+    assert buf.find("\r\n\r\n") == 5
+    assert buf.take(5) == "x\r\n\r\n"
+
+
+def test_wrapper_readline_large_input():
+    """Test reading many lines pasted in one large frame."""
+    sock1, sock2 = socket.socketpair()
+    pdb_io1 = pdb_socket.PdbIOWrapper(sock1)
+    pdb_io2 = pdb_socket.PdbIOWrapper(sock2)
+    lines = ["x = {}{}".format(i, os.linesep) for i in range(20000)]
+    writer = threading.Thread(target=pdb_io2.write, args=("".join(lines),))
+    writer.start()
+    for line in lines:
+        assert pdb_io1.readline() == line
+    writer.join()
+
+
+def test_wrapper_non_ascii():
+    """Test frames are sized in bytes so non-ASCII text survives."""
+    sock1, sock2 = socket.socketpair()
+    pdb_io1 = pdb_socket.PdbIOWrapper(sock1)
+    pdb_io2 = pdb_socket.PdbIOWrapper(sock2)
+    msg = "café ☃" + os.linesep
+    pdb_io2.write(msg)
+    pdb_io2.write(msg)
+    assert pdb_io1.readline() == msg
+    assert pdb_io1.readline() == msg
+
+
+def test_server_runs_uploaded_script():
+    """Test an uploaded script runs in the current frame and errors are shown."""
+    val = 1
+    debugger = pdb_socket.PdbServer(0)
+    sock1, sock2 = socket.socketpair()
+    debugger._start_session(sock1)
+    client_io = pdb_socket.PdbIOWrapper(sock2)
+    client_io.upload_script("ok.py", "print(val)\nval = 2\n")
+    client_io.upload_script("bad.py", "x = 1\n1 / 0\n")
+    client_io.write("runscript ok.py\nrunscript bad.py\nrunscript ok.py\ncontinue\n")
+    pdb.Pdb.set_trace(debugger)
+    debugger.close()
+    debugger.close_listener()
+
+    output, _ = client_io.read_prompt()
+    assert val == 2
+    output = client_io.read()
+    assert "1\n" in output
+    assert 'File "bad.py", line 2, in <module>' in output
+    assert "ZeroDivisionError" in output
+    assert "*** No script 'ok.py' was uploaded by the client." in output
+
+
+def _answer():
+    return 1
+
+
+def test_server_patches_with_uploaded_file():
+    """Test patch uses the file uploaded by the client."""
+    debugger = pdb_socket.PdbServer(0)
+    sock1, sock2 = socket.socketpair()
+    debugger._start_session(sock1)
+    client_io = pdb_socket.PdbIOWrapper(sock2)
+    client_io.upload_script("fix.py", "def _answer():\n    return 42\n")
+    client_io.write(
+        "patch {0}._answer fix.py\npatch {0}._answer fix.py\ncontinue\n".format(
+            __name__
+        )
+    )
+    pdb.Pdb.set_trace(debugger)
+    debugger.close()
+    debugger.close_listener()
+
+    try:
+        assert _answer() == 42
+    finally:
+        debugger.do_unpatch("")
+    assert _answer() == 1
+    client_io.read_prompt()
+    output = client_io.read()
+    assert "Patched {}._answer with fix.py".format(__name__) in output
+    assert "*** No script 'fix.py' was uploaded by the client." in output
+
+
+def _spin():
+    while True:
+        pass
+
+
+def _debug_in_thread(debugger):
+    """Start a session over a socket pair with the debugger in another thread."""
+    sock1, sock2 = socket.socketpair()
+    debugger._start_session(sock1)
+
+    def target():
+        pdb.Pdb.set_trace(debugger)
+        debugger.close()
+        debugger.close_listener()
+
+    thread = threading.Thread(target=target)
+    thread.daemon = True
+    thread.start()
+    client = pdb_socket.PdbClient(debugger.bound_port)
+    client._client_io = pdb_socket.PdbIOWrapper(sock2)
+    client.recv()
+    return client, thread
+
+
+def test_server_holds_off_catch_and_watch_while_stopped():
+    """Test catchpoints and watchpoints are both held off at the prompt."""
+    debugger = pdb_socket.PdbServer(0)
+    client, thread = _debug_in_thread(debugger)
+    assert debugger._watch_stopped and debugger._catch_stopped
+    client.send("continue")
+    thread.join(5)
+    assert not debugger._watch_stopped and not debugger._catch_stopped
+
+
+class _Obj(object):
+    pass
+
+
+def _stop_then_collect(debugger, frame):
+    """Stop in `frame`, running a weakref callback before it gets to its next line."""
+    debugger._stop_in(frame)
+    weakref.ref(_Obj(), lambda ref: None)
+
+
+def test_server_stops_in_frame():
+    """Test the debugger stops in the given frame, not in a callback run first."""
+    debugger = pdb_socket.PdbServer(0)
+    sock1, sock2 = socket.socketpair()
+    debugger._start_session(sock1)
+
+    def target():
+        # The object dies once the debugger traces, the callback runs first.
+        _stop_then_collect(debugger, sys._getframe())
+        debugger.close()
+
+    thread = threading.Thread(target=target)
+    thread.daemon = True
+    thread.start()
+    client_io = pdb_socket.PdbIOWrapper(sock2)
+    msg, _ = client_io.read_prompt()
+    assert "target()\n-> debugger.close()" in msg
+    client_io.write("continue\n")
+    thread.join(5)
+    assert not thread.is_alive()
+
+
+def test_server_cancels_command():
+    """Test the client can cancel a command that runs forever."""
+    client, thread = _debug_in_thread(pdb_socket.PdbServer(0))
+    client.send("p _spin()")
+    time.sleep(0.2)
+    assert client.cancel()
+    output, closed = client.recv()
+    assert "*** pdb_attach.pdb_socket.CommandCancelled" in output
+    assert "*** Command cancelled by the client." in output
+    assert not closed
+
+    assert "2\n" in client.send_and_recv("p 1 + 1")[0]
+    client.send("continue")
+    thread.join(5)
+    assert not thread.is_alive()
+
+
+class _CancellingSocket(object):
+    """Socket that cancels the running command after sending its first data."""
+
+    def __init__(self, sock, cancel):
+        self._sock = sock
+        self._cancel = cancel
+
+    def sendall(self, data):
+        self._sock.sendall(data)
+        cancel, self._cancel = self._cancel, None
+        if cancel is not None:
+            cancel("mid-frame")
+
+
+def test_server_holds_cancel_while_sending():
+    """Test a cancellation arriving between a frame's header and payload waits for the payload."""
+    debugger = pdb_socket.PdbServer(0)
+    sock1, sock2 = socket.socketpair()
+    sock2.settimeout(5)
+    server_io = pdb_socket.PdbIOWrapper(
+        _CancellingSocket(sock1, debugger._cancel_command)
+    )
+    server_io.guard_writes(debugger._hold_cancel)
+    client_io = pdb_socket.PdbIOWrapper(sock2)
+    msg = "x" * (2 * server_io.bulk_threshold)
+
+    debugger._command_thread = threading.current_thread().ident
+    try:
+        with pytest.raises(pdb_socket.CommandCancelled):
+            server_io.write(msg)
+            # Never reached, the cancellation is raised as the write returns.
+            time.sleep(1)
+    finally:
+        debugger._end_command()
+        debugger.close_listener()
+    assert client_io.read(len(msg)) == msg
+
+
+def test_server_command_timeout():
+    """Test commands running past the time budget are cancelled."""
+    client, thread = _debug_in_thread(pdb_socket.PdbServer(0, command_timeout=0.2))
+    start = time.time()
+    output, _ = client.send_and_recv("p _spin()")
+    assert time.time() - start < 5
+    assert "*** Command cancelled after 0.2 seconds." in output
+
+    # Fast commands don't leave a cancellation behind.
+    assert "3\n" in client.send_and_recv("p 1 + 2")[0]
+    time.sleep(0.3)
+    assert "4\n" in client.send_and_recv("p 2 + 2")[0]
+    client.send("continue")
+    thread.join(5)
+    assert not thread.is_alive()
+
+
+def test_shared_ring_wraps():
+    """Test data larger than the ring goes through as the reader frees space."""
+    ring, path = pdb_transport._SharedRing.create(64)
+    try:
+        reader = pdb_transport._SharedRing.attach(path, 64)
+    finally:
+        os.unlink(path)
+    payload = bytes(bytearray(random.getrandbits(8) for _ in range(10000)))
+    received = bytearray(len(payload))
+
+    thread = threading.Thread(target=reader.read_into, args=(received, 5))
+    thread.start()
+    assert ring.write(payload, 5)
+    thread.join()
+    assert bytes(received) == payload
+    assert not ring.write(b"x" * 65, 0.05)
+    ring.close()
+    reader.close()
+
+
+def test_wrapper_sends_bulk_output_through_shared_memory():
+    """Test large output goes through shared memory once the server accepts it."""
+    sock1, sock2 = socket.socketpair()
+    server_io = pdb_socket.PdbIOWrapper(sock1)
+    client_io = pdb_socket.PdbIOWrapper(sock2)
+    client_io.request_shared_memory(4096)
+    client_io.write("p big\n")
+    assert server_io.readline() == "p big\n"
+    assert server_io._ring is not None
+
+    big = "é" * 100000 + "\n"
+    prompt = pdb_socket._PdbStr("(Pdb) ", prompt=True)
+    bulk = []
+    send_bulk = server_io._send_bulk
+    server_io._send_bulk = lambda code, data: bulk.append(code) or send_bulk(code, data)
+    thread = threading.Thread(
+        target=lambda: (server_io.write(big), server_io.write(prompt))
+    )
+    thread.start()
+    assert client_io.read_prompt() == (big + prompt, False)
+    thread.join()
+    assert bulk == [pdb_socket.PdbIOWrapper._TEXT]
+    assert client_io._ring is not None
+    assert not os.path.exists(client_io._ring_path)
+    server_io.close()
+    client_io.close()
+
+
+def test_wrapper_falls_back_to_socket():
+    """Test output still arrives over the socket if the server can't map the ring."""
+    sock1, sock2 = socket.socketpair()
+    server_io = pdb_socket.PdbIOWrapper(sock1)
+    client_io = pdb_socket.PdbIOWrapper(sock2)
+    client_io.request_shared_memory(4096)
+    # As if the server ran on another host.
+    os.rename(client_io._ring_path, client_io._ring_path + ".moved")
+    client_io._ring_path += ".moved"
+    client_io.write("p big\n")
+    assert server_io.readline() == "p big\n"
+    assert server_io._ring is None
+
+    big = "x" * 100000
+    server_io.write(big)
+    server_io.write(pdb_socket._PdbStr("(Pdb) ", prompt=True))
+    assert client_io.read_prompt() == (big + "(Pdb) ", False)
+    assert client_io._ring is None and client_io._pending_ring is None
+    assert not os.path.exists(client_io._ring_path)
+    server_io.close()
+    client_io.close()
@@ -0,0 +1,77 @@
+# -*- mode: python -*-
+"""PdbStack tests."""
+from __future__ import unicode_literals
+
+import io
+
+from context import pdb_stack
+from helpers import run_debugger
+
+
+def test_collapse():
+    """Test runs of repeated frames and cycles are grouped."""
+    keys = list("ab") + ["c"] * 5 + list("dede") + list("fgfgfg") + ["h"]
+    assert pdb_stack.collapse(keys, 0, len(keys), 4, 3) == [
+        (0, 1, 1),
+        (1, 1, 1),
+        (2, 1, 5),
+        (7, 1, 1),
+        (8, 1, 1),
+        (9, 1, 1),
+        (10, 1, 1),
+        (11, 2, 3),
+        (17, 1, 1),
+    ]
+    assert pdb_stack.collapse(keys, 3, 6, 4, 3) == [(3, 1, 3)]
+
+
+def recurse(n, debugger):
+    """Recurse `n` times, then break into the debugger."""
+    if n == 0:
+        debugger.set_trace()
+        return
+    if n % 2:
+        recurse(n - 1, debugger)
+    else:
+        recurse(n - 1, debugger)
+
+
+def run_deep(cmds, depth=200, **attrs):
+    """Break into the debugger `depth` frames deep and return its output."""
+    return run_debugger(
+        pdb_stack.PdbStack, cmds, lambda debugger: recurse(depth, debugger), **attrs
+    )
+
+
+def test_where_collapses_recursion():
+    """Test recursion is shown as one cycle and the current frame is kept."""
+    out = run_deep(["where", "up", "where"])
+    assert "  [previous 2 frames repeated 99 more times, frames" in out
+    assert out.count("recurse()") < 20
+    assert "> {}".format(__file__.rstrip("c")) in out
+
+
+def test_where_hides_middle_and_expands():
+    """Test very deep stacks are cut to the limit and ranges can be expanded."""
+    out = run_deep(
+        ["where", "where 5-7", "where 3", "where 7-5", "where x"],
+        where_min_repeats=1000,
+        where_limit=30,
+        where_head=5,
+    )
+    lines = out.splitlines()
+    hidden = [line for line in lines if "hidden" in line]
+    assert len(hidden) == 1
+    first, last = hidden[0].split("`where ")[1].rstrip("`]").split("-")
+    assert int(last) - int(first) > 150
+    assert len(lines) < 150
+    assert "*** Frames are numbered from 0 to" in out
+    assert "*** Expected a frame number or range, got 'x'." in out
+
+
+def test_where_short_stack_unchanged():
+    """Test shallow stacks print like pdb's where."""
+    inp = io.StringIO("where\ncontinue\n")
+    out = io.StringIO()
+    pdb_stack.PdbStack(stdin=inp, stdout=out).set_trace()
+    assert not [line for line in out.getvalue().splitlines() if line.startswith("  [")]
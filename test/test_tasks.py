@@ -0,0 +1,103 @@
+# -*- mode: python -*-
+"""PdbTasks tests."""
+from __future__ import unicode_literals
+
+import io
+import re
+import time
+
+import pytest
+
+from context import pdb_tasks
+
+asyncio = pytest.importorskip("asyncio")
+
+
+def run_in_loop(cmds):
+    """Break into a running loop with `cmds` as input and return the output.
+
+    The debugger is started twice, once while a worker task waits, and again
+    after a slow callback has run.
+    """
+    inp = io.StringIO("\n".join(cmds + [""]))
+    out = io.StringIO()
+    debugger = pdb_tasks.PdbTasks(stdin=inp, stdout=out)
+
+    async def worker(event):
+        secret = "worker local"  # noqa: F841
+        await event.wait()
+
+    async def main():
+        event = asyncio.Event()
+        task = asyncio.ensure_future(worker(event))
+        await asyncio.sleep(0)
+        debugger.set_trace()
+        await asyncio.sleep(0)
+        time.sleep(0.05)
+        await asyncio.sleep(0)
+        debugger.set_trace()
+        event.set()
+        await task
+
+    # asyncio.run was added in Python 3.7.
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(main())
+    finally:
+        loop.close()
+    return out.getvalue()
+
+
+def test_no_loop():
+    """Test the commands need a running loop."""
+    inp = io.StringIO("tasks\ncontinue\n")
+    out = io.StringIO()
+    pdb_tasks.PdbTasks(stdin=inp, stdout=out).set_trace()
+    assert "*** No event loop is running in this thread." in out.getvalue()
+
+
+def test_select_task():
+    """Test a task's suspended frame can be listed, selected and inspected."""
+    # Tasks are listed by name, which is made up from the id before Python 3.8,
+    # so look for the worker in either place.
+    out = run_in_loop(
+        [
+            "tasks",
+            "task 0",
+            "p secret",
+            "task 1",
+            "p secret",
+            "task",
+            "task 5",
+            "continue",
+            "continue",
+        ]
+    )
+    assert re.search(r"  [01]  Task-\w+  running  main\(\) at", out)
+    assert re.search(r"  [01]  Task-\w+  pending  worker\(\) at", out)
+    assert "'worker local'" in out
+    assert "-> await asyncio.sleep(0)" in out.rsplit("'worker local'", 1)[1]
+    assert "*** No task '5', list the tasks with `tasks`." in out
+
+
+def test_select_task_reset_at_stop():
+    """Test the listed tasks and the selected task are forgotten at the next stop."""
+    out = run_in_loop(["tasks", "task 1", "continue", "task 0", "task", "continue"])
+    second_stop = out.split("-> event.set()")[1]
+    assert "*** No task '0', list the tasks with `tasks`." in second_stop
+    assert "-> await" not in second_stop
+
+
+def test_slow_callbacks():
+    """Test slow callbacks are recorded once asked for."""
+    out = run_in_loop(
+        ["loop slow 0.01", "continue", "loop", "loop slow off", "continue"]
+    )
+    assert "Recording callbacks slower than 0.01s." in out
+    assert "EventLoop: 2 tasks" in out
+    assert "Callbacks slower than 0.01s:" in out
+    assert "1x  max 0.0" in out
+    assert "step of Task-" in out
+    assert asyncio.Handle._run is pdb_tasks.asyncio.events.Handle._run
+    assert not asyncio.Handle._run.__qualname__.startswith("_SlowCallbacks")
+    assert "Stopped recording slow callbacks." in out
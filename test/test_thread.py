@@ -0,0 +1,202 @@
+# -*- mode: python -*-
+"""PdbThread tests."""
+from __future__ import unicode_literals
+
+import threading
+import time
+import weakref
+
+try:
+    from test.support.socket_helper import find_unused_port
+except ImportError:
+    from test.support import find_unused_port
+
+import pytest
+
+from context import pdb_attach, pdb_socket, pdb_thread
+
+
+def test_thread_listen_unlisten():
+    """Test the listener thread is started and stopped."""
+    pdb_thread.PdbThread.listen(0)
+    listener = pdb_thread.PdbThread._listener
+    assert listener._thread.is_alive()
+    pdb_thread.PdbThread.unlisten()
+    assert not listener._thread.is_alive()
+    assert pdb_thread.PdbThread._listener is None
+
+
+def test_thread_breaks_in():
+    """Test a client can debug the listening thread without a signal."""
+    port = find_unused_port()
+    pdb_thread.PdbThread.listen(port)
+    output = []
+
+    def client():
+        pdb_client = pdb_socket.PdbClient(port)
+        pdb_client.connect(timeout=5)
+        output.append(pdb_client.recv())
+        output.append(pdb_client.send_and_recv("val[0] = True"))
+        output.append(pdb_client.send_and_recv("detach"))
+
+    client_thread = threading.Thread(target=client)
+    client_thread.start()
+    val = [False]
+    deadline = time.time() + 5
+    while not val[0] and time.time() < deadline:
+        pass
+    client_thread.join()
+    pdb_thread.PdbThread.unlisten()
+
+    assert val[0] is True
+    assert output[-1][1] is True
+
+
+def test_thread_gives_up_break_in():
+    """Test a thread stuck in a C call is given up on and the next client is served."""
+    port = find_unused_port()
+    pdb_thread.PdbThread.listen(port)
+    listener = pdb_thread.PdbThread._listener
+    listener.break_in_notice = 0.1
+    listener.break_in_timeout = 0.3
+    output = []
+
+    def client(cmds):
+        pdb_client = pdb_socket.PdbClient(port)
+        pdb_client.connect(timeout=5)
+        output.append(pdb_client.recv())
+        for cmd in cmds:
+            output.append(pdb_client.send_and_recv(cmd))
+
+    # Joining waits in C, the thread can't break in until the client is done.
+    client_thread = threading.Thread(target=client, args=([],))
+    client_thread.start()
+    client_thread.join(5)
+    msg, closed = output.pop()
+    assert "*** Waiting for thread" in msg
+    assert "client_thread.join(5)" in msg
+    assert "*** Gave up waiting for thread" in msg
+    assert closed
+
+    client_thread = threading.Thread(target=client, args=(["val[0] = True", "detach"],))
+    client_thread.start()
+    val = [False]
+    deadline = time.time() + 5
+    while not val[0] and time.time() < deadline:
+        pass
+    client_thread.join()
+    pdb_thread.PdbThread.unlisten()
+    assert val[0] is True
+    assert output[-1][1] is True
+
+
+@pytest.mark.skipif(
+    not hasattr(threading, "settrace_all_threads"),
+    reason="Needs threading.settrace_all_threads, the hook that sees callbacks.",
+)
+def test_thread_skips_callbacks():
+    """Test the thread breaks into its own frame rather than a callback it runs."""
+    port = find_unused_port()
+    pdb_thread.PdbThread.listen(port)
+    output = []
+
+    def client():
+        pdb_client = pdb_socket.PdbClient(port)
+        pdb_client.connect(timeout=5)
+        output.append(pdb_client.recv())
+        output.append(pdb_client.send_and_recv("val[0] = True"))
+        output.append(pdb_client.send_and_recv("detach"))
+
+    class _Obj(object):
+        pass
+
+    def callback(ref):
+        pass
+
+    client_thread = threading.Thread(target=client)
+    client_thread.start()
+    val = [False]
+    deadline = time.time() + 5
+    while not val[0] and time.time() < deadline:
+        # The object dies once the sleep is over, the thread calls back first.
+        time.sleep(0.05), weakref.ref(_Obj(), callback)  # noqa: B018
+    client_thread.join()
+    pdb_thread.PdbThread.unlisten()
+
+    assert "test_thread_skips_callbacks()" in output[0][0]
+    assert val[0] is True
+
+
+def test_thread_session_ends_on_continue():
+    """Test the next client is served once a client continues without breakpoints."""
+    port = find_unused_port()
+    pdb_thread.PdbThread.listen(port)
+    output = []
+
+    def client(cmds):
+        pdb_client = pdb_socket.PdbClient(port)
+        pdb_client.connect(timeout=5)
+        pdb_client._client.settimeout(5)
+        output.append(pdb_client.recv())
+        for cmd in cmds:
+            output.append(pdb_client.send_and_recv(cmd))
+
+    val = [False]
+    deadline = time.time() + 10
+    for cmds in [["continue"], ["val[0] = True", "detach"]]:
+        client_thread = threading.Thread(target=client, args=(cmds,))
+        client_thread.start()
+        # Wait without calling into Python code the thread could break into.
+        expected = len(output) + len(cmds) + 1
+        while len(output) < expected and time.time() < deadline:
+            pass
+        client_thread.join()
+    pdb_thread.PdbThread.unlisten()
+
+    assert output[1] == ("", True)
+    assert output[2][0].endswith("(Pdb) ")
+    assert val[0] is True
+
+
+@pytest.mark.skipif(
+    not hasattr(threading, "settrace_all_threads"),
+    reason="Needs threading.settrace_all_threads.",
+)
+def test_thread_restores_trace_hook():
+    """Test the trace hook the threads had is put back after breaking in."""
+
+    def hook(frame, event, arg):
+        return None
+
+    threading.settrace_all_threads(hook)
+    try:
+        test_thread_breaks_in()
+        assert threading.gettrace() is hook
+    finally:
+        threading.settrace_all_threads(None)
+
+
+def test_thread_rejects_signum():
+    """Test a signal can't be given to the thread backend."""
+    with pytest.raises(ValueError):
+        pdb_attach.listen(0, signum=10, backend="thread")
+
+
+@pytest.mark.skipif(
+    hasattr(threading, "settrace_all_threads"),
+    reason="Any thread can be debugged on Python 3.12 and up.",
+)
+def test_thread_only_main_before_312():
+    """Test other threads can't be targeted without settrace_all_threads."""
+    errors = []
+
+    def target():
+        try:
+            pdb_thread.PdbThread(0)
+        except ValueError as e:
+            errors.append(e)
+
+    other = threading.Thread(target=target)
+    other.start()
+    other.join()
+    assert len(errors) == 1
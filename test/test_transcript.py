@@ -0,0 +1,91 @@
+# -*- mode: python -*-
+"""Transcript recording and replay tests."""
+from __future__ import unicode_literals
+
+import io
+import os
+import socket
+import time
+
+from context import pdb_replay, pdb_socket, pdb_transcript
+
+
+def test_transcript_round_trip():
+    """Test records are read back as written, split into sessions."""
+    f = io.BytesIO()
+    writer = pdb_transcript.TranscriptWriter(f)
+    writer.write(pdb_transcript.SENT, b"5|1|a|b\nc")
+    writer.write(pdb_transcript.RECEIVED, b"0|2|")
+    pdb_transcript.TranscriptWriter(f).write(pdb_transcript.SENT, b"2|0|\xc3\xa9")
+
+    f.seek(0)
+    sessions = pdb_transcript.read_sessions(f)
+    assert [[r[1:] for r in session] for session in sessions] == [
+        [(">", 1, "a|b\nc"), ("<", 2, "")],
+        [(">", 0, "é")],
+    ]
+    assert all(r.offset >= 0 for session in sessions for r in session)
+
+
+def test_wrapper_records_frames():
+    """Test the server records what it sends and receives."""
+    f = io.BytesIO()
+    client_io, server_io = [
+        pdb_socket.PdbIOWrapper(sock) for sock in socket.socketpair()
+    ]
+    server_io.record(pdb_transcript.TranscriptWriter(f))
+    server_io.write(pdb_socket._PdbStr("(Pdb) ", prompt=True))
+    client_io.write("p 1\n")
+    assert server_io.readline() == "p 1\n"
+
+    f.seek(0)
+    (session,) = pdb_transcript.read_sessions(f)
+    assert [r[1:] for r in session] == [(">", 1, "(Pdb) "), ("<", 0, "p 1\n")]
+
+
+def _record_session(path):
+    client = pdb_socket.PdbClient(pdb_replay.serve_in_thread(transcript=path))
+    client.connect()
+    client.recv()
+    client.send_and_recv("p 1 + 1")
+    client.run_script("script.py", "print('from a script')\n")
+    client.send_and_recv("detach")
+
+    # The transcript is closed right after the session ends.
+    deadline = time.time() + 5
+    while time.time() < deadline:
+        with open(path, "rb") as f:
+            sessions = pdb_transcript.read_sessions(f)
+        if sessions and sessions[-1][-1].code == pdb_socket.PdbIOWrapper._END:
+            return sessions[-1]
+        time.sleep(0.05)
+    raise AssertionError("The session wasn't recorded.")
+
+
+def test_replay_matches_recording(tmpdir):
+    """Test a recorded session replays with the same output."""
+    path = os.path.join(str(tmpdir), "session.transcript")
+    steps = pdb_replay.steps(_record_session(path))
+    assert [step.frames for step in steps] == [
+        [],
+        [(0, "p 1 + 1\n")],
+        [(9, "script.py\nprint('from a script')\n"), (0, "runscript script.py\n")],
+        [(0, "detach\n")],
+    ]
+    assert "2\n" in steps[1].output
+    assert "from a script\n" in steps[2].output
+
+    client = pdb_socket.PdbClient(pdb_replay.serve_in_thread())
+    client.connect()
+    results = pdb_replay.replay(steps, client._client_io)
+    assert [result.output for result in results] == [step.output for step in steps]
+
+
+def test_replay_main(tmpdir, capsys):
+    """Test the command line replays and checks a transcript."""
+    path = os.path.join(str(tmpdir), "session.transcript")
+    _record_session(path)
+    assert pdb_replay.main([path, "--repeat", "2", "--check"]) == 0
+    out = capsys.readouterr().out
+    assert "run 0: 4 commands" in out
+    assert "run 1: 4 commands" in out
@@ -0,0 +1,213 @@
+# -*- mode: python -*-
+"""PdbWatch tests."""
+from __future__ import unicode_literals
+
+import io
+import threading
+
+from context import pdb_watch
+
+
+class Counter(object):
+    """Shared state for the watchpoints to catch changes to."""
+
+    limit = 10
+
+    def __init__(self):
+        self.value = 0
+
+
+class Slotted(object):
+    """State stored in slots instead of a __dict__."""
+
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+
+class Celsius(object):
+    """Temperature stored through a property."""
+
+    def __init__(self):
+        self._degrees = 0
+
+    @property
+    def degrees(self):
+        """Return the temperature."""
+        return self._degrees
+
+    @degrees.setter
+    def degrees(self, value):
+        self._degrees = value
+
+
+class Thermometer(Celsius):
+    """Class inheriting the property."""
+
+
+def corrupt(counter):
+    """Change the watched attribute somewhere deep in the program."""
+    counter.value = -1
+
+
+def make_debugger(cmds):
+    """Return a debugger with `cmds` as input and its output."""
+    inp = io.StringIO("\n".join(cmds + [""]))
+    out = io.StringIO()
+    return pdb_watch.PdbWatch(stdin=inp, stdout=out), out
+
+
+def test_watch_instance():
+    """Test only the watched instance is instrumented and changes are recorded."""
+    counter, other = Counter(), Counter()
+    debugger, out = make_debugger(
+        ["watch counter.value", "continue", "watch", "unwatch 1", "continue"]
+    )
+    debugger.set_trace()
+    assert type(counter) is not Counter and type(other) is Counter
+    assert type(counter).__name__ == "Counter" and isinstance(counter, Counter)
+    other.value = 5
+    counter.value += 1
+    corrupt(counter)
+    counter.other = "not watched"
+    debugger.set_trace()
+
+    assert type(counter) is Counter
+    out = out.getvalue()
+    assert "Watchpoint 1 on counter.value" in out
+    assert "counter.value, 2 changes" in out
+    assert "0 -> 1 in thread MainThread" in out
+    assert "1 -> -1 in thread MainThread" in out
+    assert (
+        "test_watch.py({})corrupt()".format(corrupt.__code__.co_firstlineno + 2) in out
+    )
+    assert "Removed watchpoint 1 on counter.value" in out
+
+
+def test_watch_class():
+    """Test watching a class catches changes on all its instances."""
+    counters = [Counter(), Counter()]
+    slotted = Slotted()
+    debugger, out = make_debugger(
+        [
+            "watch Counter.limit",
+            "watch Slotted.value",
+            "continue",
+            "watch",
+            "unwatch",
+            "continue",
+        ]
+    )
+    debugger.set_trace()
+    assert counters[0].limit == 10
+    counters[1].limit = 3
+    assert (counters[0].limit, counters[1].limit, Counter.limit) == (10, 3, 10)
+    del counters[1].limit
+    slotted.value = 7
+    assert slotted.value == 7
+    debugger.set_trace()
+
+    assert Counter.__dict__["limit"] == 10
+    assert type(Slotted.__dict__["value"]).__name__ == "member_descriptor"
+    out = out.getvalue()
+    assert "Counter.limit, 2 changes" in out
+    assert "10 -> 3" in out
+    assert "3 -> <deleted>" in out
+    assert "Slotted.value, 1 changes" in out
+    assert "0 -> 7" in out
+
+
+def test_watch_class_inherited_property():
+    """Test an inherited property keeps handling the value of a watched subclass."""
+    thermometer = Thermometer()
+    debugger, out = make_debugger(
+        ["watch Thermometer.degrees", "continue", "watch", "unwatch", "continue"]
+    )
+    debugger.set_trace()
+    thermometer.degrees = 21
+    assert thermometer._degrees == 21
+    assert "degrees" not in thermometer.__dict__
+    debugger.set_trace()
+
+    assert "degrees" not in Thermometer.__dict__
+    assert "0 -> 21" in out.getvalue()
+
+
+def test_watch_break():
+    """Test a watchpoint with break stops where the change was made."""
+    counter = Counter()
+    debugger, out = make_debugger(
+        [
+            "watch counter.value break",
+            "!counter.value = 2",
+            "continue",
+            "where",
+            "unwatch",
+            "continue",
+        ]
+    )
+    debugger.set_trace()
+    corrupt(counter)
+
+    out = out.getvalue()
+    # The change from the prompt was recorded without breaking.
+    assert "Watchpoint 1: counter.value changed from 2 to -1" in out
+    assert "-> counter.value = -1" in out
+
+
+class _RacingOutput(io.StringIO):
+    """Output that changes the counter in another thread when a watchpoint breaks."""
+
+    def __init__(self, counter):
+        io.StringIO.__init__(self)
+        self.counter = counter
+
+    def write(self, text):
+        if text.startswith("Watchpoint 1:") and self.counter.value == -1:
+            thread = threading.Thread(target=setattr, args=(self.counter, "value", 3))
+            thread.start()
+            thread.join()
+        return io.StringIO.write(self, text)
+
+
+def test_watch_break_one_thread_at_a_time():
+    """Test a change in another thread doesn't break while a change is breaking."""
+    counter = Counter()
+    out = _RacingOutput(counter)
+    debugger = pdb_watch.PdbWatch(
+        stdin=io.StringIO(
+            "watch counter.value break\ncontinue\nwatch\nunwatch\ncontinue\n"
+        ),
+        stdout=out,
+    )
+    debugger.set_trace()
+    corrupt(counter)
+
+    out = out.getvalue()
+    assert out.count("Watchpoint 1: counter.value changed") == 1
+    # The other thread's change was still recorded.
+    assert "counter.value (break), 2 changes" in out
+    assert "-1 -> 3 in thread" in out
+
+
+def test_watch_errors():
+    """Test bad arguments and unwatchable objects are reported."""
+    items = []  # noqa: F841
+    debugger, out = make_debugger(
+        [
+            "watch items",
+            "watch items.x",
+            "watch nope.x",
+            "watch items.x now",
+            "unwatch 3",
+            "continue",
+        ]
+    )
+    debugger.set_trace()
+    out = out.getvalue()
+    assert "*** Expected expression.attribute, got 'items'." in out
+    assert "*** Can't watch items.x:" in out
+    assert "NameError" in out
+    assert "*** Usage: watch [expression.attribute [break]]" in out
+    assert "*** No watchpoint '3'." in out